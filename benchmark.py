@@ -0,0 +1,550 @@
+#!/usr/bin/env python3
+"""
+Xano Documentation Pipeline Benchmarks
+Measures throughput and resource use of the documentation processors
+"""
+
+import io
+import os
+import re
+import sys
+import json
+import time
+import pstats
+import random
+import hashlib
+import shutil
+import cProfile
+import argparse
+import resource
+import tempfile
+import contextlib
+import tracemalloc
+import multiprocessing
+from pathlib import Path
+
+from process_xano_docs import XanoDocProcessor
+from enhanced_processor import EnhancedXanoProcessor
+from optimize_docs import (XanoDocOptimizer, HEADING_ICONS, WEBHOOK_TERM, API_ENDPOINT_TERM,
+                           WEBHOOK_TIP, API_ENDPOINT_TIP, legacy_language)
+from synthetic_corpus import generate_corpus
+from profiling import Profiler
+from pipeline import open_input, decode_input, MMAP_THRESHOLD
+from markdown_blocks import tokenize
+from rule_engine import RuleEngine
+from rules import RULES
+
+
+def legacy_clean_content(content):
+    """Original clean_content: one uncompiled re.sub per rule, kept as the baseline"""
+    content = re.sub(r'::: \{[^}]+\}', '', content)
+    content = re.sub(r':::(\s|$)', '', content)
+    content = re.sub(r'\{[^}]*\.[^}]+\}', '', content)
+    content = re.sub(r'\]\([^)]+\)\{[^}]+\}', ']', content)
+    content = re.sub(r'style="[^"]*"', '', content)
+    content = re.sub(r'style=\'[^\']*\'', '', content)
+    content = re.sub(r'data-[^=]+="[^"]*"', '', content)
+    content = re.sub(r'testid="[^"]*"', '', content)
+    content = re.sub(r'aria-[^=]+="[^"]*"', '', content)
+    content = re.sub(r'srcset="[^"]*"', '', content)
+    content = re.sub(r'sizes="[^"]*"', '', content)
+    content = re.sub(r'width="[^"]*"', '', content)
+    content = re.sub(r'height="[^"]*"', '', content)
+    content = re.sub(r'\[([^]]+)\]\{\.font-emoji[^}]*\}', r'\1', content)
+    content = re.sub(r'\n{3,}', '\n\n', content)
+
+    navigation_patterns = [
+        r'^.*Welcome to Xano!.*$',
+        r'^.*Frequently Asked Questions.*$',
+        r'^.*Security & Compliance.*$',
+        r'^.*Feature Requests.*$',
+        r'^.*Known Issues.*$',
+        r'^.*Before You Begin.*$',
+        r'^.*The Visual Builder.*$',
+        r'^\[Ctrl\].*\[K\].*$',
+        r'^.*Xano Documentation.*$'
+    ]
+    for pattern in navigation_patterns:
+        content = re.sub(pattern, '', content, flags=re.MULTILINE)
+
+    cta_patterns = [
+        r'.*Get Started.*Free.*',
+        r'.*Sign Up.*',
+        r'.*Contact.*Support.*',
+        r'.*Ask.*Question.*'
+    ]
+    for pattern in cta_patterns:
+        content = re.sub(pattern, '', content, flags=re.MULTILINE | re.IGNORECASE)
+
+    return content.strip()
+
+
+# Inputs on which deletion rules overlap, nest or join up after a deletion,
+# so merging them into one alternation would change the output
+MERGE_ADVERSARIAL = [
+    'aria-x data-y="1" z',
+    'data-a b style="x" c="d"',
+    'style="a data-b="c" d"',
+    'data-x="y aria-z="w"',
+    'sty' + 'data-q="1"' + 'le="x"',
+    'aria-' + 'style="s"' + 'label="l"',
+    'width="1" height="2" sizes="3" srcset="4" testid="5"',
+    '{.a style="b"}',
+    '::: {.x data-y="z"}',
+    'Welcome to Xano! data-x="y"\nSign Up today\n\n\n\nKnown Issues',
+    '[Ctrl] data-a="[K]"\nContact our Support\nplain line',
+]
+
+# Fragments shuffled into further adversarial inputs
+MERGE_FRAGMENTS = ['data-', 'aria-', 'style=', 'sizes=', 'width=', '"', "'", '=', ' ', 'x', '\n',
+                   '{', '}', '.', ':::', 'Sign Up', 'Known Issues', '[Ctrl]', '[K]', '](a)']
+
+
+def merge_mismatches(name, docs, generated=2000, seed=0):
+    """Inputs on which a rule table's merged passes and its rules run one by one disagree
+
+    Checks docs, MERGE_ADVERSARIAL and generated strings of MERGE_FRAGMENTS.
+    """
+    table = RULES.tables[name]
+    merged = RuleEngine(table['rules'], name, guards=table['guards'])
+    sequential = RuleEngine(table['rules'], name, merge=False, guards=table['guards'])
+    rng = random.Random(seed)
+    generated_inputs = (''.join(rng.choice(MERGE_FRAGMENTS) for _ in range(rng.randint(2, 12)))
+                        for _ in range(generated))
+    return [text for text in [*MERGE_ADVERSARIAL, *generated_inputs, *docs]
+            if merged.apply(text) != sequential.apply(text)]
+
+
+def legacy_format(optimizer, content):
+    """Original enhance_code_blocks, add_no_code_explanations and improve_structure:
+    whole-document passes that also rewrite the inside of code blocks"""
+    def add_language_hint(match):
+        code = match.group(1)
+        return f"```{legacy_language(code)}\n{code}\n```"
+
+    content = re.sub(r'```\n([^`]+)\n```', add_language_hint, content)
+    content = re.sub(r'([^\n])\n```', r'\1\n\n```', content)
+    content = re.sub(r'```\n([^\n])', r'```\n\n\1', content)
+
+    technical_terms = {
+        r'\bAPI\b(?![:\s]+)': 'API (Application Programming Interface)',
+        r'\bREST\b': 'REST (a standard way for systems to communicate)',
+        r'\bJSON\b': 'JSON (a format for structuring data)',
+        r'\bWebhook\b': 'Webhook (automated message sent when something happens)',
+        r'\bEndpoint\b': 'Endpoint (a specific URL where your API can be accessed)',
+        r'\bSchema\b': 'Schema (the structure of your database)',
+        r'\bCRUD\b': 'CRUD (Create, Read, Update, Delete operations)',
+        r'\bAuth\b': 'Auth (Authentication - verifying user identity)',
+        r'\bJWT\b': 'JWT (JSON Web Token - a secure way to handle user sessions)',
+        r'\bOAuth\b': 'OAuth (a standard for access delegation)',
+    }
+    heading = re.search(r'^## ', content, re.MULTILINE)
+    for term, explanation in technical_terms.items():
+        if heading and explanation not in content:
+            span = optimizer.term_span(content, heading.start(), re.compile(term))
+            if span is not None:
+                content = content[:span[0]] + explanation + content[span[1]:]
+    for word, term, integration, tip in [('webhook', WEBHOOK_TERM, 'n8n integration', WEBHOOK_TIP),
+                                         ('api endpoint', API_ENDPOINT_TERM, 'weweb integration', API_ENDPOINT_TIP)]:
+        if word in content.lower() and integration not in content.lower():
+            position = optimizer.tip_position(content, term)
+            if position is not None:
+                content = content[:position] + tip + content[position:]
+
+    lines = []
+    in_code_block = False
+    for line in content.split('\n'):
+        if line.strip().startswith('```'):
+            in_code_block = not in_code_block
+        if not in_code_block:
+            if line.startswith('#'):
+                level = len(line) - len(line.lstrip('#'))
+                if level > 0 and level <= 6:
+                    line = '#' * level + ' ' + line[level:].strip()
+            if line.startswith('## '):
+                for keyword, icon in HEADING_ICONS:
+                    if keyword in line.lower():
+                        line = line.replace('## ', f'## {icon} ', 1)
+                        break
+        lines.append(line)
+    content = '\n'.join(lines)
+
+    content = re.sub(r'\n(#{1,2} )', r'\n---\n\n\1', content)
+    content = re.sub(r'^Note:', '> **📝 Note:**', content, flags=re.MULTILINE)
+    content = re.sub(r'^Tip:', '> **💡 Tip:**', content, flags=re.MULTILINE)
+    content = re.sub(r'^Warning:', '> **⚠️ Warning:**', content, flags=re.MULTILINE)
+    content = re.sub(r'^Important:', '> **❗ Important:**', content, flags=re.MULTILINE)
+    return content
+
+
+def block_format(optimizer, content):
+    """Current formatting: one tokenize, then every step works on the blocks"""
+    blocks = tokenize(content)
+    optimizer.enhance_code_blocks(blocks)
+    optimizer.add_no_code_explanations(blocks)
+    return optimizer.improve_structure(blocks)
+
+
+def per_helper_analysis(processor, path, content):
+    """Analysis as process_file ran it before the shared document model:
+    every helper lowercases and scans on its own and categorize runs twice"""
+    title = processor.extract_title(content)
+    processor.categorize_file(path, content)
+    processor.extract_tags(content)
+    processor.determine_difficulty(content)
+    processor.count_code_examples(content)
+    processor.categorize_file(path, content)
+    return title
+
+
+def shared_analysis(processor, path, content):
+    """Analysis through one DocumentAnalysis passed to every helper"""
+    doc = processor.analyze_document(path, content)
+    processor.generate_frontmatter(doc)
+    processor.count_code_examples(content, doc)
+    return doc.title
+
+
+def load_corpus(input_dir):
+    """Read every markdown file under input_dir"""
+    docs = []
+    for path in sorted(Path(input_dir).rglob('*.md')):
+        with open(path, 'r', encoding='utf-8') as f:
+            docs.append(f.read())
+    return docs
+
+
+def time_per_mb(clean, docs, repeat):
+    """Best-of-repeat seconds per MB of input for a cleaning function"""
+    megabytes = sum(len(doc.encode('utf-8')) for doc in docs) / (1024 * 1024)
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for doc in docs:
+            clean(doc)
+        best = min(best, time.perf_counter() - start)
+    return best / megabytes
+
+
+def bench_clean_content(docs, repeat=3):
+    """Compare legacy and compiled clean_content on the same corpus"""
+    processor = XanoDocProcessor('.', '.')
+    mismatches = sum(1 for doc in docs if legacy_clean_content(doc) != processor.clean_content(doc))
+
+    before = time_per_mb(legacy_clean_content, docs, repeat)
+    after = time_per_mb(processor.clean_content, docs, repeat)
+
+    return {
+        'files': len(docs),
+        'megabytes': round(sum(len(doc.encode('utf-8')) for doc in docs) / (1024 * 1024), 2),
+        'passes_before': 28,
+        'passes_after': len(processor.cleaner.passes),
+        'before_ms_per_mb': round(before * 1000, 2),
+        'after_ms_per_mb': round(after * 1000, 2),
+        'speedup': round(before / after, 2),
+        'output_mismatches': mismatches,
+        'merge_mismatches': len(merge_mismatches('clean_content', docs))
+    }
+
+
+def profile_analysis(analyze, processor, docs, repeat):
+    """Per-file time of an analysis function plus its lowercasing and scan counts"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for path, content in docs:
+            analyze(processor, path, content)
+        best = min(best, time.perf_counter() - start)
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    for path, content in docs:
+        analyze(processor, path, content)
+    profiler.disable()
+
+    calls = {'lower': 0, 'scan': 0}
+    for (_, _, function), (_, count, _, _, _) in pstats.Stats(profiler).stats.items():
+        if function == "<method 'lower' of 'str' objects>":
+            calls['lower'] += count
+        elif function == 'scan':
+            calls['scan'] += count
+
+    return {
+        'us_per_file': round(best * 1e6 / len(docs), 1),
+        'lower_calls_per_file': round(calls['lower'] / len(docs), 2),
+        'keyword_scans_per_file': round(calls['scan'] / len(docs), 2)
+    }
+
+
+def bench_analysis(docs, repeat=3):
+    """Compare per-helper and shared per-file analysis of cleaned documents"""
+    processor = XanoDocProcessor('.', '.')
+    cleaned = [(Path(f'doc-{i}.md'), processor.clean_content(doc)) for i, doc in enumerate(docs)]
+
+    return {
+        'per_helper': profile_analysis(per_helper_analysis, processor, cleaned, repeat),
+        'shared_document': profile_analysis(shared_analysis, processor, cleaned, repeat)
+    }
+
+
+def bench_formatting(docs, repeat=3):
+    """Compare the multi-pass and block-based formatting of html-cleaned documents"""
+    optimizer = XanoDocOptimizer('.', '.', '.')
+    cleaned = [optimizer.clean_html_content(doc) for doc in docs]
+    blocks = [tokenize(content) for content in cleaned]
+
+    return {
+        'files': len(cleaned),
+        'blocks_per_file': round(sum(map(len, blocks)) / len(blocks), 1),
+        'code_blocks_per_file': round(sum(block.kind == 'code' for doc in blocks for block in doc) / len(blocks), 2),
+        'legacy_ms_per_mb': round(time_per_mb(lambda content: legacy_format(optimizer, content), cleaned, repeat) * 1000, 2),
+        'blocks_ms_per_mb': round(time_per_mb(lambda content: block_format(optimizer, content), cleaned, repeat) * 1000, 2),
+        # Outputs differ wherever a document has code: the block-based steps leave it alone
+        'changed_files': sum(legacy_format(optimizer, content) != block_format(optimizer, content) for content in cleaned)
+    }
+
+
+def legacy_read(path):
+    """Original kb read path: the whole file as bytes, hashed, then decoded"""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    hashlib.sha256(raw).hexdigest()
+    return raw.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+
+
+def mapped_read(path):
+    """Current kb read path: large files are hashed and decoded from a mapping"""
+    with open_input(path, os.path.getsize(path)) as raw:
+        hashlib.sha256(raw).hexdigest()
+        return decode_input(raw)
+
+
+def legacy_clean(kb, path):
+    """Read a page the original way and clean its text"""
+    return kb.clean_content(legacy_read(path))
+
+
+def mapped_clean(kb, path):
+    """Read a page like analyze_file does, cleaning raw bytes where accepted"""
+    with open_input(path, os.path.getsize(path)) as raw:
+        hashlib.sha256(raw).hexdigest()
+        return kb.clean_content(raw if kb.cleaner.accepts_bytes(raw) else decode_input(raw))
+
+
+def count_copies(engine, content):
+    """Full-size strings a rule engine allocates for content; passes that
+    match nothing hand back their input unchanged"""
+    copies = 0
+    for regex, replacement in engine.passes:
+        result = regex.sub(replacement, content)
+        copies += result is not content
+        content = result
+    return copies
+
+
+def profile_read(process, paths, repeat):
+    """Per-file time and traced peak memory of reading and cleaning each page"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for path in paths:
+            process(path)
+        best = min(best, time.perf_counter() - start)
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for path in paths:
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            process(path)
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'ms_per_file': round(best * 1000 / len(paths), 3),
+        'peak_kb_mean': round(sum(peaks) / len(peaks) / 1024, 1),
+        'peak_kb_max': round(max(peaks) / 1024, 1)
+    }
+
+
+def bench_read_path(input_dir, repeat=3, min_size=48 * 1024):
+    """Compare the legacy and memory-mapped read paths on the largest pages
+
+    Pages of min_size bytes or more are used, like the 50-65 KB function
+    reference pages; smaller corpora fall back to their 20 largest pages.
+    """
+    paths = sorted(Path(input_dir).rglob('*.md'), key=lambda path: path.stat().st_size, reverse=True)
+    large = [path for path in paths if path.stat().st_size >= min_size] or paths[:20]
+    kb = XanoDocProcessor('.', '.')
+    engines = {
+        'clean_content': kb.cleaner,
+        'deep_clean_content': EnhancedXanoProcessor('.', '.').deep_cleaner,
+        'clean_html_content': XanoDocOptimizer('.', '.', '.').html_cleaner
+    }
+    contents = [mapped_read(path) for path in large]
+    mapped = sum(1 for path in large if path.stat().st_size >= MMAP_THRESHOLD)
+    as_bytes = sum(1 for path in large if kb.cleaner.accepts_bytes(path.read_bytes()))
+
+    return {
+        'files': len(large),
+        'kb_mean': round(sum(len(content) for content in contents) / len(contents) / 1024, 1),
+        'cleaned_as_bytes': as_bytes,
+        'legacy_read': profile_read(lambda path: legacy_clean(kb, path), large, repeat),
+        'mapped_read': profile_read(lambda path: mapped_clean(kb, path), large, repeat),
+        # The legacy path holds a bytes copy and a str; mapped files only the str
+        'read_copies_per_file': {'legacy_read': 2, 'mapped_read': round(2 - mapped / len(large), 2)},
+        'rule_copies_per_file': {
+            name: round(sum(count_copies(engine, content) for content in contents) / len(contents), 2)
+            for name, engine in engines.items()
+        },
+        'rule_passes': {name: len(engine.passes) for name, engine in engines.items()}
+    }
+
+
+def corpus_size(input_dir):
+    """Number of markdown files under input_dir and their total size in MB"""
+    sizes = [path.stat().st_size for path in Path(input_dir).rglob('*.md')]
+    return len(sizes), sum(sizes) / (1024 * 1024)
+
+
+def run_processor(name, input_dir, output_dir, workers, results):
+    """Run one processor end to end in a fresh process and report its costs"""
+    if name == 'process_xano_docs':
+        processor = XanoDocProcessor(input_dir, output_dir)
+        run = lambda: processor.process_all(workers=workers, incremental=False)
+    elif name == 'enhanced_processor':
+        processor = EnhancedXanoProcessor(input_dir, output_dir)
+        run = lambda: processor.process_all_enhanced(workers=workers)
+    else:
+        processor = XanoDocOptimizer(input_dir, output_dir, Path(output_dir).parent / 'backups')
+        run = lambda: (processor.process_all_files(workers=workers), processor.generate_report())
+
+    # Stage samples come back with each file's result, so the profile also
+    # covers work done in pool workers
+    processor.profiler = Profiler()
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        run()
+    seconds = time.perf_counter() - start
+
+    results.put({
+        'seconds': seconds,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'peak_worker_rss_mb': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+        'stages': {stage: {'calls': stats.count, 'seconds': round(stats.total, 4)}
+                   for stage, stats in processor.profiler.stages.items()},
+        'slowest_rules': processor.profiler.report()['slowest_rules'][:5]
+    })
+
+
+def bench_pipeline(corpus_dir, work_dir, workers=1):
+    """Run the three processors end to end on a corpus, each in its own process"""
+    work_dir = Path(work_dir)
+    knowledge_dir = work_dir / 'knowledge'
+    runs = [
+        ('process_xano_docs', corpus_dir, knowledge_dir),
+        ('enhanced_processor', corpus_dir, knowledge_dir),
+        ('optimize_docs', knowledge_dir, work_dir / 'optimized')
+    ]
+
+    # Spawned children start clean, so peak RSS belongs to one processor
+    context = multiprocessing.get_context('spawn')
+    report = {}
+    for name, input_dir, output_dir in runs:
+        files, megabytes = corpus_size(input_dir)
+        results = context.Queue()
+        child = context.Process(target=run_processor,
+                                args=(name, str(input_dir), str(output_dir), workers, results))
+        child.start()
+        stats = results.get()
+        child.join()
+
+        report[name] = {
+            'files': files,
+            'megabytes': round(megabytes, 2),
+            'seconds': round(stats['seconds'], 3),
+            'files_per_sec': round(files / stats['seconds'], 1),
+            'mb_per_sec': round(megabytes / stats['seconds'], 3),
+            'peak_rss_mb': round(stats['peak_rss_mb'], 1),
+            'peak_worker_rss_mb': round(stats['peak_worker_rss_mb'], 1),
+            'stages': stats['stages'],
+            'slowest_rules': stats['slowest_rules']
+        }
+    return report
+
+
+def run_pipeline_benchmark(args):
+    """Benchmark the full pipeline on input_dir or a generated corpus"""
+    work_dir = Path(args.work_dir) if args.work_dir else Path(tempfile.mkdtemp(prefix='xano-bench-'))
+    try:
+        report = {'workers': args.workers}
+        corpus_dir = Path(args.input_dir)
+        if args.synthetic:
+            corpus_dir = work_dir / 'corpus'
+            start = time.perf_counter()
+            size = generate_corpus(corpus_dir, args.synthetic, args.seed)
+            report['corpus'] = {
+                'synthetic_files': args.synthetic,
+                'seed': args.seed,
+                'megabytes': round(size / (1024 * 1024), 2),
+                'generate_seconds': round(time.perf_counter() - start, 3)
+            }
+        else:
+            report['corpus'] = {'input_dir': str(corpus_dir)}
+
+        report['processors'] = bench_pipeline(corpus_dir, work_dir, args.workers)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    text = json.dumps(report, indent=2)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    print(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Xano documentation processors")
+    parser.add_argument('input_dir', nargs='?', default='.', help="Directory of markdown files to clean")
+    parser.add_argument('--repeat', type=int, default=3, help="Timing repetitions (best is reported)")
+    parser.add_argument('--pipeline', action='store_true', help="Run all three processors end to end on input_dir")
+    parser.add_argument('--synthetic', type=int, metavar='FILES',
+                        help="Run the pipeline on a generated corpus of this many files")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for the generated corpus")
+    parser.add_argument('--workers', type=int, default=1, help="Worker processes for pipeline runs")
+    parser.add_argument('--work-dir', help="Keep the corpus and outputs here instead of a temporary directory")
+    parser.add_argument('--json', help="Also write the pipeline report to this file")
+    args = parser.parse_args()
+
+    if args.pipeline or args.synthetic:
+        run_pipeline_benchmark(args)
+        return
+
+    docs = load_corpus(args.input_dir)
+    if not docs:
+        print(f"No markdown files found in {args.input_dir}")
+        sys.exit(1)
+
+    print("clean_content:")
+    for key, value in bench_clean_content(docs, args.repeat).items():
+        print(f"  {key}: {value}")
+
+    print("per-file analysis:")
+    for mode, stats in bench_analysis(docs, args.repeat).items():
+        print(f"  {mode}: " + ', '.join(f"{key}={value}" for key, value in stats.items()))
+
+    print("formatting (optimizer):")
+    for key, value in bench_formatting(docs, args.repeat).items():
+        print(f"  {key}: {value}")
+
+    print("read path (largest pages):")
+    for key, value in bench_read_path(args.input_dir, args.repeat).items():
+        print(f"  {key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Chained Documentation Pipeline
+Processes, enhances and optimizes the documentation in one run, handing documents between stages in memory
+"""
+
+import argparse
+from pathlib import Path
+
+from pipeline import parallel_map, discover_files
+from writer import MemoryWriter, OutputWriter
+from metadata_store import MetadataStore
+from rules import RULES
+from snapshot import KEEP_SNAPSHOTS
+from process_xano_docs import XanoDocProcessor
+from enhanced_processor import EnhancedXanoProcessor
+from code_examples import ExampleStore, STORE_NAME
+from optimize_docs import XanoDocOptimizer
+from frontmatter_codec import dump_frontmatter
+
+
+def render_document(frontmatter, body):
+    """A knowledge base page as the processors write it"""
+    return '---\n' + dump_frontmatter(frontmatter) + '---\n\n' + body
+
+
+class ChainedPipeline:
+    """Runs XanoDocProcessor, EnhancedXanoProcessor and XanoDocOptimizer without a tree in between
+
+    Both processors write the knowledge base to one MemoryWriter. Each page
+    keeps its frontmatter dict and body beside its text, so the optimizer
+    uses the parsed parts directly and never reads a file or loads its YAML
+    again. Cross-references need every processed page, so the knowledge
+    base stays in memory until both processors finish. A page written by
+    both processors keeps the later version, as it would on disk.
+
+    knowledge_dir is where the knowledge base would be written. Its paths
+    still name the optimizer's inputs, and with keep_intermediate the
+    knowledge base is written there too, as the separate runs would.
+    """
+
+    def __init__(self, input_dir, knowledge_dir, output_dir, backup_dir, keep_intermediate=False):
+        self.input_dir = Path(input_dir)
+        self.knowledge_dir = Path(knowledge_dir)
+        self.keep_intermediate = keep_intermediate
+        self.knowledge_base = MemoryWriter()
+        self.parts = {}
+
+        self.processor = XanoDocProcessor(input_dir, knowledge_dir)
+        self.processor.writer = self.knowledge_base
+        self.processor.documents = {}
+        self.enhancer = EnhancedXanoProcessor(input_dir, knowledge_dir)
+        self.enhancer.writer = self.knowledge_base
+        if not keep_intermediate:
+            self.processor.store = MetadataStore(':memory:')
+            self.enhancer.store = MetadataStore(':memory:')
+        self.optimizer = XanoDocOptimizer(knowledge_dir, output_dir, backup_dir)
+
+    def keep_parts(self, path, frontmatter, body):
+        """Write a page to the knowledge base, remembering its frontmatter and body tied to its text"""
+        text = render_document(frontmatter, body)
+        self.knowledge_base.write(path, text)
+        self.parts[Path(path)] = (frontmatter, body, text)
+
+    def parsed(self, path, text):
+        """(frontmatter, body) of a page, unless something without parts overwrote it"""
+        parts = self.parts.get(path)
+        if parts is None or parts[2] is not text:
+            return None
+        return parts[0], parts[1]
+
+    def process(self, workers=1):
+        """Clean every input into the in-memory knowledge base, cross-referenced"""
+        processor = self.processor
+        processor.store.start_run(processing_date=processor.processing_date)
+        results = parallel_map(processor, 'analyze_file', discover_files(self.input_dir), workers)
+        for result in results:
+            processor.record_result(result)
+        # Pages enter the knowledge base in input order, as record_result kept them
+        related = dict(processor.related_documents())
+        for output in list(processor.documents):
+            self.keep_parts(output, *processor.document_parts(output, related[output]))
+        processor.generate_index_files()
+        processor.store.finish_run()
+        print(f"Processed: {processor.store.document_count()} files "
+              f"({processor.duplicate_count} near-duplicates aliased, {processor.links.rewritten} links retargeted)")
+
+    def enhance(self, workers=1):
+        """Add the enhanced pages and reference files to the knowledge base"""
+        enhancer = self.enhancer
+        kept = 0
+        enhancer.store.start_run()
+        enhancer.examples = ExampleStore(self.knowledge_dir / STORE_NAME if self.keep_intermediate else None)
+        results = parallel_map(enhancer, 'analyze_enhanced_file', discover_files(self.input_dir), workers)
+        for result in results:
+            if enhancer.record_enhanced_result(result) is not None:
+                text = result['text']
+                self.parts[Path(result['output'])] = (result['frontmatter'], text[result['body_start']:], text)
+                kept += 1
+        enhancer.generate_reference_files()
+        if enhancer.examples.blocks:
+            enhancer.writer.write(self.knowledge_dir / 'EXAMPLES_INDEX.md', enhancer.examples.summary())
+        enhancer.store.finish_run()
+        enhancer.examples.close()
+        print(f"Enhanced: {kept} files ({enhancer.duplicate_count} near-duplicates skipped)")
+
+    def documents(self):
+        """(path, text, parsed) of every markdown page in the knowledge base, for the optimizer"""
+        for path, text in self.knowledge_base.documents():
+            if path.suffix == '.md':
+                yield path, text, self.parsed(path, text)
+
+    def write_intermediate(self):
+        """Write the knowledge base to knowledge_dir as the separate processors would"""
+        self.processor.setup_output_structure()
+        writer = OutputWriter()
+        for path, text in self.knowledge_base.documents():
+            parsed = self.parsed(path, text)
+            writer.write(path, text if parsed is None else render_document(*parsed))
+        for output, error in writer.close():
+            print(f"Error writing {output}: {error}")
+        self.processor.store.close()
+        self.enhancer.store.close()
+        print(f"Intermediate knowledge base written: {self.knowledge_dir} ({writer.written} files)")
+
+    def run(self, workers=1):
+        """Run every stage, writing only the optimized documentation unless keep_intermediate"""
+        self.process(workers)
+        self.enhance(workers)
+        if self.keep_intermediate:
+            self.write_intermediate()
+        self.optimizer.process_all_files(workers=workers, documents=self.documents())
+        self.optimizer.generate_report()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process, enhance and optimize Xano documentation in one run")
+    parser.add_argument('--workers', type=int, default=1, help="Number of worker processes")
+    parser.add_argument('--keep-intermediate', action='store_true',
+                        help="Also write the knowledge base between the processors and the optimizer")
+    parser.add_argument('--backup-mode', choices=['snapshot', 'copy'], default='snapshot',
+                        help="Hard-link files unchanged since the last backup, or copy everything")
+    parser.add_argument('--keep-backups', type=int, default=KEEP_SNAPSHOTS,
+                        help="Number of backups to keep; older ones are deleted")
+    parser.add_argument('--rules-config', help="JSON file adding or disabling cleaning rules")
+    args = parser.parse_args()
+
+    if args.rules_config:
+        try:
+            RULES.load_config(args.rules_config)
+        except (OSError, ValueError) as e:
+            parser.error(f"--rules-config: {e}")
+
+    pipeline = ChainedPipeline(
+        input_dir="/root/docu-download/output/markdown",
+        knowledge_dir="/root/xano-knowledge",
+        output_dir="/root/xano-knowledge-optimized",
+        backup_dir="/root/xano-backups",
+        keep_intermediate=args.keep_intermediate
+    )
+
+    print("Creating backup...")
+    backup_path = pipeline.optimizer.backup_existing(args.backup_mode, args.keep_backups)
+
+    pipeline.run(workers=args.workers)
+
+    print("\n✅ Pipeline complete!")
+    print(f"Optimized documentation: {pipeline.optimizer.output_dir}")
+    if backup_path:
+        print(f"Backup location: {backup_path}")
+
+
+if __name__ == "__main__":
+    main()
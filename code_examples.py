@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Code Example Store
+Extracts fenced code examples with their source location, detects their language
+and keeps every distinct snippet in a JSON Lines store that can be queried offline
+"""
+
+import os
+import re
+import sys
+import json
+import hashlib
+import argparse
+from pathlib import Path
+from collections import Counter
+
+from writer import temp_path
+
+# Store written beside the knowledge base
+STORE_NAME = 'code_examples.jsonl'
+
+# Fence labels that name the same language
+LANGUAGE_ALIASES = {
+    'js': 'javascript', 'node': 'javascript', 'jsx': 'javascript',
+    'ts': 'typescript', 'py': 'python', 'python3': 'python',
+    'sh': 'bash', 'shell': 'bash', 'console': 'bash', 'zsh': 'bash',
+    'yml': 'yaml', 'htm': 'html', 'xml': 'html', 'postgres': 'sql', 'postgresql': 'sql', 'mysql': 'sql',
+}
+
+# Weighted features per language; a snippet gets the language with the highest
+# total weight of matching features, if it reaches MIN_SCORE
+LANGUAGE_FEATURES = {
+    'json': [
+        (r'\A\s*[\[{]', 1),
+        (r'^\s*"[^"\n]+"\s*:', 3),
+    ],
+    'javascript': [
+        (r'\b(?:const|let|var)\s+[\w$]+\s*=', 3),
+        (r'\bfunction\b\s*[\w$]*\s*\(', 3),
+        (r'=>', 2),
+        (r'\bconsole\.\w+\(', 3),
+        (r'\b(?:await|async|return)\b', 1),
+        (r'\brequire\(|^\s*import\s.+\sfrom\s', 2),
+        (r'\b(?:fetch|JSON\.(?:parse|stringify))\(', 2),
+    ],
+    'typescript': [
+        (r'\binterface\s+\w+\s*\{', 3),
+        (r'\b(?:const|let)\s+\w+\s*:\s*\w+', 3),
+    ],
+    'python': [
+        (r'^\s*def\s+\w+\s*\(.*\)\s*:', 4),
+        (r'^\s*(?:import\s+\w+|from\s+[\w.]+\s+import\b)', 3),
+        (r'\bprint\(', 2),
+        (r'^\s*(?:if|elif|for|while|with|try|except)\b[^\n{;]*:\s*$', 2),
+        (r'\b(?:None|True|False|self)\b', 1),
+    ],
+    'sql': [
+        (r'(?i)\bSELECT\b[\s\S]+?\bFROM\b', 4),
+        (r'(?i)\bINSERT\s+INTO\b', 4),
+        (r'(?i)\bUPDATE\s+\w+\s+SET\b', 4),
+        (r'(?i)\bCREATE\s+(?:TABLE|INDEX|VIEW)\b', 4),
+        (r'(?i)\b(?:WHERE|JOIN|GROUP\s+BY|ORDER\s+BY)\b', 1),
+    ],
+    'php': [
+        (r'<\?php', 6),
+        (r'\$\w+\s*(?:=|->)', 2),
+    ],
+    'html': [
+        (r'(?i)<!DOCTYPE\s+html|<html\b', 5),
+        (r'(?i)</(?:div|span|p|a|ul|ol|li|body|head|table|form|button)>', 3),
+    ],
+    'css': [
+        (r'^\s*[.#]?[\w-]+(?:\s*[,>]\s*[.#]?[\w-]+)*\s*\{\s*$', 2),
+        (r'^\s*[\w-]+\s*:\s*[^;{}\n]+;\s*$', 2),
+    ],
+    'bash': [
+        (r'^\s*(?:\$\s+)?curl\s', 4),
+        (r'^\s*(?:\$\s+)?(?:npm|npx|pip|git|cd|export|echo|sudo|docker)\s', 3),
+        (r'\A#!/(?:usr/)?bin/(?:env\s+)?(?:ba|z)?sh', 5),
+        (r'\s--?[a-zA-Z][\w-]*\s', 1),
+    ],
+    'yaml': [
+        (r'^[\w-]+:[ \t]*\n[ \t]+[\w-]+:', 3),
+        (r'^\s*-\s+[\w-]+:\s', 2),
+    ],
+}
+COMPILED_FEATURES = {
+    language: [(re.compile(pattern, re.MULTILINE), weight) for pattern, weight in features]
+    for language, features in LANGUAGE_FEATURES.items()
+}
+MIN_SCORE = 3
+
+# Valid JSON is worth this much to the json score
+JSON_WEIGHT = 6
+
+
+def detect_language(code):
+    """(language, score) for a snippet, or (None, 0) when nothing scores MIN_SCORE"""
+    scores = {}
+    for language, features in COMPILED_FEATURES.items():
+        score = sum(weight for regex, weight in features if regex.search(code))
+        if score:
+            scores[language] = score
+
+    if 'json' in scores:
+        try:
+            json.loads(code)
+            scores['json'] += JSON_WEIGHT
+        except ValueError:
+            pass
+
+    if not scores:
+        return None, 0
+    # Ties go to the language listed first in LANGUAGE_FEATURES
+    language = max(scores, key=scores.get)
+    if scores[language] < MIN_SCORE:
+        return None, 0
+    return language, scores[language]
+
+
+def normalize_language(label):
+    """Canonical name for a fence label, or None for an empty one"""
+    label = label.strip().lower()
+    if not label:
+        return None
+    label = label.split()[0].strip('{}.')
+    return LANGUAGE_ALIASES.get(label, label)
+
+
+def snippet_hash(code):
+    """Identity of a snippet; surrounding blank lines and indentation do not count"""
+    return hashlib.sha256(code.strip().encode('utf-8')).hexdigest()[:16]
+
+
+def extract_examples(blocks):
+    """Every closed, non-empty code block of a tokenized document as an example
+
+    Each example records its code, its 1-based line in the document, the
+    heading of the section it is in and its language: the fence label when
+    there is one, else the detector's guess.
+    """
+    examples = []
+    line = 1
+    heading = None
+    for block in blocks:
+        if block.kind == 'heading':
+            heading = block.text.lstrip('#').strip() or heading
+        elif block.kind == 'code' and block.closed:
+            fence, _, rest = block.text.partition('\n')
+            code = rest.rpartition('\n')[0]
+            if code.strip():
+                declared = normalize_language(fence.strip()[3:])
+                language, score = (declared, None) if declared else detect_language(code)
+                examples.append({
+                    'hash': snippet_hash(code),
+                    'language': language,
+                    'declared': declared is not None,
+                    'score': score,
+                    'code': code,
+                    'line': line,
+                    'heading': heading
+                })
+        line += block.text.count('\n') + 1
+    return examples
+
+
+def format_example(example):
+    """Fenced markdown for an example, labelled with its language if known"""
+    return f"```{example['language'] or ''}\n{example['code']}\n```"
+
+
+class ExampleStore:
+    """Distinct code examples and every place each one appears, streamed to a JSON Lines file
+
+    Snippets are deduplicated by hash. A snippet's first sighting is written
+    as its full record; a repeat appends a line with only its id, its source,
+    the topics it adds and, if it is the first to carry a fence label, its
+    language. load_examples merges those lines back into one record per
+    snippet, in the order snippets were first seen. Only each snippet's
+    language and topics stay in memory, for the summary.
+
+    The file is built in a temporary file that replaces path on close.
+    Without a path nothing is written.
+    """
+
+    def __init__(self, path=None):
+        self.path = None if path is None else Path(path)
+        self.file = None
+        self.seen = {}
+        self.languages = Counter()
+        self.topics = Counter()
+        self.blocks = 0
+
+    def __getstate__(self):
+        # Workers never record examples, and an open file cannot be pickled
+        state = dict(self.__dict__)
+        state['file'] = None
+        return state
+
+    def __len__(self):
+        return len(self.seen)
+
+    def add(self, examples, path, title, topics):
+        """Record a page's examples, found at path under the given title and topics"""
+        for example in examples:
+            self.blocks += 1
+            source = {'path': path, 'title': title, 'line': example['line'], 'heading': example['heading']}
+            seen = self.seen.get(example['hash'])
+            if seen is None:
+                self.seen[example['hash']] = [example['language'], example['declared'], list(topics)]
+                self.languages[example['language'] or 'unknown'] += 1
+                self.topics.update(topics)
+                self.write({
+                    'id': example['hash'],
+                    'language': example['language'],
+                    'declared': example['declared'],
+                    'score': example['score'],
+                    'lines': example['code'].count('\n') + 1,
+                    'topics': list(topics),
+                    'sources': [source],
+                    'code': example['code']
+                })
+                continue
+
+            entry = {'id': example['hash'], 'sources': [source]}
+            known = seen[2]
+            added = []
+            for topic in topics:
+                if topic not in known:
+                    known.append(topic)
+                    added.append(topic)
+            if added:
+                entry['topics'] = added
+                self.topics.update(added)
+            # A fence label beats a guess made for an unlabelled copy
+            if example['declared'] and not seen[1]:
+                guessed = seen[0] or 'unknown'
+                self.languages[guessed] -= 1
+                if not self.languages[guessed]:
+                    del self.languages[guessed]
+                self.languages[example['language']] += 1
+                seen[:2] = [example['language'], True]
+                entry.update(language=example['language'], declared=True, score=None)
+            self.write(entry)
+
+    def write(self, entry):
+        """Append one line to the store, opening it on first use"""
+        if self.path is None:
+            return
+        if self.file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.file = open(temp_path(self.path), 'w', encoding='utf-8')
+        self.file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    def close(self):
+        """Move the streamed store into place; a run without examples leaves path alone"""
+        if self.file is not None:
+            self.file.close()
+            os.replace(self.file.name, self.path)
+            self.file = None
+
+    def summary(self, store_name=STORE_NAME):
+        """Markdown overview of the store by language and topic"""
+        parts = [
+            "# Code Examples Index\n\n",
+            f"{len(self.seen)} distinct examples from {self.blocks} code blocks. ",
+            f"Every example, with its source pages, is in `{store_name}`; ",
+            f"query it with `python code_examples.py {store_name} --language sql`.\n\n",
+            "## By Language\n\n| Language | Examples |\n|----------|----------|\n",
+        ]
+        parts.extend(f"| {language} | {count} |\n" for language, count in self.languages.most_common())
+        parts.append("\n## By Topic\n\n| Topic | Examples |\n|-------|----------|\n")
+        parts.extend(f"| {topic} | {count} |\n" for topic, count in self.topics.most_common())
+        return ''.join(parts)
+
+
+def load_examples(path):
+    """Yield the records of a store file, each merged from the lines written for its snippet"""
+    records = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            record = records.get(entry['id'])
+            if record is None:
+                records[entry['id']] = entry
+                continue
+            record['sources'].extend(entry['sources'])
+            record['topics'].extend(entry.get('topics', ()))
+            for key in ('language', 'declared', 'score'):
+                if key in entry:
+                    record[key] = entry[key]
+    yield from records.values()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query a code example store written by enhanced_processor.py")
+    parser.add_argument('store', help=f"Store file, e.g. /root/xano-knowledge/{STORE_NAME}")
+    parser.add_argument('--language', help="Only examples in this language")
+    parser.add_argument('--topic', help="Only examples from pages with this topic")
+    parser.add_argument('--contains', help="Only examples whose code contains this text")
+    parser.add_argument('--limit', type=int, default=20, help="Number of examples to show")
+    parser.add_argument('--json', action='store_true', help="Print matching records as JSON Lines")
+    args = parser.parse_args()
+
+    language = normalize_language(args.language) if args.language else None
+    topic = args.topic.lower() if args.topic else None
+    try:
+        matches = []
+        for record in load_examples(args.store):
+            if language and record['language'] != language:
+                continue
+            if topic and topic not in (t.lower() for t in record['topics']):
+                continue
+            if args.contains and args.contains not in record['code']:
+                continue
+            matches.append(record)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    for record in matches[:args.limit]:
+        if args.json:
+            print(json.dumps(record, ensure_ascii=False))
+            continue
+        source = record['sources'][0]
+        print(f"{record['id']} [{record['language'] or 'unknown'}] {source['title']} "
+              f"({source['path']}:{source['line']}, {len(record['sources'])} sources)")
+        print('    ' + record['code'].replace('\n', '\n    '))
+    if not args.json:
+        print(f"{len(matches)} matching examples")
+
+
+if __name__ == "__main__":
+    main()
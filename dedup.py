@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate Detection
+SimHash fingerprints of word shingles and a block index to find close matches
+"""
+
+import re
+import hashlib
+
+WORD = re.compile(r'\w+')
+
+# Words per shingle; three keeps reordered boilerplate from looking identical
+SHINGLE_WORDS = 3
+
+FINGERPRINT_BITS = 64
+
+# Fingerprints differing in at most this many bits are near-duplicates
+MAX_DISTANCE = 3
+
+# Bit i of every packed 8-byte digest, shifted down to the digest's lowest bit
+_LOW_BITS = {}
+
+
+def simhash(lower):
+    """64-bit SimHash of the word shingles of lowercased text
+
+    Each shingle votes on every bit with its BLAKE2 digest. The digests are
+    packed into one integer so each bit's votes are counted by a shift, a
+    mask and bit_count() instead of a Python loop over every shingle.
+    """
+    words = WORD.findall(lower)
+    shingles = [' '.join(words[i:i + SHINGLE_WORDS]) for i in range(max(len(words) - SHINGLE_WORDS + 1, 1))]
+    packed = int.from_bytes(b''.join(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest()
+                                     for shingle in shingles), 'little')
+
+    count = len(shingles)
+    mask = _LOW_BITS.get(count)
+    if mask is None:
+        mask = _LOW_BITS[count] = int.from_bytes(b'\x01\x00\x00\x00\x00\x00\x00\x00' * count, 'little')
+
+    fingerprint = 0
+    for bit in range(FINGERPRINT_BITS):
+        if ((packed >> bit) & mask).bit_count() * 2 > count:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+class DuplicateIndex:
+    """Finds a kept document whose fingerprint is within max_distance bits
+
+    Fingerprints are split into max_distance + 1 blocks, so by pigeonhole a
+    near-duplicate matches at least one block exactly; only documents sharing
+    a block are compared.
+    """
+
+    def __init__(self, max_distance=MAX_DISTANCE):
+        self.max_distance = max_distance
+        blocks = max_distance + 1
+        self.bounds = [(FINGERPRINT_BITS * i // blocks, FINGERPRINT_BITS * (i + 1) // blocks)
+                       for i in range(blocks)]
+        self.tables = [{} for _ in self.bounds]
+        self.fingerprints = {}
+
+    def blocks(self, fingerprint):
+        """The fingerprint's value in each block"""
+        return [(fingerprint >> start) & ((1 << (end - start)) - 1) for start, end in self.bounds]
+
+    def find(self, fingerprint):
+        """Key of the closest kept near-duplicate, or None"""
+        best = None
+        for table, block in zip(self.tables, self.blocks(fingerprint)):
+            for key in table.get(block, ()):
+                distance = (self.fingerprints[key] ^ fingerprint).bit_count()
+                if distance <= self.max_distance and (best is None or distance < best[0]):
+                    best = (distance, key)
+        return best[1] if best else None
+
+    def add(self, key, fingerprint):
+        """Keep a document, replacing any earlier fingerprint under the same key"""
+        self.remove(key)
+        self.fingerprints[key] = fingerprint
+        for table, block in zip(self.tables, self.blocks(fingerprint)):
+            table.setdefault(block, []).append(key)
+
+    def remove(self, key):
+        """Forget a kept document"""
+        fingerprint = self.fingerprints.pop(key, None)
+        if fingerprint is None:
+            return
+        for table, block in zip(self.tables, self.blocks(fingerprint)):
+            table[block].remove(key)
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Shared Document Model
+Per-document analysis computed once and passed through every processing stage
+"""
+
+import re
+
+# Fenced code blocks, matched the way count_code_examples always has
+CODE_FENCE = re.compile(r'```[\s\S]*?```')
+
+
+class DocumentAnalysis:
+    """Lowered text, keyword hits and derived facts for one document"""
+
+    __slots__ = ('path', 'content', 'lower', 'hits', 'title', 'category', '_code_spans')
+
+    def __init__(self, path, content, keyword_index):
+        self.path = path
+        self.content = content
+        self.lower = content.lower()
+        self.hits = keyword_index.scan(self.lower)
+        self.title = None
+        self.category = None
+        self._code_spans = None
+
+    @property
+    def code_spans(self):
+        """(start, end) offsets of fenced code blocks, found on first use"""
+        if self._code_spans is None:
+            self._code_spans = [match.span() for match in CODE_FENCE.finditer(self.content)]
+        return self._code_spans
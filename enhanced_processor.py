@@ -7,42 +7,102 @@ Performs deeper cleaning and better organization
 import os
 import re
 import json
-import yaml
 from pathlib import Path
 from datetime import datetime
 from collections import defaultdict
+import argparse
+
+from pipeline import parallel_map, discover_files, read_input
+from keyword_index import KeywordIndex
+from document import DocumentAnalysis
+from writer import OutputWriter
+from rule_engine import SpanGuard, MAX_SPAN
+from rules import RULES
+from profiling import NullProfiler, Profiler
+from dedup import DuplicateIndex, simhash
+from markdown_blocks import tokenize
+from code_examples import ExampleStore, extract_examples, format_example, STORE_NAME
+from frontmatter_codec import dump_frontmatter
+from metadata_store import MetadataStore
+
+# Shortest cleaned page that is kept; cleaning never lengthens a page, so
+# smaller inputs are skipped without being read
+MIN_CONTENT_LENGTH = 50
+
+# Machine-readable profile written by --profile runs
+PROFILE_NAME = 'enhanced_profile.json'
+
+# Documents, near-duplicate aliases and errors of each run, in input order
+METADATA_STORE_NAME = 'enhanced_metadata.db'
+
+# Ordered (pattern, replacement, flags) rules applied by deep_clean_content
+DEEP_CLEAN_RULES = [
+    # Remove all image tags with complex URLs
+    (r'!\[[^\]]*\]\([^)]*gitbook[^)]*\)', '', 0),
+    (r'\[[^\]]*\]\([^)]*gitbook[^)]*\)', '', 0),
+    
+    # Remove all remaining CSS-like content
+    (r'\{[^{}]*\}', '', re.MULTILINE),
+    
+    # Remove all div-like structures
+    (r'^:::.*$', '', re.MULTILINE),
+    
+    # Remove navigation lists
+    (r'^-\s+\[.*\].*$', '', re.MULTILINE),
+    (r'^\s*-\s+[A-Z][^:]+$', '', re.MULTILINE),
+    
+    # Remove style and class attributes
+    (r'\[([^\]]+)\]\([^)]+\)', r'\1', 0),
+    
+    # Clean up excessive whitespace
+    (r'\n{4,}', '\n\n', 0),
+    (r'^\s+$', '', re.MULTILINE),
+]
+
+# Bounds for the rules that backtrack badly on unclosed brackets
+DEEP_CLEAN_GUARDS = {
+    r'!\[[^\]]*\]\([^)]*gitbook[^)]*\)': SpanGuard('![', ']', tail=MAX_SPAN),
+    r'\[[^\]]*\]\([^)]*gitbook[^)]*\)': SpanGuard('[', ']', tail=MAX_SPAN),
+    r'\[([^\]]+)\]\([^)]+\)': SpanGuard('[', ']', tail=MAX_SPAN),
+}
+
+# Rules stay unmerged so each can be profiled on its own
+RULES.register('deep_clean_content', DEEP_CLEAN_RULES, guards=DEEP_CLEAN_GUARDS, merge=False)
+
+# Content keywords and the tags they produce
+SIMPLE_TAG_KEYWORDS = {
+    'api': 'API',
+    'database': 'Database',
+    'function': 'Functions',
+    'query': 'Queries',
+    'crud': 'CRUD',
+    'auth': 'Authentication',
+    'webhook': 'Webhooks',
+    'expression': 'Expressions',
+    'filter': 'Filters',
+    'transaction': 'Transactions'
+}
 
 class EnhancedXanoProcessor:
     def __init__(self, input_dir, output_dir):
         self.input_dir = Path(input_dir)
         self.output_dir = Path(output_dir)
         self.glossary = {}
-        self.examples = []
+        self.examples = ExampleStore()
         self.faq_items = []
+        self.keyword_index = KeywordIndex(SIMPLE_TAG_KEYWORDS)
+        self.writer = OutputWriter()
+        self.deep_cleaner = RULES.engine('deep_clean_content')
+        self.profiler = NullProfiler()
+        self.duplicates = DuplicateIndex()
+        self.duplicate_count = 0
+        self.store = MetadataStore(self.output_dir / METADATA_STORE_NAME)
         
-    def deep_clean_content(self, content):
+    def deep_clean_content(self, content, source=None):
         """Perform aggressive cleaning of HTML/CSS artifacts"""
         
-        # Remove all image tags with complex URLs
-        content = re.sub(r'!\[[^\]]*\]\([^)]*gitbook[^)]*\)', '', content)
-        content = re.sub(r'\[[^\]]*\]\([^)]*gitbook[^)]*\)', '', content)
-        
-        # Remove all remaining CSS-like content
-        content = re.sub(r'\{[^{}]*\}', '', content, flags=re.MULTILINE)
-        
-        # Remove all div-like structures
-        content = re.sub(r'^:::.*$', '', content, flags=re.MULTILINE)
-        
-        # Remove navigation lists
-        content = re.sub(r'^-\s+\[.*\].*$', '', content, flags=re.MULTILINE)
-        content = re.sub(r'^\s*-\s+[A-Z][^:]+$', '', content, flags=re.MULTILINE)
-        
-        # Remove style and class attributes
-        content = re.sub(r'\[([^\]]+)\]\([^)]+\)', r'\1', content)
-        
-        # Clean up excessive whitespace
-        content = re.sub(r'\n{4,}', '\n\n', content)
-        content = re.sub(r'^\s+$', '', content, flags=re.MULTILINE)
+        # Strip markup artifacts, timing each rule when profiling
+        content = self.deep_cleaner.apply(content, self.profiler.rule_timings(), source)
         
         # Extract actual content after massive header cleanup
         lines = content.split('\n')
@@ -138,120 +198,166 @@ class EnhancedXanoProcessor:
             else:
                 return "08-reference/functions"
                 
-    def extract_code_blocks(self, content):
-        """Extract and format code blocks properly"""
+    def analyze_document(self, file_path, content):
+        """Compute the shared analysis of a cleaned document once"""
+        doc = DocumentAnalysis(file_path, content, self.keyword_index)
+        self.profiler.lap('keyword_scan')
+        doc.title = self.extract_real_title(file_path, content)
+        self.profiler.lap('title')
+        doc.category = self.categorize_by_content(file_path, content)
+        self.profiler.lap('categorize')
+        return doc
         
-        # Find all code blocks
-        code_blocks = re.findall(r'```([^`]*)```', content, re.DOTALL)
-        
-        formatted_blocks = []
-        for block in code_blocks:
-            # Try to determine language
-            lines = block.strip().split('\n')
-            if lines:
-                first_line = lines[0].strip()
-                if first_line in ['javascript', 'js', 'json', 'sql', 'python']:
-                    # Has language specifier
-                    formatted_blocks.append(f"```{first_line}\n" + '\n'.join(lines[1:]) + "\n```")
-                else:
-                    # No language, try to guess
-                    if '{' in block or 'function' in block:
-                        formatted_blocks.append(f"```javascript\n{block}\n```")
-                    elif 'SELECT' in block.upper() or 'INSERT' in block.upper():
-                        formatted_blocks.append(f"```sql\n{block}\n```")
-                    else:
-                        formatted_blocks.append(f"```\n{block}\n```")
-                        
-        return formatted_blocks
+    def extract_code_blocks(self, content):
+        """Extract every code example once, with its line, section and language"""
+        return extract_examples(tokenize(content))
         
     def create_glossary_entry(self, term, definition):
         """Add term to glossary"""
         self.glossary[term] = definition
         
-    def process_enhanced_file(self, input_path):
-        """Process file with enhanced cleaning"""
+    def analyze_enhanced_file(self, input_path):
+        """Clean and render a single file without touching shared state"""
         
+        self.profiler.begin_file()
         try:
-            with open(input_path, 'r', encoding='utf-8') as f:
-                raw_content = f.read()
-                
-            # Skip non-documentation files
+            # Skip non-documentation files and pages too small to keep before reading them
             if any(skip in str(input_path) for skip in ['gitbook', 'fontawesome', 'static', 'cache']):
                 return None
+            size = os.path.getsize(input_path)
+            if size < MIN_CONTENT_LENGTH:
+                return None
+                
+            raw_content = read_input(input_path, size)
+            self.profiler.lap('read')
                 
             # Deep clean
-            content = self.deep_clean_content(raw_content)
+            content = self.deep_clean_content(raw_content, input_path)
+            self.profiler.lap('deep_clean_content')
             
             # Skip if too little content
-            if len(content) < 50:
+            if len(content) < MIN_CONTENT_LENGTH:
                 return None
                 
-            # Extract title
-            title = self.extract_real_title(input_path, content)
-            
-            # Categorize
-            category = self.categorize_by_content(input_path, content)
+            # Analyze once: title, category and keyword hits
+            doc = self.analyze_document(input_path, content)
+            title, category = doc.title, doc.category
             
             # Extract code examples
-            code_blocks = self.extract_code_blocks(content)
-            if code_blocks:
-                self.examples.extend([(title, block) for block in code_blocks])
-                
+            examples = self.extract_code_blocks(content)
+            self.profiler.lap('code_blocks')
+            
             # Generate clean frontmatter
             frontmatter = {
                 'title': title,
                 'category': category.split('/')[-1],
-                'tags': self.extract_simple_tags(content),
-                'has_code_examples': len(code_blocks) > 0,
+                'tags': self.extract_simple_tags(content, doc.hits),
+                'has_code_examples': len(examples) > 0,
                 'last_updated': '2025-01-23'
             }
+            self.profiler.lap('tagging')
             
             # Determine output file
             safe_filename = re.sub(r'[^\w\-]', '_', title.lower()) + '.md'
             output_path = self.output_dir / category / safe_filename
-            output_path.parent.mkdir(parents=True, exist_ok=True)
             
-            # Write clean file
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write('---\n')
-                f.write(yaml.dump(frontmatter, default_flow_style=False))
-                f.write('---\n\n')
-                f.write(f"# {title}\n\n")
-                f.write(content)
-                
-                # Add code examples section if any
-                if code_blocks:
-                    f.write("\n\n## Code Examples\n\n")
-                    for block in code_blocks:
-                        f.write(block + "\n\n")
-                        
-            return str(output_path)
+            # Render clean file
+            parts = ['---\n', dump_frontmatter(frontmatter), '---\n\n',
+                     f"# {title}\n\n", content]
+            
+            # Point examples at their lines in the rendered file
+            header_lines = sum(part.count('\n') for part in parts[:-1])
+            for example in examples:
+                example['line'] += header_lines
+            
+            # Add code examples section if any
+            if examples:
+                parts.append("\n\n## Code Examples\n\n")
+                for example in examples:
+                    parts.append(format_example(example) + "\n\n")
+            self.profiler.lap('render')
+                    
+            return {
+                'input': str(input_path),
+                'output': str(output_path),
+                'title': title,
+                'category': category,
+                'tags': frontmatter['tags'],
+                'topics': [frontmatter['category'], *frontmatter['tags']],
+                'examples': examples,
+                'simhash': simhash(doc.lower),
+                'text': ''.join(parts),
+                'frontmatter': frontmatter,
+                'body_start': len(''.join(parts[:3])),
+                'profile': self.profiler.end_file()
+            }
             
         except Exception as e:
-            print(f"Error processing {input_path}: {e}")
+            # Recorded by record_enhanced_result, so errors keep input order with workers
+            return {'input': str(input_path), 'error': str(e)}
+            
+    def record_enhanced_result(self, result):
+        """Collect an analyzed file's examples and write its output"""
+        if result is None:
             return None
+        if 'error' in result:
+            return self.record_error(result)
             
-    def extract_simple_tags(self, content):
-        """Extract simple relevant tags"""
-        tags = []
-        keywords = {
-            'api': 'API',
-            'database': 'Database',
-            'function': 'Functions',
-            'query': 'Queries',
-            'crud': 'CRUD',
-            'auth': 'Authentication',
-            'webhook': 'Webhooks',
-            'expression': 'Expressions',
-            'filter': 'Filters',
-            'transaction': 'Transactions'
-        }
+        self.profiler.merge(result['input'], result['profile'])
         
-        content_lower = content.lower()
-        for key, tag in keywords.items():
-            if key in content_lower:
-                tags.append(tag)
+        # Near-duplicates of a written page add neither an output nor examples,
+        # only their alias of it
+        duplicate_of = self.duplicates.find(result['simhash'])
+        if duplicate_of is not None:
+            self.store.add_document(result['input'], result['output'], result['title'], result['category'],
+                                    duplicate_of=Path(duplicate_of).relative_to(self.output_dir).as_posix())
+            self.duplicate_count += 1
+            return None
+            
+        try:
+            self.examples.add(result['examples'], result['output'], result['title'], result['topics'])
+            
+            output_path = Path(result['output'])
+            with self.profiler.stage('write'):
+                self.writer.write(output_path, result['text'])
+            self.duplicates.add(result['output'], result['simhash'])
+            self.store.add_document(result['input'], result['output'], result['title'], result['category'],
+                                    tags=result['tags'], code_count=len(result['examples']),
+                                    profile=result['profile'])
                 
+            return str(output_path)
+            
+        except Exception as e:
+            return self.record_error({'input': result['input'], 'error': str(e)})
+            
+    def record_error(self, result):
+        """Report and record a file whose processing failed"""
+        print(f"Error processing {result['input']}: {result['error']}")
+        self.store.add_error(result['input'], result['error'])
+        return None
+        
+    def process_enhanced_file(self, input_path):
+        """Process file with enhanced cleaning"""
+        output_path = self.record_enhanced_result(self.analyze_enhanced_file(input_path))
+        self.finish_writes()
+        return output_path
+        
+    def finish_writes(self):
+        """Wait for queued output writes and report any that failed"""
+        with self.profiler.stage('write_flush'):
+            failures = self.writer.flush()
+        for output, error in failures:
+            print(f"Error writing {output}: {error}")
+            self.store.remove_output(output)
+            self.store.add_error(output, error, 'write')
+        return failures
+            
+    def extract_simple_tags(self, content, hits=None):
+        """Extract simple relevant tags"""
+        if hits is None:
+            hits = self.keyword_index.scan(content.lower())
+            
+        tags = [tag for key, tag in SIMPLE_TAG_KEYWORDS.items() if key in hits]
         return tags[:5]  # Limit to 5 tags
         
     def generate_reference_files(self):
@@ -393,8 +499,7 @@ xano.task.schedule({
 ```
 """
         
-        with open(self.output_dir / 'QUICK_REFERENCE.md', 'w') as f:
-            f.write(quick_ref)
+        self.writer.write(self.output_dir / 'QUICK_REFERENCE.md', quick_ref)
             
         # Glossary
         glossary_content = """# Xano Glossary
@@ -516,41 +621,67 @@ xano.task.schedule({
 **Workspace**: Your Xano project environment.
 """
         
-        with open(self.output_dir / 'GLOSSARY.md', 'w') as f:
-            f.write(glossary_content)
+        self.writer.write(self.output_dir / 'GLOSSARY.md', glossary_content)
             
-    def process_all_enhanced(self):
+    def process_all_enhanced(self, workers=1):
         """Run enhanced processing"""
         
-        # Process all markdown files
-        md_files = list(self.input_dir.rglob('*.md'))
+        # Stream all markdown files through processing, merging results in input order;
+        # code examples stream to their store as they are collected
         processed = 0
+        self.store.start_run()
+        self.examples = ExampleStore(self.output_dir / STORE_NAME)
         
-        for i, md_file in enumerate(md_files):
+        results = parallel_map(self, 'analyze_enhanced_file', discover_files(self.input_dir), workers)
+        for i, analyzed in enumerate(results):
             if i % 20 == 0:
-                print(f"Processing {i}/{len(md_files)}")
-            result = self.process_enhanced_file(md_file)
+                print(f"Processing {i}")
+            result = self.record_enhanced_result(analyzed)
             if result:
                 processed += 1
                 
+        # Outputs only count once they are safely on disk
+        processed -= len(self.finish_writes())
         print(f"Processed {processed} files successfully")
+        print(f"Near-duplicates aliased: {self.duplicate_count}")
+        print(f"Errors encountered: {len(self.store.errors())} files")
         
-        # Generate reference files
+        # Generate reference files and the code example store with its overview
         self.generate_reference_files()
+        if self.examples.blocks:
+            self.writer.write(self.output_dir / 'EXAMPLES_INDEX.md', self.examples.summary())
+        self.finish_writes()
+        self.writer.close()
+        self.store.finish_run()
+        self.store.close()
+        print(f"Outputs written: {self.writer.written} ({self.writer.unchanged} already up to date)")
         
-        # Create examples index
-        if self.examples:
-            with open(self.output_dir / 'EXAMPLES_INDEX.md', 'w') as f:
-                f.write("# Code Examples Index\n\n")
-                for title, example in self.examples[:50]:  # Limit to 50
-                    f.write(f"## {title}\n\n{example}\n\n---\n\n")
+        self.examples.close()
+        print(f"Stored {len(self.examples)} distinct code examples from {self.examples.blocks} code blocks")
+        if self.profiler.enabled:
+            self.profiler.save(self.output_dir / PROFILE_NAME)
+            print(f"Profile saved: {self.output_dir / PROFILE_NAME}")
                     
         print("Enhanced processing complete!")
         
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run enhanced Xano documentation processing")
+    parser.add_argument('--workers', type=int, default=1, help="Number of worker processes")
+    parser.add_argument('--profile', action='store_true', help=f"Time each stage and rule and write {PROFILE_NAME}")
+    parser.add_argument('--rules-config', help="JSON file adding or disabling cleaning rules")
+    args = parser.parse_args()
+    
+    if args.rules_config:
+        try:
+            RULES.load_config(args.rules_config)
+        except (OSError, ValueError) as e:
+            parser.error(f"--rules-config: {e}")
+    
     processor = EnhancedXanoProcessor(
         input_dir="/root/docu-download/output/markdown",
         output_dir="/root/xano-knowledge"
     )
-    processor.process_all_enhanced()
\ No newline at end of file
+    if args.profile:
+        processor.profiler = Profiler()
+    processor.process_all_enhanced(workers=args.workers)
\ No newline at end of file
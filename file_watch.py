@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+File Watching
+Reports paths that change under a directory tree, through inotify or by polling
+"""
+
+import os
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+from pathlib import Path
+
+from pipeline import discover_files
+
+# inotify event bits, from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+# A file is reported once it is closed after writing or renamed into place,
+# never while an editor is still writing it
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_ONLYDIR
+
+EVENT_HEADER = struct.Struct('iIII')
+
+# Seconds between scans of the polling watcher
+POLL_INTERVAL = 0.5
+
+
+class InotifyWatcher:
+    """Linux inotify watches on every directory under root
+
+    Directories created or moved in later are watched as they appear and
+    reported whole, since files may land in them before their watch does.
+    If the kernel's event queue overflows, root itself is reported so the
+    caller rescans everything.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.directories = {}
+        self.watch_tree(self.root)
+
+    def watch_tree(self, top):
+        """Watch top and every directory below it"""
+        for directory, _, _ in os.walk(top):
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                error = ctypes.get_errno()
+                # A directory removed while walking needs no watch
+                if error in (errno.ENOENT, errno.ENOTDIR):
+                    continue
+                raise OSError(error, f"Cannot watch {directory}")
+            self.directories[wd] = Path(directory)
+
+    def changes(self, timeout=None):
+        """Paths changed since the last call, waiting up to timeout seconds for the first"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    changed.add(self.root)
+                    continue
+                if mask & IN_IGNORED:
+                    self.directories.pop(wd, None)
+                    continue
+                directory = self.directories.get(wd)
+                if directory is None or not name:
+                    continue
+                path = directory / os.fsdecode(name)
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        self.watch_tree(path)
+                    changed.add(path)
+                elif not mask & IN_CREATE:
+                    changed.add(path)
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Rescans root every interval and reports files whose size or mtime changed
+
+    Used where inotify is unavailable. Only files matching pattern are
+    tracked, so a scan costs one stat per input.
+    """
+
+    def __init__(self, root, pattern='*.md', interval=POLL_INTERVAL):
+        self.root = Path(root)
+        self.pattern = pattern
+        self.interval = interval
+        self.files = self.scan()
+
+    def scan(self):
+        """{path: (size, mtime_ns)} of every tracked file"""
+        files = {}
+        for path in discover_files(self.root, self.pattern):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files[path] = (stat.st_size, stat.st_mtime_ns)
+        return files
+
+    def changes(self, timeout=None):
+        """Paths changed since the last call, waiting up to timeout seconds for the first"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            delay = self.interval if deadline is None else min(self.interval, deadline - time.monotonic())
+            if delay > 0:
+                time.sleep(delay)
+            files = self.scan()
+            changed = {path for path in files.keys() | self.files.keys()
+                       if files.get(path) != self.files.get(path)}
+            self.files = files
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self):
+        pass
+
+
+def open_watcher(root, pattern='*.md', poll=False, interval=POLL_INTERVAL):
+    """An inotify watcher on root, or a polling one if asked or inotify is unavailable"""
+    if not poll:
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable ({e}); polling every {interval}s instead")
+    return PollingWatcher(root, pattern, interval)
+
+
+def debounced_changes(watcher, quiet=0.1):
+    """Wait for a change, then gather more until none arrive for quiet seconds"""
+    changed = watcher.changes()
+    while True:
+        more = watcher.changes(quiet)
+        if not more:
+            return changed
+        changed |= more
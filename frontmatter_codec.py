@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Frontmatter Codec
+Renders and parses document frontmatter exactly as yaml.dump and yaml.safe_load do, without their per-call cost
+"""
+
+import re
+from functools import lru_cache
+
+import yaml
+from yaml.nodes import ScalarNode
+from yaml.resolver import Resolver
+
+# libyaml's parser and emitter when PyYAML was built with them. libyaml
+# escapes characters past U+FFFF and some C1 controls that PyYAML writes
+# as they are under allow_unicode, so that case keeps PyYAML's emitter
+SafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+Dumper = getattr(yaml, 'CDumper', yaml.Dumper)
+
+# Line width PyYAML folds long scalars at
+WIDTH = 80
+
+STR_TAG = 'tag:yaml.org,2002:str'
+
+# Printable ASCII without leading or trailing spaces: the only strings written
+# here rather than by PyYAML, as their style never depends on the character set
+SIMPLE_STRING = re.compile(r'[!-~](?:[ -~]*[!-~])?\Z')
+KEY = re.compile(r'[A-Za-z_][A-Za-z0-9_]*\Z')
+
+# Characters that keep a string from being written plain in a block mapping
+LEADING_INDICATORS = set('#,[]{}&*!|>\'"%@`')
+BLOCK_INDICATORS = re.compile(r': |:\Z| #')
+
+LINE = re.compile(r'([A-Za-z_][A-Za-z0-9_]*):(?: (.*))?\Z')
+INT = re.compile(r'-?(?:0|[1-9][0-9]*)\Z')
+
+resolver = Resolver()
+
+
+@lru_cache(maxsize=4096)
+def render_string(value):
+    """A simple string as the emitter writes it, plain or single-quoted"""
+    if (value[0] not in LEADING_INDICATORS
+            and not (value[0] in '-?:' and value[1:2] in ('', ' '))
+            and not value.startswith(('---', '...'))
+            and not BLOCK_INDICATORS.search(value)
+            and resolver.resolve(ScalarNode, value, (True, False)) == STR_TAG):
+        return value
+    return "'" + value.replace("'", "''") + "'"
+
+
+def render_scalar(value):
+    """A scalar as the emitter writes it, or None if this module leaves it to PyYAML"""
+    if value is None:
+        return 'null'
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    if type(value) is int:
+        return str(value)
+    if type(value) is str and SIMPLE_STRING.match(value):
+        return render_string(value)
+    return None
+
+
+def emit(frontmatter):
+    """Block-style YAML for a flat mapping of scalars and lists of scalars, or None
+
+    The output is what yaml.dump(frontmatter, default_flow_style=False)
+    writes. None means some key or value falls outside what is handled here:
+    nested mappings, floats, dates, non-ASCII text or a line long enough for
+    PyYAML to fold.
+    """
+    if type(frontmatter) is not dict or not frontmatter:
+        return None
+    lines = []
+    try:
+        keys = sorted(frontmatter)
+    except TypeError:
+        return None
+    for key in keys:
+        if type(key) is not str or not KEY.match(key) or render_string(key) != key:
+            return None
+        value = frontmatter[key]
+        if type(value) is list:
+            if not value:
+                lines.append(f'{key}: []\n')
+                continue
+            lines.append(f'{key}:\n')
+            for item in value:
+                item = render_scalar(item)
+                if item is None or len(item) + 2 > WIDTH:
+                    return None
+                lines.append(f'- {item}\n')
+            continue
+        rendered = render_scalar(value)
+        if rendered is None or len(key) + len(rendered) + 2 > WIDTH:
+            return None
+        lines.append(f'{key}: {rendered}\n')
+    return ''.join(lines)
+
+
+def parse_scalar(token):
+    """The value of a scalar token emit writes; anything else raises ValueError"""
+    if token.startswith("'"):
+        if len(token) < 2 or not token.endswith("'"):
+            raise ValueError(token)
+        return token[1:-1].replace("''", "'")
+    if token == 'null':
+        return None
+    if token in ('true', 'false'):
+        return token == 'true'
+    if INT.match(token):
+        return int(token)
+    return token
+
+
+def parse(text):
+    """The mapping emit would have written as text, or None for any other text"""
+    frontmatter = {}
+    current = None
+    try:
+        for line in text.split('\n'):
+            if line.startswith('- '):
+                if current is None:
+                    return None
+                current.append(parse_scalar(line[2:]))
+                continue
+            match = LINE.match(line)
+            if match is None:
+                return None
+            key, token = match.groups()
+            if token is None:
+                current = frontmatter[key] = []
+            elif token == '[]':
+                current = None
+                frontmatter[key] = []
+            else:
+                current = None
+                frontmatter[key] = parse_scalar(token)
+    except ValueError:
+        return None
+    return frontmatter
+
+
+def dump_frontmatter(frontmatter, allow_unicode=False):
+    """yaml.dump(frontmatter, default_flow_style=False, allow_unicode=...) for frontmatter"""
+    text = emit(frontmatter)
+    if text is not None:
+        return text
+    return yaml.dump(frontmatter, Dumper=yaml.Dumper if allow_unicode else Dumper,
+                     default_flow_style=False, allow_unicode=allow_unicode)
+
+
+def load_frontmatter(text):
+    """yaml.safe_load(text) for the YAML between a document's --- lines
+
+    Text this module wrote is read back directly. It is accepted only when
+    emitting what was read gives the same text again, so anything the
+    reader might get wrong goes to the YAML loader instead.
+    """
+    body = text[:-1] if text.endswith('\n') else text
+    if body and not body.endswith('\n'):
+        frontmatter = parse(body)
+        if frontmatter is not None and emit(frontmatter) == body + '\n':
+            return frontmatter
+    return yaml.load(text, Loader=SafeLoader)
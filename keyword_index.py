@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Keyword Index
+Finds every occurrence of a fixed keyword set in a single pass over a document
+"""
+
+import re
+from collections import Counter
+
+
+class KeywordIndex:
+    def __init__(self, keywords):
+        """Compile the keywords into one trie-shaped automaton"""
+        self.keywords = sorted(set(keywords))
+
+        # The trie walk inside a lookahead reports the longest keyword that
+        # starts at every position, so overlapping occurrences are all found
+        trie = self.build_trie(self.keywords)
+        self.pattern = re.compile('(?=(' + trie + '))')
+
+        # Shorter keywords hidden under a longer match at the same position
+        self.prefixes = {
+            keyword: [other for other in self.keywords if other != keyword and keyword.startswith(other)]
+            for keyword in self.keywords
+        }
+
+    @classmethod
+    def build_trie(cls, keywords):
+        """Build a regex that walks a character trie of the keywords"""
+        trie = {}
+        for keyword in keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[''] = {}
+        return cls.trie_pattern(trie)
+
+    @classmethod
+    def trie_pattern(cls, node):
+        """Render one trie node; optional tails keep matches longest-first"""
+        branches = [re.escape(char) + cls.trie_pattern(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{pattern})?' if '' in node else pattern
+
+    def scan(self, text, positions=False):
+        """Count every keyword occurrence in text, which should be lowercased"""
+        if positions:
+            found = {}
+            for match in self.pattern.finditer(text):
+                found.setdefault(match.group(1), []).append(match.start())
+            for keyword, starts in [(keyword, list(starts)) for keyword, starts in found.items()]:
+                for prefix in self.prefixes[keyword]:
+                    found.setdefault(prefix, []).extend(starts)
+            found = {keyword: sorted(starts) for keyword, starts in found.items()}
+            return KeywordHits(text, Counter({k: len(v) for k, v in found.items()}), found)
+
+        counts = Counter(self.pattern.findall(text))
+        for keyword, count in list(counts.items()):
+            for prefix in self.prefixes[keyword]:
+                counts[prefix] += count
+        return KeywordHits(text, counts)
+
+
+class KeywordHits:
+    """Keyword occurrence counts for one document"""
+
+    __slots__ = ('text', 'counts', 'found')
+
+    def __init__(self, text, counts, found=None):
+        self.text = text
+        self.counts = counts
+        self.found = found
+
+    def __contains__(self, keyword):
+        return self.counts[keyword] > 0
+
+    def count(self, keyword):
+        """Number of (possibly overlapping) occurrences of keyword"""
+        return self.counts[keyword]
+
+    def any(self, keywords):
+        """Whether any of the keywords occurs"""
+        return any(self.counts[keyword] for keyword in keywords)
+
+    def positions(self, keyword):
+        """Start offsets of keyword, located on demand unless scanned with positions"""
+        if self.found is not None:
+            return self.found.get(keyword, [])
+        starts = []
+        index = self.text.find(keyword)
+        while index != -1:
+            starts.append(index)
+            index = self.text.find(keyword, index + 1)
+        return starts
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Offline Link Checker
+Parses every markdown page once, builds a link graph and reports links that resolve to no file or heading
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+import posixpath
+from pathlib import Path
+from urllib.parse import unquote
+
+from pipeline import parallel_map, decode_input
+from manifest import BuildManifest
+from markdown_blocks import tokenize, render
+from writer import write_atomic
+
+# Bump when parsing changes so cached pages are parsed again
+LINK_CHECK_VERSION = '1'
+
+# Parsed links and headings of each page, kept between runs beside the docs
+CACHE_NAME = '.link-check-cache.json'
+
+# Directories never scanned, besides hidden ones
+SKIP_DIRS = {'node_modules'}
+
+# Inline links and images: [text](target "title")
+INLINE_LINK = re.compile(r'\]\(\s*<?([^)\s>]*)>?(?:\s+(?:"[^"]*"|\'[^\']*\'|\([^)]*\)))?\s*\)')
+
+# Reference definitions: [label]: target
+REFERENCE_DEFINITION = re.compile(r'^[ ]{0,3}\[[^\]\n]+\]:[ \t]*<?([^\s>]+)>?', re.MULTILINE)
+
+HTML_LINK = re.compile(r'<(?:a|img)\b[^>]*?\b(?:href|src)=["\']([^"\']+)["\']', re.IGNORECASE)
+
+HTML_ANCHOR = re.compile(r'<a\b[^>]*?\b(?:name|id)=["\']([^"\']+)["\']', re.IGNORECASE)
+
+HEADING = re.compile(r'^#{1,6}[ \t]+(.*?)(?:[ \t]+#+)?[ \t]*$', re.MULTILINE)
+
+INLINE_CODE = re.compile(r'`[^`\n]+`')
+
+# Heading markup that GitHub drops before building an anchor
+LINK_TEXT = re.compile(r'!?\[([^\]]*)\]\([^)]*\)')
+HTML_TAG = re.compile(r'<[^>]+>')
+NON_ANCHOR = re.compile(r'[^\w\- ]')
+
+# Targets with a scheme (http:, mailto:, data:) or protocol-relative ones are not local
+EXTERNAL = re.compile(r'^(?:[a-zA-Z][a-zA-Z0-9+.-]*:|//)')
+
+
+def heading_anchor(heading):
+    """The anchor GitHub gives a heading, before numbering repeats"""
+    text = HTML_TAG.sub('', LINK_TEXT.sub(r'\1', heading))
+    return NON_ANCHOR.sub('', text.lower()).replace(' ', '-')
+
+
+def mask(pattern, text):
+    """Blank pattern's matches with spaces, keeping offsets and lines"""
+    return pattern.sub(lambda match: ' ' * len(match.group()), text)
+
+
+def parse_links(text):
+    """{'links': [[line, target]], 'anchors': [...]} of a markdown page
+
+    Code blocks and inline code are skipped. Repeated headings get -1, -2
+    suffixes as GitHub numbers them.
+    """
+    prose = render(tokenize(text), mask_code=True)
+
+    anchors = []
+    seen = {}
+    for match in HEADING.finditer(prose):
+        anchor = heading_anchor(match.group(1))
+        count = seen.get(anchor, 0)
+        seen[anchor] = count + 1
+        anchors.append(anchor if count == 0 else f'{anchor}-{count}')
+    anchors.extend(HTML_ANCHOR.findall(prose))
+
+    prose = mask(INLINE_CODE, prose)
+    found = []
+    for pattern in (INLINE_LINK, REFERENCE_DEFINITION, HTML_LINK):
+        found.extend((match.start(1), match.group(1)) for match in pattern.finditer(prose))
+    found.sort()
+
+    links = []
+    line = 1
+    position = 0
+    for offset, target in found:
+        line += prose.count('\n', position, offset)
+        position = offset
+        if target:
+            links.append([line, target])
+    return {'links': links, 'anchors': anchors}
+
+
+class LinkChecker:
+    """Resolves every relative link under root against an in-memory index of its files and headings
+
+    Pages are parsed in parallel, and only when their content hash changed
+    since the cached parse. Resolving is a dictionary lookup per link, so
+    every link is checked on every run and a deleted or renamed target is
+    always caught. Nothing is fetched: links with a scheme are counted as
+    external and skipped.
+    """
+
+    def __init__(self, root, ignore=(), cache=True):
+        self.root = Path(root)
+        self.ignore = [re.compile(pattern) for pattern in ignore]
+        self.manifest = BuildManifest(self.root / CACHE_NAME, LINK_CHECK_VERSION, None, load=cache)
+        self.files = set()
+        self.directories = {''}
+        self.pages = {}
+        self.graph = {}
+        self.parsed = 0
+        self.external = 0
+
+    def scan_tree(self):
+        """Index every file and directory under root; returns the markdown pages"""
+        pages = []
+        for directory, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith('.') and d not in SKIP_DIRS)
+            relative = Path(directory).relative_to(self.root).as_posix()
+            relative = '' if relative == '.' else relative + '/'
+            self.directories.update(relative + d for d in dirnames)
+            for filename in sorted(filenames):
+                self.files.add(relative + filename)
+                if filename.endswith('.md'):
+                    pages.append(relative + filename)
+        return pages
+
+    def parse_file(self, page):
+        """{'page', 'source', 'parsed', 'cached'} of one page, reusing the cached parse of unchanged content"""
+        path = self.root / page
+        stat = os.stat(path)
+        entry = self.manifest.lookup(page, stat)
+        if entry is not None:
+            return {'page': page, 'source': None, 'parsed': entry['result'], 'cached': True}
+
+        with open(path, 'rb') as f:
+            data = f.read()
+        source = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': hashlib.sha256(data).hexdigest()}
+        # A touched page with identical bytes keeps its parse
+        entry = self.manifest.lookup(page, stat, source['hash'])
+        if entry is not None:
+            return {'page': page, 'source': source, 'parsed': entry['result'], 'cached': True}
+        return {'page': page, 'source': source, 'parsed': parse_links(decode_input(data)), 'cached': False}
+
+    def load(self, workers=1):
+        """Parse every page under root, in parallel, skipping pages whose content is unchanged"""
+        pages = self.scan_tree()
+        self.parsed = 0
+        for result in parallel_map(self, 'parse_file', pages, workers):
+            if result['source'] is not None:
+                self.manifest.update(result['page'], result['source'], result['parsed'])
+            if not result['cached']:
+                self.parsed += 1
+            self.pages[result['page']] = result['parsed']
+        self.manifest.prune(pages)
+        self.manifest.save()
+
+    def resolve(self, page, target):
+        """(path, anchor) a relative link points to, with paths relative to root"""
+        path, _, anchor = target.partition('#')
+        path, anchor = unquote(path.partition('?')[0]), unquote(anchor)
+        if not path:
+            return page, anchor
+        if path.startswith('/'):
+            return posixpath.normpath(path.lstrip('/')), anchor
+        return posixpath.normpath(posixpath.join(posixpath.dirname(page), path)), anchor
+
+    def problem(self, path, anchor):
+        """Why a resolved link is broken, or None"""
+        if path.startswith('../') or path == '..':
+            return 'outside the repository'
+        if path in self.directories or path == '.':
+            return None
+        if path not in self.files:
+            return 'missing file'
+        if anchor and path in self.pages:
+            anchors = self.pages[path]['anchors']
+            if anchor not in anchors and anchor.lower() not in anchors:
+                return 'missing anchor'
+        return None
+
+    def check(self):
+        """[{'file', 'line', 'target', 'problem'}] of every broken local link, with the link graph"""
+        broken = []
+        self.external = 0
+        self.graph = {page: {'links': set(), 'backlinks': set()} for page in self.pages}
+        for page in sorted(self.pages):
+            for line, target in self.pages[page]['links']:
+                if EXTERNAL.match(target) or any(pattern.search(target) for pattern in self.ignore):
+                    self.external += 1
+                    continue
+                path, anchor = self.resolve(page, target)
+                problem = self.problem(path, anchor)
+                if problem is not None:
+                    broken.append({'file': page, 'line': line, 'target': target, 'problem': problem})
+                elif path != page:
+                    self.graph[page]['links'].add(path)
+                    if path in self.graph:
+                        self.graph[path]['backlinks'].add(page)
+        return broken
+
+    def link_graph(self):
+        """{page: {'links', 'backlinks'}} over the pages, as sorted lists"""
+        return {page: {key: sorted(paths) for key, paths in edges.items()}
+                for page, edges in sorted(self.graph.items())}
+
+    def link_count(self):
+        return sum(len(parsed['links']) for parsed in self.pages.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check relative links and anchors in markdown pages without a network")
+    parser.add_argument('root', nargs='?', default='.', help="Directory to check")
+    parser.add_argument('--workers', type=int, default=1, help="Number of worker processes for parsing")
+    parser.add_argument('--full', action='store_true', help=f"Ignore {CACHE_NAME} and parse every page")
+    parser.add_argument('--ignore', action='append', default=[], help="Regex of link targets to skip; repeatable")
+    parser.add_argument('--graph', help="Write the link graph as JSON to this file")
+    parser.add_argument('--json', action='store_true', help="Print broken links as JSON")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    try:
+        checker = LinkChecker(args.root, args.ignore, cache=not args.full)
+    except re.error as e:
+        parser.error(f"--ignore: {e}")
+    try:
+        checker.load(args.workers)
+    except OSError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    broken = checker.check()
+    elapsed = time.perf_counter() - started
+
+    if args.graph:
+        write_atomic(args.graph, json.dumps(checker.link_graph(), indent=2).encode('utf-8'))
+    if args.json:
+        print(json.dumps(broken, indent=2, ensure_ascii=False))
+    else:
+        for link in broken:
+            print(f"{link['file']}:{link['line']}: {link['target']} ({link['problem']})")
+        files = len({link['file'] for link in broken})
+        print(f"{len(broken)} broken links in {files} files; {checker.link_count()} links in "
+              f"{len(checker.pages)} pages ({checker.parsed} parsed, {checker.external} external skipped) "
+              f"in {elapsed:.2f}s")
+    if broken:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Link Rewriting
+Retargets links written for the mirrored site's layout at the knowledge base's files
+"""
+
+import os
+import re
+import posixpath
+from pathlib import Path
+from urllib.parse import quote, unquote
+
+from markdown_blocks import tokenize, render
+from link_check import INLINE_LINK, REFERENCE_DEFINITION, EXTERNAL
+
+# Absolute links to the live documentation name pages of the mirror too
+DOCS_URL = re.compile(r'^https?://docs\.xano\.com(?=/|$)')
+
+# Extensions of links into the mirror; links already rewritten end in .md,
+# so rewriting a page twice leaves it unchanged
+MIRROR_SUFFIXES = ('.html', '.htm')
+
+
+class LinkRewriter:
+    """Maps every mirror page, by its path without extension, to the file it was written to
+
+    Built once from a processor's file_mapping, so each link costs one
+    dictionary lookup however many pages there are. Aliased near-duplicates
+    map to the kept document. A link to a directory or to dir.html also
+    finds dir/index. Links that match no page are left as they are.
+    """
+
+    def __init__(self, input_dir, file_mapping):
+        self.input_dir = Path(input_dir)
+        self.targets = {}
+        for input_path, output in file_mapping.items():
+            page = Path(input_path).relative_to(self.input_dir).with_suffix('').as_posix()
+            self.targets[page] = Path(output)
+        self.rewritten = 0
+
+    def target(self, page):
+        """Output a mirror page without extension was written to, trying its index page too"""
+        output = self.targets.get(page)
+        if output is None:
+            output = self.targets.get('index' if page in ('', '.') else page + '/index')
+        return output
+
+    def retarget(self, link, page_dir, output_dir):
+        """The link as written from output_dir, or None if it names no mirrored page"""
+        url = DOCS_URL.match(link)
+        if url is not None:
+            link = link[url.end():] or '/'
+        elif EXTERNAL.match(link):
+            return None
+
+        path, hash_mark, anchor = link.partition('#')
+        path = unquote(path.partition('?')[0])
+        if not path:
+            return None
+        if url is not None or path.startswith('/'):
+            page = posixpath.normpath(path.lstrip('/') or '.')
+        elif path.endswith('/') or path.lower().endswith(MIRROR_SUFFIXES):
+            page = posixpath.normpath(posixpath.join(page_dir, path))
+        else:
+            return None
+        if page.lower().endswith(MIRROR_SUFFIXES):
+            page = posixpath.splitext(page)[0]
+
+        output = self.target(page)
+        if output is None:
+            return None
+        relative = Path(os.path.relpath(output, output_dir)).as_posix()
+        return quote(relative) + hash_mark + anchor
+
+    def rewrite(self, input_path, output_path, body):
+        """Retarget every link in body, a page from input_path written to output_path
+
+        Code blocks are left alone. Links are replaced in one pass per block.
+        """
+        page_dir = posixpath.dirname(Path(input_path).relative_to(self.input_dir).as_posix())
+        output_dir = Path(output_path).parent
+
+        def replace(match):
+            new = self.retarget(match.group(1), page_dir, output_dir)
+            if new is None:
+                return match.group()
+            self.rewritten += 1
+            start, end = match.span(1)
+            return match.group()[:start - match.start()] + new + match.group()[end - match.start():]
+
+        blocks = tokenize(body)
+        for block in blocks:
+            if block.kind != 'code' and ('](' in block.text or ']:' in block.text):
+                block.text = REFERENCE_DEFINITION.sub(replace, INLINE_LINK.sub(replace, block.text))
+        return render(blocks)
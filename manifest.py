@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Incremental Build Manifest
+Remembers each input's content hash and extracted metadata between runs
+"""
+
+import os
+import json
+from pathlib import Path
+
+
+class BuildManifest:
+    def __init__(self, path, processor_version, ruleset, load=True):
+        self.path = Path(path)
+        self.processor_version = processor_version
+        self.ruleset = ruleset
+        self.files = {}
+        if load:
+            self.load()
+
+    def load(self):
+        """Load entries from the previous run if it used the same code and rules"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if (data.get('processor_version') == self.processor_version and
+                data.get('ruleset') == self.ruleset):
+            self.files = data.get('files', {})
+
+    def lookup(self, input_path, stat, content_hash=None):
+        """Return the cached entry for an unchanged input, or None
+
+        Without a content hash the size and mtime must match exactly; with one,
+        a touched but byte-identical file still counts as unchanged.
+        """
+        entry = self.files.get(str(input_path))
+        if entry is None:
+            return None
+
+        if content_hash is None:
+            if entry['size'] != stat.st_size or entry['mtime_ns'] != stat.st_mtime_ns:
+                return None
+        elif entry['hash'] != content_hash:
+            return None
+
+        # Rebuild if the output it produced has gone missing; aliases of a
+        # near-duplicate and results without an output never produced one
+        result = entry['result']
+        if (result is not None and 'duplicate_of' not in result and 'output' in result and
+                not os.path.exists(result['output'])):
+            return None
+        return entry
+
+    def update(self, input_path, source, result):
+        """Record an input's source fingerprint and extracted result"""
+        self.files[str(input_path)] = {**source, 'result': result}
+
+    def prune(self, seen):
+        """Forget inputs that no longer exist"""
+        for input_path in set(self.files) - set(seen):
+            del self.files[input_path]
+
+    def save(self):
+        """Write the manifest atomically"""
+        data = {
+            'processor_version': self.processor_version,
+            'ruleset': self.ruleset,
+            'files': self.files
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Markdown Block Tokenizer
+Splits a document into headings, code fences, lists, blockquotes and paragraphs in one scan
+"""
+
+import re
+
+# Lines that start a block other than a paragraph. A fence is any line that
+# starts with ``` once stripped, so it also closes a block it does not open
+BLOCK_START = re.compile(
+    r'^(?:(?P<code>[^\S\n]*```)|(?P<heading>#)|(?P<quote>>)|'
+    r'(?P<list>[ \t]*(?:[-*+]|\d+[.)])(?:[ \t]|$)))[^\n]*',
+    re.MULTILINE
+)
+FENCE = re.compile(r'^[^\S\n]*```[^\n]*', re.MULTILINE)
+
+NON_NEWLINE = re.compile(r'[^\n]')
+
+
+class Block:
+    """A run of whole lines of one kind; a document is its blocks joined by newlines
+
+    kind is 'heading', 'code', 'list', 'quote' or 'paragraph'. Code blocks run
+    from their opening fence through the closing one, or to the end of the
+    document when closed is False. Paragraphs hold every other line, blank
+    lines included, so the text between two blocks is never lost.
+    """
+
+    __slots__ = ('kind', 'text', 'closed')
+
+    def __init__(self, kind, text, closed=True):
+        self.kind = kind
+        self.text = text
+        self.closed = closed
+
+    def __repr__(self):
+        return f'Block({self.kind!r}, {self.text!r})'
+
+
+def tokenize(text):
+    """Split text into blocks, jumping from one block start to the next"""
+    blocks = []
+    position = 0
+    while position <= len(text):
+        match = BLOCK_START.search(text, position)
+        if match is None:
+            blocks.append(Block('paragraph', text[position:]))
+            break
+        if match.start() > position:
+            blocks.append(Block('paragraph', text[position:match.start() - 1]))
+
+        kind = match.lastgroup
+        end = match.end()
+        closed = True
+        if kind == 'code':
+            closing = FENCE.search(text, end)
+            closed = closing is not None
+            end = closing.end() if closed else len(text)
+        elif kind != 'heading':
+            # Consecutive list items or quoted lines form one block
+            following = BLOCK_START.match(text, end + 1)
+            while following is not None and following.lastgroup == kind:
+                end = following.end()
+                following = BLOCK_START.match(text, end + 1)
+        blocks.append(Block(kind, text[match.start():end], closed))
+        position = end + 1
+    return blocks
+
+
+def render(blocks, mask_code=False):
+    """Join blocks back into text, blanking code with spaces if mask_code is set
+
+    A masked text has the same offsets and lines as the real one, so prose
+    can be searched without matching anything inside code blocks.
+    """
+    if mask_code:
+        return '\n'.join(NON_NEWLINE.sub(' ', block.text) if block.kind == 'code' else block.text
+                         for block in blocks)
+    return '\n'.join(block.text for block in blocks)
+
+
+def splice(blocks, start, end, replacement):
+    """Replace text[start:end] of the rendered blocks inside the block holding it"""
+    offset = 0
+    for block in blocks:
+        if start <= offset + len(block.text):
+            block.text = block.text[:start - offset] + replacement + block.text[end - offset:]
+            return
+        offset += len(block.text) + 1
+    raise ValueError(f"Offset {start} is past the end of the document")
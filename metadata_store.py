@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Run Metadata Store
+Records per-document metadata, tags, errors and timings in SQLite as a run progresses
+"""
+
+import os
+import json
+import sqlite3
+from pathlib import Path
+from datetime import datetime
+
+# Rows buffered before they are inserted in one transaction
+BATCH_SIZE = 256
+
+# Runs kept in a store; older ones are deleted when a run starts
+KEEP_RUNS = 5
+
+# Seconds a writer waits for another process's transaction to finish
+BUSY_TIMEOUT = 30.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started TEXT NOT NULL,
+    finished TEXT,
+    info TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS documents (
+    run INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    input TEXT NOT NULL,
+    output TEXT,
+    title TEXT,
+    category TEXT,
+    difficulty TEXT,
+    code_count INTEGER NOT NULL,
+    size INTEGER,
+    seconds REAL,
+    duplicate_of TEXT,
+    PRIMARY KEY (run, seq)
+);
+CREATE TABLE IF NOT EXISTS tags (
+    run INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    tag TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tags_by_document ON tags (run, seq);
+CREATE TABLE IF NOT EXISTS errors (
+    run INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    seq INTEGER,
+    input TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    error TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS timings (
+    run INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    input TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    seconds REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cross_references (
+    run INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    file TEXT NOT NULL,
+    related TEXT NOT NULL
+);
+"""
+
+INSERTS = {
+    'documents': "INSERT INTO documents VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+    'tags': "INSERT INTO tags VALUES (?, ?, ?)",
+    'errors': "INSERT INTO errors VALUES (?, ?, ?, ?, ?)",
+    'timings': "INSERT INTO timings VALUES (?, ?, ?, ?)",
+    'cross_references': "INSERT INTO cross_references VALUES (?, ?, ?)",
+}
+
+
+class MetadataStore:
+    """SQLite database of what each run processed, queried to build its reports
+
+    The database is in WAL mode, so readers never block the run. Only the
+    process that runs the pipeline records; pool workers return their
+    errors with their results, so every record is numbered in input order
+    and a parallel run records the same as a serial one. Documents and
+    errors are buffered together and inserted in batches of BATCH_SIZE;
+    everything flushed before a crash stays queryable, and the run it
+    belongs to is left without a finish time.
+
+    A caller that must only persist documents once their outputs are on
+    disk passes batch_size=None and flushes at its own checkpoints. The
+    errors recorded between checkpoints are persisted with those
+    documents, so a resumed run numbers both as an uninterrupted run would.
+
+    Queries default to the current run, or to the latest one when the
+    store was opened only to regenerate reports.
+    """
+
+    def __init__(self, path, batch_size=BATCH_SIZE):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.run = None
+        self.seq = 0
+        self.pending = {table: [] for table in INSERTS}
+        self.pending_count = 0
+        self.connection_pid = None
+        self._connection = None
+
+    def __getstate__(self):
+        # Workers open their own connection and never inherit buffered rows
+        state = dict(self.__dict__)
+        state.update(_connection=None, connection_pid=None,
+                     pending={table: [] for table in INSERTS}, pending_count=0)
+        return state
+
+    @property
+    def connection(self):
+        """This process's connection, opened on first use"""
+        if self.connection_pid != os.getpid():
+            if self.connection_pid is not None:
+                # A forked worker must not use or flush its parent's connection
+                self.__dict__.update(self.__getstate__())
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute("PRAGMA foreign_keys=ON")
+            with self._connection:
+                self._connection.executescript(SCHEMA)
+            self.connection_pid = os.getpid()
+        return self._connection
+
+    def close(self):
+        """Flush buffered rows and close this process's connection"""
+        if self._connection is not None and self.connection_pid == os.getpid():
+            self.flush()
+            self._connection.close()
+        self._connection = None
+        self.connection_pid = None
+
+    # Recording
+
+    def start_run(self, **info):
+        """Begin a run described by info, dropping all but the last KEEP_RUNS runs"""
+        with self.connection:
+            self.run = self.connection.execute(
+                "INSERT INTO runs (started, info) VALUES (?, ?)",
+                (datetime.now().isoformat(), json.dumps(info, default=str))).lastrowid
+            self.connection.execute("DELETE FROM runs WHERE id <= ?", (self.run - KEEP_RUNS,))
+        self.seq = 0
+        return self.run
+
+    def unfinished_run(self):
+        """Id of the latest run if it never finished, else None"""
+        row = self.connection.execute("SELECT id, finished FROM runs ORDER BY id DESC LIMIT 1").fetchone()
+        return row[0] if row is not None and row[1] is None else None
+
+    def resume_run(self):
+        """Continue the latest run if it never finished, returning its id or None"""
+        run = self.unfinished_run()
+        if run is None:
+            return None
+        self.run = run
+        self.seq = self.connection.execute(
+            "SELECT MAX(seq) FROM (SELECT MAX(seq) AS seq FROM documents WHERE run = ? "
+            "UNION ALL SELECT MAX(seq) FROM errors WHERE run = ?)", (self.run, self.run)).fetchone()[0] or 0
+        return self.run
+
+    def finish_run(self):
+        """Flush the run and record that it completed"""
+        self.flush()
+        with self.connection:
+            self.connection.execute("UPDATE runs SET finished = ? WHERE id = ?",
+                                    (datetime.now().isoformat(), self.run))
+
+    def add_document(self, input_path, output=None, title=None, category=None, difficulty=None,
+                     tags=(), code_count=0, size=None, duplicate_of=None, profile=None):
+        """Buffer a processed document with its tags and, if profiled, its stage timings"""
+        if self.run is None:
+            self.start_run()
+        self.seq += 1
+        input_path = str(input_path)
+        self.pending['documents'].append((
+            self.run, self.seq, input_path, None if output is None else str(output), title, category,
+            difficulty, code_count, size, None if profile is None else profile['seconds'], duplicate_of))
+        self.pending['tags'].extend((self.run, self.seq, tag) for tag in tags)
+        if profile is not None:
+            self.pending['timings'].extend((self.run, input_path, stage, seconds)
+                                           for stage, seconds in profile['stages'].items())
+        self.pending_count += 1
+        if self.batch_size is not None and self.pending_count >= self.batch_size:
+            self.flush()
+
+    def add_cross_reference(self, file, related_docs):
+        """Buffer the related documents listed for a file"""
+        self.pending['cross_references'].append((self.run, file, json.dumps(related_docs)))
+        self.pending_count += 1
+        if self.batch_size is not None and self.pending_count >= self.batch_size:
+            self.flush()
+
+    def add_error(self, input_path, error, stage='analyze'):
+        """Buffer an error, numbered after the documents recorded before it"""
+        if self.run is None:
+            self.start_run()
+        self.seq += 1
+        self.pending['errors'].append((self.run, self.seq, str(input_path), stage, str(error)))
+        self.pending_count += 1
+        if self.batch_size is not None and self.pending_count >= self.batch_size:
+            self.flush()
+
+    def remove_output(self, output):
+        """Forget the documents written to output, e.g. because the write failed"""
+        self.flush()
+        with self.connection:
+            seqs = [seq for seq, in self.connection.execute(
+                "SELECT seq FROM documents WHERE run = ? AND output = ?", (self.run, str(output)))]
+            self.connection.executemany("DELETE FROM tags WHERE run = ? AND seq = ?",
+                                        [(self.run, seq) for seq in seqs])
+            self.connection.executemany("DELETE FROM documents WHERE run = ? AND seq = ?",
+                                        [(self.run, seq) for seq in seqs])
+
+    def remove_input(self, input_path):
+        """Forget everything the run recorded for an input, e.g. because it is being rebuilt"""
+        self.flush()
+        input_path = str(input_path)
+        with self.connection:
+            seqs = [seq for seq, in self.connection.execute(
+                "SELECT seq FROM documents WHERE run = ? AND input = ?", (self.run, input_path))]
+            self.connection.executemany("DELETE FROM tags WHERE run = ? AND seq = ?",
+                                        [(self.run, seq) for seq in seqs])
+            for table in ('documents', 'errors', 'timings'):
+                self.connection.execute(f"DELETE FROM {table} WHERE run = ? AND input = ?",
+                                        (self.run, input_path))
+
+    def clear_cross_references(self):
+        """Forget the run's cross-references before they are recorded again"""
+        self.flush()
+        with self.connection:
+            self.connection.execute("DELETE FROM cross_references WHERE run = ?", (self.run,))
+
+    def flush(self):
+        """Insert the buffered rows in one transaction"""
+        if not self.pending_count:
+            return
+        with self.connection:
+            for table, rows in self.pending.items():
+                if rows:
+                    self.connection.executemany(INSERTS[table], rows)
+                    rows.clear()
+        self.pending_count = 0
+
+    # Queries
+
+    def run_id(self):
+        """The run queries describe: the current one, else the latest recorded"""
+        if self.run is not None:
+            self.flush()
+            return self.run
+        row = self.connection.execute("SELECT MAX(id) FROM runs").fetchone()
+        if row[0] is None:
+            raise ValueError(f"{self.path} has no recorded runs")
+        return row[0]
+
+    def completed_inputs(self):
+        """{input: (output, title)} of everything the run has recorded; failed inputs map to (None, None)"""
+        run = self.run_id()
+        completed = {input_path: (None, None) for input_path, in self.connection.execute(
+            "SELECT input FROM errors WHERE run = ? AND stage = 'analyze'", (run,))}
+        for input_path, output, title in self.connection.execute(
+                "SELECT input, output, title FROM documents WHERE run = ?", (run,)):
+            completed[input_path] = (output, title)
+        return completed
+
+    def run_info(self):
+        """(info, started, finished) of the run; finished is None if it never completed"""
+        info, started, finished = self.connection.execute(
+            "SELECT info, started, finished FROM runs WHERE id = ?", (self.run_id(),)).fetchone()
+        return json.loads(info), started, finished
+
+    def document_count(self):
+        """Number of kept documents, not counting aliased duplicates"""
+        return self.connection.execute(
+            "SELECT COUNT(*) FROM documents WHERE run = ? AND duplicate_of IS NULL",
+            (self.run_id(),)).fetchone()[0]
+
+    def code_examples_count(self):
+        """Code blocks across the kept documents"""
+        return self.connection.execute(
+            "SELECT COALESCE(SUM(code_count), 0) FROM documents WHERE run = ? AND duplicate_of IS NULL",
+            (self.run_id(),)).fetchone()[0]
+
+    def category_titles(self):
+        """{category: [titles]} in the order documents were recorded"""
+        categories = {}
+        for category, title in self.connection.execute(
+                "SELECT category, title FROM documents WHERE run = ? AND duplicate_of IS NULL ORDER BY seq",
+                (self.run_id(),)):
+            categories.setdefault(category, []).append(title)
+        return categories
+
+    def category_counts(self):
+        """{category: documents}, in order of first appearance"""
+        return dict(self.connection.execute(
+            "SELECT category, COUNT(*) FROM documents WHERE run = ? AND duplicate_of IS NULL "
+            "GROUP BY category ORDER BY MIN(seq)", (self.run_id(),)))
+
+    def tag_counts(self):
+        """{tag: documents carrying it}, in order of first appearance"""
+        return dict(self.connection.execute(
+            "SELECT tag, COUNT(*) FROM tags WHERE run = ? GROUP BY tag ORDER BY MIN(rowid)",
+            (self.run_id(),)))
+
+    def difficulty_counts(self):
+        """{difficulty: documents}, in order of first appearance"""
+        return dict(self.connection.execute(
+            "SELECT difficulty, COUNT(*) FROM documents WHERE run = ? AND duplicate_of IS NULL "
+            "GROUP BY difficulty ORDER BY MIN(seq)", (self.run_id(),)))
+
+    def aliases(self):
+        """{kept document: [inputs aliased to it]}"""
+        aliases = {}
+        for duplicate_of, input_path in self.connection.execute(
+                "SELECT duplicate_of, input FROM documents WHERE run = ? AND duplicate_of IS NOT NULL "
+                "ORDER BY seq", (self.run_id(),)):
+            aliases.setdefault(duplicate_of, []).append(input_path)
+        return aliases
+
+    def cross_references(self):
+        """[{'file', 'related_docs'}] in the order they were recorded"""
+        return [{'file': file, 'related_docs': json.loads(related)} for file, related in self.connection.execute(
+            "SELECT file, related FROM cross_references WHERE run = ? ORDER BY rowid", (self.run_id(),))]
+
+    def errors(self):
+        """[{'file', 'error', 'status'}] in the order they were recorded"""
+        return [{'file': input_path, 'error': error, 'status': 'error'}
+                for input_path, error in self.connection.execute(
+                    "SELECT input, error FROM errors WHERE run = ? ORDER BY seq",
+                    (self.run_id(),))]
+
+    def log_entries(self):
+        """Every document and error of the run as log entries, in the order recorded"""
+        run = self.run_id()
+        tags = {}
+        for seq, tag in self.connection.execute("SELECT seq, tag FROM tags WHERE run = ? ORDER BY rowid", (run,)):
+            tags.setdefault(seq, []).append(tag)
+        rows = self.connection.execute(
+            "SELECT * FROM (SELECT seq, input, output, title, category, size, NULL AS error "
+            "FROM documents WHERE run = ? UNION ALL "
+            "SELECT seq, input, NULL, NULL, NULL, NULL, error FROM errors WHERE run = ?) "
+            "ORDER BY seq", (run, run))
+        for seq, input_path, output, title, category, size, error in rows:
+            if error is not None:
+                yield {'file': input_path, 'error': error, 'status': 'error'}
+            else:
+                yield {'file': input_path, 'output': output, 'title': title, 'category': category,
+                       'tags': tags.get(seq, []), 'size_before': size, 'status': 'success'}
+
+    def metadata(self):
+        """The run's knowledge base metadata, as written to metadata.json"""
+        info, started, _ = self.run_info()
+        return {
+            'total_files': self.document_count(),
+            'categories': self.category_titles(),
+            'tags': self.tag_counts(),
+            'difficulty_distribution': self.difficulty_counts(),
+            'code_examples_count': self.code_examples_count(),
+            'cross_references': self.cross_references(),
+            'aliases': self.aliases(),
+            'errors': self.errors(),
+            'processing_date': info.get('processing_date', started)
+        }
@@ -7,29 +7,255 @@ Preserves all original content while cleaning formatting and enhancing readabili
 
 import os
 import re
-import yaml
 from pathlib import Path
 import shutil
 from datetime import datetime
 import html
-import json
+import sqlite3
+import argparse
+
+from pipeline import parallel_map, discover_files, read_input, JsonArrayWriter
+from keyword_index import KeywordIndex
+from document import DocumentAnalysis
+from writer import OutputWriter
+from rule_engine import SpanGuard, LineGuard
+from rules import RULES
+from profiling import NullProfiler, Profiler
+from search_index import IndexBuilder, strip_frontmatter
+from markdown_blocks import tokenize, render, splice
+from code_examples import detect_language
+from metadata_store import MetadataStore
+from snapshot import Snapshotter, new_snapshot_path, prune_snapshots, KEEP_SNAPSHOTS
+from frontmatter_codec import dump_frontmatter, load_frontmatter
+
+# Content keywords that earn each tag
+TAG_KEYWORDS = {
+    'api': ['api', 'endpoint', 'rest', 'http'],
+    'database': ['database', 'table', 'query', 'sql', 'record'],
+    'function': ['function', 'logic', 'workflow'],
+    'authentication': ['auth', 'login', 'user', 'jwt', 'oauth'],
+    'webhook': ['webhook', 'trigger', 'event'],
+    'integration': ['integration', 'connect', 'external'],
+    'n8n': ['n8n', 'workflow', 'automation'],
+    'weweb': ['weweb', 'frontend', 'ui'],
+}
+
+# Tools flagged in the frontmatter integrations list
+INTEGRATION_KEYWORDS = ['n8n', 'weweb']
+
+# Machine-readable profile written by --profile runs
+PROFILE_NAME = 'optimization_profile.json'
+
+# Per-document results queried for the report and optimization_log.json
+METADATA_STORE_NAME = 'optimization.db'
+
+# Files merged between checkpoints; a resumed run repeats at most this many
+CHECKPOINT_INTERVAL = 50
+
+# Ordered (pattern, replacement, flags) rules applied by clean_html_content
+CLEAN_HTML_RULES = [
+    # Remove the frontmatter CSS-like artifacts first
+    (r'^---[\s\S]*?---\n', '', 0),
+    
+    # Remove ALL ::: blocks and their content
+    (r':::\s*\{[^}]*\}[\s\S]*?:::', '', 0),
+    (r':::\s*[\s\S]*?:::', '', 0),
+    (r'-\s+:::', '', 0),
+    
+    # Remove navigation lists with brackets
+    (r'^\s*-\s+\[.*?\].*?$', '', re.MULTILINE),
+    
+    # Remove GitBook header/footer artifacts
+    (r'\[.*?\]\(.*?index\.html.*?\)', '', 0),
+    (r'Xano Documentation\s*\[Ctrl\]\[K\]', '', 0),
+    (r'\[Ctrl\]\[K\]', '', 0),
+    
+    # Convert HTML images to markdown BEFORE removing tags
+    # Handle various image formats
+    (r'<img\s+[^>]*src=["\']([^"\']+)["\'][^>]*alt=["\']([^"\']*)["\'][^>]*/?>', r'![\2](\1)', 0),
+    (r'<img\s+[^>]*alt=["\']([^"\']*)["\'][^>]*src=["\']([^"\']+)["\'][^>]*/?>', r'![\1](\2)', 0),
+    (r'<img\s+[^>]*src=["\']([^"\']+)["\'][^>]*/?>', r'![Image](\1)', 0),
+    
+    # Convert HTML links to markdown
+    (r'<a\s+[^>]*href=["\']([^"\']+)["\'][^>]*>([^<]+)</a>', r'[\2](\1)', 0),
+    
+    # Convert HTML headings to markdown
+    *[(f'<h{i}[^>]*>([^<]+)</h{i}>', '#' * i + r' \1', re.IGNORECASE) for i in range(6, 0, -1)],
+    
+    # Convert HTML lists
+    (r'<li[^>]*>([^<]+)</li>', r'- \1', re.IGNORECASE),
+    (r'<ul[^>]*>', '', re.IGNORECASE),
+    (r'</ul>', '', re.IGNORECASE),
+    (r'<ol[^>]*>', '', re.IGNORECASE),
+    (r'</ol>', '', re.IGNORECASE),
+    
+    # Convert HTML emphasis
+    (r'<strong[^>]*>([^<]+)</strong>', r'**\1**', re.IGNORECASE),
+    (r'<b[^>]*>([^<]+)</b>', r'**\1**', re.IGNORECASE),
+    (r'<em[^>]*>([^<]+)</em>', r'*\1*', re.IGNORECASE),
+    (r'<i[^>]*>([^<]+)</i>', r'*\1*', re.IGNORECASE),
+    (r'<code[^>]*>([^<]+)</code>', r'`\1`', re.IGNORECASE),
+    
+    # Convert HTML line breaks and paragraphs
+    (r'<br\s*/?>', '\n', re.IGNORECASE),
+    (r'<p[^>]*>', '\n', re.IGNORECASE),
+    (r'</p>', '\n', re.IGNORECASE),
+    
+    # Remove ALL remaining HTML tags
+    (r'<[^>]+>', '', 0),
+    
+    # Remove CSS class definitions
+    (r'::: \{[^}]+\}', '', 0),
+    (r'\{[.#][^}]+\}', '', 0),
+    
+    # Remove GitBook specific artifacts
+    (r'!\[\]\([^)]*gitbook[^)]*\)', '', 0),
+    (r'\[!\[\]\([^)]*\)\]\([^)]*\)', '', 0),
+    (r'!\[.*?\]\(.*?gitbook.*?\)', '', 0),
+    
+    # Clean up navigation/UI elements
+    (r'On this page.*?(?=\n#|\n##|\Z)', '', re.DOTALL),
+    (r'Was this helpful\?.*?(?=\n#|\n##|\Z)', '', re.DOTALL),
+    (r'Copy\s*$', '', re.MULTILINE),
+    (r'Last updated.*?(?=\n#|\n##|\Z)', '', re.DOTALL),
+    (r'\[Powered by GitBook\]', '', 0),
+    
+    # Remove emoji icons in brackets like [🛠️]
+    (r'\[[\U0001F300-\U0001F9FF]+\]', '', 0),
+    
+    # Clean up excessive whitespace
+    (r'\n{4,}', '\n\n\n', 0),
+    (r'^\s+$', '', re.MULTILINE),
+    (r'^\s*-\s*$', '', re.MULTILINE),
+]
+
+# Shortest input worth optimizing; a file with fewer bytes has fewer characters
+MIN_INPUT_LENGTH = 50
+
+# Full-text index written by --search-index runs
+SEARCH_INDEX_NAME = 'search.idx'
+
+# Anchors for the explanations and integration tips
+FIRST_HEADING = re.compile(r'^## ', re.MULTILINE)
+WEBHOOK_TERM = re.compile(r'webhook', re.IGNORECASE)
+API_ENDPOINT_TERM = re.compile(r'api endpoint', re.IGNORECASE)
+WEBHOOK_TIP = "\n\n> **💡 Tip for n8n users:** You can trigger this webhook directly from n8n using the HTTP Request node. Just copy the webhook URL from Xano and paste it into n8n.\n"
+API_ENDPOINT_TIP = "\n\n> **💡 Tip for WeWeb users:** This API endpoint can be connected directly in WeWeb's data sources. Use the Xano plugin for seamless integration.\n"
+
+# Bounds for the rules that backtrack badly on unclosed tags and long lines
+CLEAN_HTML_GUARDS = {
+    r'\[.*?\]\(.*?index\.html.*?\)': LineGuard('['),
+    r'<img\s+[^>]*src=["\']([^"\']+)["\'][^>]*alt=["\']([^"\']*)["\'][^>]*/?>': SpanGuard('<img', '>'),
+    r'<img\s+[^>]*alt=["\']([^"\']*)["\'][^>]*src=["\']([^"\']+)["\'][^>]*/?>': SpanGuard('<img', '>'),
+    r'<img\s+[^>]*src=["\']([^"\']+)["\'][^>]*/?>': SpanGuard('<img', '>'),
+    r'<a\s+[^>]*href=["\']([^"\']+)["\'][^>]*>([^<]+)</a>': SpanGuard('<a', '</a>'),
+    r'\{[.#][^}]+\}': SpanGuard('{', '}'),
+    r'<[^>]+>': SpanGuard('<', '>'),
+    r'!\[.*?\]\(.*?gitbook.*?\)': LineGuard('!['),
+}
+
+
+def whole_word(word, suffix=''):
+    """Pattern for word on its own, like \\bword\\b but starting with the literal
+    word so the regex engine can skip ahead to candidates instead of testing
+    a word boundary at every position"""
+    return rf'{word}(?<!\w{word})\b{suffix}'
+
+
+def legacy_language(code):
+    """Language the optimizer first gave unlabelled code blocks, by substring
+    heuristic; used for the blocks detect_language cannot place"""
+    if '{' in code or 'function' in code or 'const' in code or 'var' in code:
+        return 'javascript'
+    elif 'SELECT' in code.upper() or 'INSERT' in code.upper() or 'CREATE' in code.upper():
+        return 'sql'
+    elif 'def ' in code or 'import ' in code or 'print(' in code:
+        return 'python'
+    elif '<?php' in code:
+        return 'php'
+    elif '<' in code and '>' in code and 'html' in code.lower():
+        return 'html'
+    elif 'curl' in code.lower():
+        return 'bash'
+    # Default to javascript for Xano context
+    return 'javascript'
+
+
+# Technical terms and the explanations add_no_code_explanations gives them
+NO_CODE_TERMS = [
+    (whole_word('API', r'(?![:\s]+)'), 'API (Application Programming Interface)', 0),
+    (whole_word('REST'), 'REST (a standard way for systems to communicate)', 0),
+    (whole_word('JSON'), 'JSON (a format for structuring data)', 0),
+    (whole_word('Webhook'), 'Webhook (automated message sent when something happens)', 0),
+    (whole_word('Endpoint'), 'Endpoint (a specific URL where your API can be accessed)', 0),
+    (whole_word('Schema'), 'Schema (the structure of your database)', 0),
+    (whole_word('CRUD'), 'CRUD (Create, Read, Update, Delete operations)', 0),
+    (whole_word('Auth'), 'Auth (Authentication - verifying user identity)', 0),
+    (whole_word('JWT'), 'JWT (JSON Web Token - a secure way to handle user sessions)', 0),
+    (whole_word('OAuth'), 'OAuth (a standard for access delegation)', 0),
+]
+
+# Notes, tips, and warnings improve_structure formats outside code blocks
+CALLOUT_RULES = [
+    (r'^Note:', '> **📝 Note:**', re.MULTILINE),
+    (r'^Tip:', '> **💡 Tip:**', re.MULTILINE),
+    (r'^Warning:', '> **⚠️ Warning:**', re.MULTILINE),
+    (r'^Important:', '> **❗ Important:**', re.MULTILINE),
+]
+
+# Icons for ## headings, from the first keyword found in the heading
+HEADING_ICONS = [
+    ('database', '🗄️'),
+    ('api', '🔌'),
+    ('function', '⚙️'),
+    ('auth', '🔐'),
+    ('webhook', '🪝'),
+    ('example', '📝'),
+    ('setup', '🚀'),
+    ('install', '🚀'),
+    ('error', '🔧'),
+    ('troubleshoot', '🔧'),
+]
+
+# Rules stay unmerged so each can be profiled on its own
+RULES.register('clean_html_content', CLEAN_HTML_RULES, guards=CLEAN_HTML_GUARDS, merge=False)
+RULES.register('add_no_code_explanations', NO_CODE_TERMS)
+RULES.register('improve_structure', CALLOUT_RULES)
 
 class XanoDocOptimizer:
     def __init__(self, input_dir, output_dir, backup_dir):
         self.input_dir = Path(input_dir)
         self.output_dir = Path(output_dir)
         self.backup_dir = Path(backup_dir)
-        self.processed_count = 0
-        self.error_count = 0
-        self.optimization_log = []
-        
-    def backup_existing(self):
-        """Create backup of existing documentation"""
+        self.keyword_index = KeywordIndex(
+            [keyword for keywords in TAG_KEYWORDS.values() for keyword in keywords] + INTEGRATION_KEYWORDS
+        )
+        self.html_cleaner = RULES.engine('clean_html_content')
+        self.callout_formatter = RULES.engine('improve_structure')
+        self.profiler = NullProfiler()
+        self.search_index = None
+        
+        # Results are recorded as they merge and persisted at checkpoints;
+        # the report and log query them
+        self.store = MetadataStore(self.output_dir / METADATA_STORE_NAME, batch_size=None)
+        self.writer = OutputWriter()
+        
+    def backup_existing(self, mode='snapshot', keep=KEEP_SNAPSHOTS):
+        """Create backup of existing documentation
+        
+        A snapshot hard-links the files unchanged since the previous backup;
+        mode 'copy' takes a full copy. Only the newest keep backups are kept.
+        """
         if self.output_dir.exists():
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_path = self.backup_dir / f"backup_{timestamp}"
-            shutil.copytree(self.output_dir, backup_path)
-            print(f"Backup created at: {backup_path}")
+            if mode == 'copy':
+                backup_path = new_snapshot_path(self.backup_dir)
+                shutil.copytree(self.output_dir, backup_path)
+                prune_snapshots(self.backup_dir, keep)
+                print(f"Backup created at: {backup_path}")
+            else:
+                snapshotter = Snapshotter(self.backup_dir, keep)
+                backup_path = snapshotter.snapshot(self.output_dir)
+                print(f"Backup created at: {backup_path} ({snapshotter.summary()})")
             return backup_path
         return None
         
@@ -84,214 +310,154 @@ class XanoDocOptimizer:
         # General title case
         return title.title()
         
-    def clean_html_content(self, content):
+    def clean_html_content(self, content, source=None):
         """Remove ALL HTML tags and convert to pure markdown"""
         
         # Decode HTML entities first
         content = html.unescape(content)
         
-        # Remove the frontmatter CSS-like artifacts first
-        content = re.sub(r'^---[\s\S]*?---\n', '', content)
-        
-        # Remove ALL ::: blocks and their content
-        content = re.sub(r':::\s*\{[^}]*\}[\s\S]*?:::', '', content)
-        content = re.sub(r':::\s*[\s\S]*?:::', '', content)
-        content = re.sub(r'-\s+:::', '', content)
-        
-        # Remove navigation lists with brackets
-        content = re.sub(r'^\s*-\s+\[.*?\].*?$', '', content, flags=re.MULTILINE)
-        
-        # Remove GitBook header/footer artifacts
-        content = re.sub(r'\[.*?\]\(.*?index\.html.*?\)', '', content)
-        content = re.sub(r'Xano Documentation\s*\[Ctrl\]\[K\]', '', content)
-        content = re.sub(r'\[Ctrl\]\[K\]', '', content)
-        
-        # Convert HTML images to markdown BEFORE removing tags
-        # Handle various image formats
-        content = re.sub(r'<img\s+[^>]*src=["\']([^"\']+)["\'][^>]*alt=["\']([^"\']*)["\'][^>]*/?>', r'![\2](\1)', content)
-        content = re.sub(r'<img\s+[^>]*alt=["\']([^"\']*)["\'][^>]*src=["\']([^"\']+)["\'][^>]*/?>', r'![\1](\2)', content)
-        content = re.sub(r'<img\s+[^>]*src=["\']([^"\']+)["\'][^>]*/?>', r'![Image](\1)', content)
-        
-        # Convert HTML links to markdown
-        content = re.sub(r'<a\s+[^>]*href=["\']([^"\']+)["\'][^>]*>([^<]+)</a>', r'[\2](\1)', content)
-        
-        # Convert HTML headings to markdown
-        for i in range(6, 0, -1):
-            content = re.sub(f'<h{i}[^>]*>([^<]+)</h{i}>', '#' * i + r' \1', content, flags=re.IGNORECASE)
-        
-        # Convert HTML lists
-        content = re.sub(r'<li[^>]*>([^<]+)</li>', r'- \1', content, flags=re.IGNORECASE)
-        content = re.sub(r'<ul[^>]*>', '', content, flags=re.IGNORECASE)
-        content = re.sub(r'</ul>', '', content, flags=re.IGNORECASE)
-        content = re.sub(r'<ol[^>]*>', '', content, flags=re.IGNORECASE)
-        content = re.sub(r'</ol>', '', content, flags=re.IGNORECASE)
-        
-        # Convert HTML emphasis
-        content = re.sub(r'<strong[^>]*>([^<]+)</strong>', r'**\1**', content, flags=re.IGNORECASE)
-        content = re.sub(r'<b[^>]*>([^<]+)</b>', r'**\1**', content, flags=re.IGNORECASE)
-        content = re.sub(r'<em[^>]*>([^<]+)</em>', r'*\1*', content, flags=re.IGNORECASE)
-        content = re.sub(r'<i[^>]*>([^<]+)</i>', r'*\1*', content, flags=re.IGNORECASE)
-        content = re.sub(r'<code[^>]*>([^<]+)</code>', r'`\1`', content, flags=re.IGNORECASE)
-        
-        # Convert HTML line breaks and paragraphs
-        content = re.sub(r'<br\s*/?>', '\n', content, flags=re.IGNORECASE)
-        content = re.sub(r'<p[^>]*>', '\n', content, flags=re.IGNORECASE)
-        content = re.sub(r'</p>', '\n', content, flags=re.IGNORECASE)
-        
-        # Remove ALL remaining HTML tags
-        content = re.sub(r'<[^>]+>', '', content)
-        
-        # Remove CSS class definitions
-        content = re.sub(r'::: \{[^}]+\}', '', content)
-        content = re.sub(r'\{[.#][^}]+\}', '', content)
-        
-        # Remove GitBook specific artifacts
-        content = re.sub(r'!\[\]\([^)]*gitbook[^)]*\)', '', content)
-        content = re.sub(r'\[!\[\]\([^)]*\)\]\([^)]*\)', '', content)
-        content = re.sub(r'!\[.*?\]\(.*?gitbook.*?\)', '', content)
-        
-        # Clean up navigation/UI elements
-        content = re.sub(r'On this page.*?(?=\n#|\n##|\Z)', '', content, flags=re.DOTALL)
-        content = re.sub(r'Was this helpful\?.*?(?=\n#|\n##|\Z)', '', content, flags=re.DOTALL)
-        content = re.sub(r'Copy\s*$', '', content, flags=re.MULTILINE)
-        content = re.sub(r'Last updated.*?(?=\n#|\n##|\Z)', '', content, flags=re.DOTALL)
-        content = re.sub(r'\[Powered by GitBook\]', '', content)
-        
-        # Remove emoji icons in brackets like [🛠️]
-        content = re.sub(r'\[[\U0001F300-\U0001F9FF]+\]', '', content)
-        
-        # Clean up excessive whitespace
-        content = re.sub(r'\n{4,}', '\n\n\n', content)
-        content = re.sub(r'^\s+$', '', content, flags=re.MULTILINE)
-        content = re.sub(r'^\s*-\s*$', '', content, flags=re.MULTILINE)
+        # Apply the cleaning rules in order, timing each one when profiling
+        content = self.html_cleaner.apply(content, self.profiler.rule_timings(), source)
         
         return content.strip()
         
-    def enhance_code_blocks(self, content):
-        """Ensure all code blocks use proper markdown syntax with language hints"""
-        
-        # Fix code blocks without language specification
-        def add_language_hint(match):
-            code = match.group(1)
-            # Try to detect language
-            if '{' in code or 'function' in code or 'const' in code or 'var' in code:
-                return f"```javascript\n{code}\n```"
-            elif 'SELECT' in code.upper() or 'INSERT' in code.upper() or 'CREATE' in code.upper():
-                return f"```sql\n{code}\n```"
-            elif 'def ' in code or 'import ' in code or 'print(' in code:
-                return f"```python\n{code}\n```"
-            elif '<?php' in code:
-                return f"```php\n{code}\n```"
-            elif '<' in code and '>' in code and 'html' in code.lower():
-                return f"```html\n{code}\n```"
-            elif 'curl' in code.lower():
-                return f"```bash\n{code}\n```"
-            else:
-                # Default to javascript for Xano context
-                return f"```javascript\n{code}\n```"
-        
-        # Fix code blocks without language
-        content = re.sub(r'```\n([^`]+)\n```', add_language_hint, content)
-        
-        # Ensure proper spacing around code blocks
-        content = re.sub(r'([^\n])\n```', r'\1\n\n```', content)
-        content = re.sub(r'```\n([^\n])', r'```\n\n\1', content)
-        
-        return content
-        
-    def add_no_code_explanations(self, content):
-        """Add explanations for non-developer users"""
-        
-        # Add explanations after technical terms
-        technical_terms = {
-            r'\bAPI\b(?![:\s]+)': 'API (Application Programming Interface)',
-            r'\bREST\b': 'REST (a standard way for systems to communicate)',
-            r'\bJSON\b': 'JSON (a format for structuring data)',
-            r'\bWebhook\b': 'Webhook (automated message sent when something happens)',
-            r'\bEndpoint\b': 'Endpoint (a specific URL where your API can be accessed)',
-            r'\bSchema\b': 'Schema (the structure of your database)',
-            r'\bCRUD\b': 'CRUD (Create, Read, Update, Delete operations)',
-            r'\bAuth\b': 'Auth (Authentication - verifying user identity)',
-            r'\bJWT\b': 'JWT (JSON Web Token - a secure way to handle user sessions)',
-            r'\bOAuth\b': 'OAuth (a standard for access delegation)',
-        }
+    def enhance_code_blocks(self, blocks):
+        """Give code blocks without a language a hint and set them apart with blank lines"""
+        for index, block in enumerate(blocks):
+            if block.kind != 'code':
+                continue
+                
+            # Fix code blocks without language specification
+            if block.closed:
+                fence, _, rest = block.text.partition('\n')
+                code = rest.rpartition('\n')[0]
+                if fence.strip() == '```' and code and '`' not in code:
+                    language = detect_language(code)[0] or legacy_language(code)
+                    block.text = fence.replace('```', '```' + language, 1) + '\n' + rest
+                    
+            # Ensure proper spacing around code blocks
+            previous = blocks[index - 1].text if index > 0 else ''
+            if previous and not previous.endswith('\n'):
+                block.text = '\n' + block.text
+            following = blocks[index + 1].text if index + 1 < len(blocks) else ''
+            if block.closed and following and not following.startswith('\n'):
+                block.text += '\n'
+        
+    def add_no_code_explanations(self, blocks):
+        """Add explanations for non-developer users, leaving code blocks alone
+        
+        Terms are looked up in a copy of the document with its code blanked
+        out, and each edit is applied to that copy and to the blocks.
+        """
+        masked = render(blocks, mask_code=True)
         
         # Only add explanations in the first occurrence of each section
-        for term, explanation in technical_terms.items():
+        heading = FIRST_HEADING.search(masked)
+        for term, explanation in RULES.compiled('add_no_code_explanations'):
             # Check if explanation doesn't already exist
-            if explanation not in content:
-                content = re.sub(f'(^## .*\n)(.*?)({term})', 
-                               rf'\1\2{explanation}', 
-                               content, count=1, flags=re.MULTILINE | re.DOTALL)
+            if heading and explanation not in masked:
+                span = self.term_span(masked, heading.start(), term)
+                if span is not None:
+                    masked = self.edit(blocks, masked, *span, explanation)
         
         # Add integration tips for n8n/WeWeb
-        if 'webhook' in content.lower() and 'n8n integration' not in content.lower():
-            webhook_tip = "\n\n> **💡 Tip for n8n users:** You can trigger this webhook directly from n8n using the HTTP Request node. Just copy the webhook URL from Xano and paste it into n8n.\n"
-            content = re.sub(r'(webhook[^.]*\.)', rf'\1{webhook_tip}', content, count=1, flags=re.IGNORECASE)
-        
-        if 'api endpoint' in content.lower() and 'weweb integration' not in content.lower():
-            api_tip = "\n\n> **💡 Tip for WeWeb users:** This API endpoint can be connected directly in WeWeb's data sources. Use the Xano plugin for seamless integration.\n"
-            content = re.sub(r'(api endpoint[^.]*\.)', rf'\1{api_tip}', content, count=1, flags=re.IGNORECASE)
-        
-        return content
-        
-    def improve_structure(self, content):
-        """Improve document structure and readability"""
-        
-        # Ensure consistent heading hierarchy
-        lines = content.split('\n')
-        new_lines = []
-        in_code_block = False
-        
-        for line in lines:
-            # Track code blocks
-            if line.strip().startswith('```'):
-                in_code_block = not in_code_block
-            
-            # Don't modify lines inside code blocks
-            if not in_code_block:
-                # Fix heading hierarchy
-                if line.startswith('#'):
-                    # Count the number of # symbols
-                    level = len(line) - len(line.lstrip('#'))
-                    # Ensure space after #
-                    if level > 0 and level <= 6:
-                        heading_text = line[level:].strip()
-                        line = '#' * level + ' ' + heading_text
-                
-                # Add emoji icons for better visual scanning
-                if line.startswith('## '):
-                    if 'database' in line.lower():
-                        line = line.replace('## ', '## 🗄️ ', 1)
-                    elif 'api' in line.lower():
-                        line = line.replace('## ', '## 🔌 ', 1)
-                    elif 'function' in line.lower():
-                        line = line.replace('## ', '## ⚙️ ', 1)
-                    elif 'auth' in line.lower():
-                        line = line.replace('## ', '## 🔐 ', 1)
-                    elif 'webhook' in line.lower():
-                        line = line.replace('## ', '## 🪝 ', 1)
-                    elif 'example' in line.lower():
-                        line = line.replace('## ', '## 📝 ', 1)
-                    elif 'setup' in line.lower() or 'install' in line.lower():
-                        line = line.replace('## ', '## 🚀 ', 1)
-                    elif 'error' in line.lower() or 'troubleshoot' in line.lower():
-                        line = line.replace('## ', '## 🔧 ', 1)
-            
-            new_lines.append(line)
-        
-        content = '\n'.join(new_lines)
+        if 'webhook' in masked.lower() and 'n8n integration' not in masked.lower():
+            position = self.tip_position(masked, WEBHOOK_TERM)
+            if position is not None:
+                masked = self.edit(blocks, masked, position, position, WEBHOOK_TIP)
+        
+        if 'api endpoint' in masked.lower() and 'weweb integration' not in masked.lower():
+            position = self.tip_position(masked, API_ENDPOINT_TERM)
+            if position is not None:
+                masked = self.edit(blocks, masked, position, position, API_ENDPOINT_TIP)
+        
+    @staticmethod
+    def edit(blocks, masked, start, end, replacement):
+        """Replace masked[start:end] in the blocks and return the edited masked text"""
+        splice(blocks, start, end, replacement)
+        return masked[:start] + replacement + masked[end:]
+        
+    @staticmethod
+    def term_span(content, heading, term):
+        """Span of the term occurrence re.sub(r'(^## .*\\n)(.*?)(term)', ..., count=1,
+        flags=re.MULTILINE | re.DOTALL) would replace, without its cubic backtracking
+        
+        That pattern anchors at the first heading and lets the greedy .* run to
+        the last newline that still has the term after it, so the replaced
+        occurrence is the first one following that newline.
+        """
+        last = None
+        for last in term.finditer(content, heading):
+            pass
+        if last is None:
+            return None
+        newline = content.rfind('\n', heading + 3, last.start())
+        if newline == -1:
+            return None
+        return term.search(content, newline + 1).span()
+        
+    @staticmethod
+    def tip_position(content, term):
+        """Offset just after the sentence holding the term's first occurrence,
+        where re.sub(r'(term[^.]*\.)', r'\1' + tip, count=1) would insert a tip"""
+        match = term.search(content)
+        if match is None:
+            return None
+        period = content.find('.', match.end())
+        if period == -1:
+            return None
+        return period + 1
+        
+    def improve_structure(self, blocks):
+        """Improve document structure and readability, and render the blocks"""
+        parts = []
+        prose = []
+        for index, block in enumerate(blocks):
+            if block.kind == 'code':
+                # Don't modify code blocks
+                if prose:
+                    parts.append(self.format_prose(prose))
+                    prose = []
+                parts.append(block.text)
+            elif block.kind == 'heading':
+                prose.append(self.format_heading(block.text, index > 0))
+            else:
+                prose.append(block.text)
+        if prose:
+            parts.append(self.format_prose(prose))
+        return '\n'.join(parts)
+        
+    def format_heading(self, line, section_break):
+        """Normalize a heading, add its icon and, for major topics, a section break"""
+        
+        # Ensure a single space after the #s of headings up to level 6
+        level = len(line) - len(line.lstrip('#'))
+        if level <= 6:
+            line = '#' * level + ' ' + line[level:].strip()
+        
+        # Add emoji icons for better visual scanning
+        if line.startswith('## '):
+            lower = line.lower()
+            for keyword, icon in HEADING_ICONS:
+                if keyword in lower:
+                    line = line.replace('## ', f'## {icon} ', 1)
+                    break
         
         # Add section breaks between major topics
-        content = re.sub(r'\n(#{1,2} )', r'\n---\n\n\1', content)
+        if section_break and level <= 2:
+            line = '---\n\n' + line
+        return line
         
-        # Format notes, tips, and warnings
-        content = re.sub(r'^Note:', '> **📝 Note:**', content, flags=re.MULTILINE)
-        content = re.sub(r'^Tip:', '> **💡 Tip:**', content, flags=re.MULTILINE)
-        content = re.sub(r'^Warning:', '> **⚠️ Warning:**', content, flags=re.MULTILINE)
-        content = re.sub(r'^Important:', '> **❗ Important:**', content, flags=re.MULTILINE)
+    def format_prose(self, texts):
+        """Join consecutive non-code block texts and format their notes, tips, and warnings"""
+        return self.callout_formatter.apply('\n'.join(texts), self.profiler.rule_timings())
         
-        return content
+    def analyze_document(self, filepath, content, title):
+        """Compute the shared analysis of an optimized document once"""
+        doc = DocumentAnalysis(filepath, content, self.keyword_index)
+        doc.title = title
+        doc.category = self.extract_category(filepath)
+        return doc
         
     def extract_category(self, filepath):
         """Extract category from file path"""
@@ -325,32 +491,45 @@ class XanoDocOptimizer:
         
         return filename + '.md'
         
-    def process_file(self, input_path):
-        """Process a single markdown file"""
+    def analyze_file(self, input_path, text=None, parsed=None):
+        """Optimize and render a single file without touching shared state
+        
+        A chained pipeline passes the file's text instead of writing it out,
+        and its (frontmatter, body) when it has them, so nothing is read or
+        parsed again.
+        """
+        self.profiler.begin_file()
         try:
-            # Read the file
-            with open(input_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Skip if file is too small or non-documentation
-            if len(content) < 50:
+            content = text
+            if content is None:
+                # Skip if file is too small, before reading it when its size already tells
+                size = os.path.getsize(input_path)
+                if size < MIN_INPUT_LENGTH:
+                    return None
+                content = read_input(input_path, size)
+            self.profiler.lap('read')
+            if len(content) < MIN_INPUT_LENGTH:
                 return None
             
             # Extract original frontmatter if exists
             frontmatter = {}
             original_content = content
-            if content.startswith('---'):
+            if parsed is not None:
+                frontmatter, content = dict(parsed[0]), parsed[1].strip()
+            elif content.startswith('---'):
                 try:
                     end_index = content.index('\n---', 3)
                     yaml_content = content[4:end_index]
-                    frontmatter = yaml.safe_load(yaml_content) or {}
+                    frontmatter = load_frontmatter(yaml_content) or {}
                     content = content[end_index + 4:].strip()
                 except:
                     # If frontmatter parsing fails, treat whole thing as content
                     content = original_content
+            self.profiler.lap('frontmatter')
             
             # Clean HTML content
-            content = self.clean_html_content(content)
+            content = self.clean_html_content(content, input_path)
+            self.profiler.lap('clean_html_content')
             
             # Skip if content is now too small after cleaning
             if len(content) < 30:
@@ -358,36 +537,32 @@ class XanoDocOptimizer:
             
             # Extract clean title
             title = self.extract_clean_title(content, input_path)
+            self.profiler.lap('title')
+            
+            # Split into markdown blocks once for the formatting steps
+            blocks = tokenize(content)
+            self.profiler.lap('tokenize')
             
             # Enhance code blocks
-            content = self.enhance_code_blocks(content)
+            self.enhance_code_blocks(blocks)
+            self.profiler.lap('code_blocks')
             
             # Add no-code explanations
-            content = self.add_no_code_explanations(content)
+            self.add_no_code_explanations(blocks)
+            self.profiler.lap('explanations')
             
             # Improve structure
-            content = self.improve_structure(content)
+            content = self.improve_structure(blocks)
+            self.profiler.lap('improve_structure')
             
-            # Extract category
-            category = self.extract_category(input_path)
+            # Analyze the optimized document once: category and keyword hits
+            doc = self.analyze_document(input_path, content, title)
+            category = doc.category
+            self.profiler.lap('categorize')
             
             # Generate tags based on content
-            tags = []
-            tag_keywords = {
-                'api': ['api', 'endpoint', 'rest', 'http'],
-                'database': ['database', 'table', 'query', 'sql', 'record'],
-                'function': ['function', 'logic', 'workflow'],
-                'authentication': ['auth', 'login', 'user', 'jwt', 'oauth'],
-                'webhook': ['webhook', 'trigger', 'event'],
-                'integration': ['integration', 'connect', 'external'],
-                'n8n': ['n8n', 'workflow', 'automation'],
-                'weweb': ['weweb', 'frontend', 'ui'],
-            }
-            
-            content_lower = content.lower()
-            for tag, keywords in tag_keywords.items():
-                if any(keyword in content_lower for keyword in keywords):
-                    tags.append(tag)
+            tags = [tag for tag, keywords in TAG_KEYWORDS.items() if doc.hits.any(keywords)]
+            self.profiler.lap('tagging')
             
             # Update frontmatter
             frontmatter.update({
@@ -400,10 +575,9 @@ class XanoDocOptimizer:
             })
             
             # Add integration flags
-            if 'n8n' in content_lower:
-                frontmatter['integrations'].append('n8n')
-            if 'weweb' in content_lower:
-                frontmatter['integrations'].append('weweb')
+            for integration in INTEGRATION_KEYWORDS:
+                if integration in doc.hits:
+                    frontmatter['integrations'].append(integration)
             
             # Determine output path with clean filename
             clean_filename = self.generate_clean_filename(title, input_path)
@@ -411,151 +585,266 @@ class XanoDocOptimizer:
             # Preserve directory structure
             relative_dir = input_path.parent.relative_to(self.input_dir)
             output_path = self.output_dir / relative_dir / clean_filename
-            output_path.parent.mkdir(parents=True, exist_ok=True)
             
-            # Write optimized file
-            with open(output_path, 'w', encoding='utf-8') as f:
-                # Write frontmatter
-                f.write('---\n')
-                f.write(yaml.dump(frontmatter, default_flow_style=False, allow_unicode=True))
-                f.write('---\n\n')
-                
-                # Write title if not already in content
-                if not content.startswith('#'):
-                    f.write(f"# {title}\n\n")
-                
-                # Add introduction for complex topics
-                if category in ['Database', 'Api Endpoints', 'Functions'] and '## ' in content:
-                    intro = f"This guide covers {title.lower()} in Xano. "
-                    if 'n8n' in frontmatter.get('integrations', []):
-                        intro += "You'll learn how to use this with n8n automations. "
-                    if 'weweb' in frontmatter.get('integrations', []):
-                        intro += "This integrates seamlessly with WeWeb frontends. "
-                    f.write(f"{intro}\n\n")
-                
-                # Write content
-                f.write(content)
-                
-                # Add footer with helpful links
-                f.write("\n\n---\n\n")
-                f.write("## 🔗 Related Resources\n\n")
-                
-                if 'api' in tags:
-                    f.write("- [API Documentation](../reference/api-reference.md)\n")
-                if 'database' in tags:
-                    f.write("- [Database Guide](../core-concepts/database.md)\n")
-                if 'function' in tags:
-                    f.write("- [Function Stack Guide](../core-concepts/function-stack.md)\n")
+            # Render optimized file
+            parts = []
+            
+            # Write frontmatter
+            parts.append('---\n')
+            parts.append(dump_frontmatter(frontmatter, allow_unicode=True))
+            parts.append('---\n\n')
+            
+            # Write title if not already in content
+            if not content.startswith('#'):
+                parts.append(f"# {title}\n\n")
+            
+            # Add introduction for complex topics
+            if category in ['Database', 'Api Endpoints', 'Functions'] and '## ' in content:
+                intro = f"This guide covers {title.lower()} in Xano. "
                 if 'n8n' in frontmatter.get('integrations', []):
-                    f.write("- [n8n Integration Guide](../integrations/n8n-integration.md)\n")
+                    intro += "You'll learn how to use this with n8n automations. "
                 if 'weweb' in frontmatter.get('integrations', []):
-                    f.write("- [WeWeb Integration Guide](../integrations/weweb-integration.md)\n")
+                    intro += "This integrates seamlessly with WeWeb frontends. "
+                parts.append(f"{intro}\n\n")
             
-            self.processed_count += 1
-            self.optimization_log.append({
-                'file': str(input_path),
-                'output': str(output_path),
-                'title': title,
-                'category': category,
-                'tags': tags,
-                'size_before': len(content),
-                'status': 'success'
-            })
+            # Write content
+            parts.append(content)
             
-            return str(output_path)
+            # Add footer with helpful links
+            parts.append("\n\n---\n\n")
+            parts.append("## 🔗 Related Resources\n\n")
+            
+            if 'api' in tags:
+                parts.append("- [API Documentation](../reference/api-reference.md)\n")
+            if 'database' in tags:
+                parts.append("- [Database Guide](../core-concepts/database.md)\n")
+            if 'function' in tags:
+                parts.append("- [Function Stack Guide](../core-concepts/function-stack.md)\n")
+            if 'n8n' in frontmatter.get('integrations', []):
+                parts.append("- [n8n Integration Guide](../integrations/n8n-integration.md)\n")
+            if 'weweb' in frontmatter.get('integrations', []):
+                parts.append("- [WeWeb Integration Guide](../integrations/weweb-integration.md)\n")
+            self.profiler.lap('render')
+            
+            return {
+                'output': str(output_path),
+                'text': ''.join(parts),
+                'profile': self.profiler.end_file(),
+                'log': {
+                    'file': str(input_path),
+                    'output': str(output_path),
+                    'title': title,
+                    'category': category,
+                    'tags': tags,
+                    'size_before': len(content),
+                    'status': 'success'
+                }
+            }
             
         except Exception as e:
-            self.error_count += 1
-            self.optimization_log.append({
-                'file': str(input_path),
-                'error': str(e),
-                'status': 'error'
-            })
-            print(f"Error processing {input_path}: {e}")
-            return None
+            return {
+                'log': {
+                    'file': str(input_path),
+                    'error': str(e),
+                    'status': 'error'
+                }
+            }
             
-    def process_all_files(self):
-        """Process all markdown files in the input directory"""
-        # Find all markdown files
-        md_files = list(self.input_dir.rglob('*.md'))
-        total_files = len(md_files)
+    def analyze_item(self, item):
+        """analyze_file for an (input path, text, parsed) item of a chained pipeline"""
+        return self.analyze_file(*item)
         
-        print(f"Found {total_files} markdown files to process")
+    def record_result(self, result):
+        """Merge an analyzed file into the run log and write its output"""
+        if result is None:
+            return None
+            
+        log = result['log']
+        if log['status'] == 'success':
+            self.profiler.merge(log['file'], result['profile'])
+            try:
+                output_path = Path(result['output'])
+                with self.profiler.stage('write'):
+                    self.writer.write(output_path, result['text'])
+                if self.search_index is not None:
+                    with self.profiler.stage('search_index'):
+                        self.search_index.add(output_path.relative_to(self.output_dir).as_posix(),
+                                              log['title'], strip_frontmatter(result['text']))
+                    
+                self.store.add_document(log['file'], log['output'], log['title'], log['category'],
+                                        tags=log['tags'], size=log['size_before'], profile=result['profile'])
+                return str(output_path)
+                
+            except Exception as e:
+                log = {'file': log['file'], 'error': str(e), 'status': 'error'}
+                
+        self.store.add_error(log['file'], log['error'])
+        print(f"Error processing {log['file']}: {log['error']}")
+        return None
         
-        for i, md_file in enumerate(md_files, 1):
+    def process_file(self, input_path):
+        """Process a single markdown file"""
+        output_path = self.record_result(self.analyze_file(input_path))
+        self.finish_writes()
+        return output_path
+        
+    def finish_writes(self):
+        """Wait for queued output writes and count any that failed as errors"""
+        with self.profiler.stage('write_flush'):
+            failures = self.writer.flush()
+        for output, error in failures:
+            self.store.remove_output(output)
+            self.store.add_error(output, error, 'write')
+            if self.search_index is not None:
+                self.search_index.remove(Path(output).relative_to(self.output_dir).as_posix())
+            print(f"Error writing {output}: {error}")
+            
+    def checkpoint(self):
+        """Persist the recorded results and errors once all their outputs are on disk"""
+        self.finish_writes()
+        self.store.flush()
+        
+    def skip_completed(self, paths, completed):
+        """Yield the paths a resumed run has not recorded, indexing the others' outputs"""
+        for path in paths:
+            output, title = completed.get(str(path), (None, None))
+            if str(path) not in completed:
+                yield path
+            elif output is not None and self.search_index is not None:
+                with open(output, 'r', encoding='utf-8') as f:
+                    text = f.read()
+                self.search_index.add(Path(output).relative_to(self.output_dir).as_posix(), title,
+                                      strip_frontmatter(text))
+                
+    def process_all_files(self, workers=1, resume=False, documents=None):
+        """Process all markdown files in the input directory
+        
+        With resume, the last run is continued if it never finished: files
+        it recorded before its last checkpoint are skipped and the rest are
+        processed as if the run had not stopped. A chained pipeline passes
+        its documents as (path, text, parsed) items instead.
+        """
+        files, method = discover_files(self.input_dir), 'analyze_file'
+        if documents is not None:
+            files, method = documents, 'analyze_item'
+        if resume and documents is None and self.store.resume_run() is not None:
+            completed = self.store.completed_inputs()
+            print(f"Resuming the unfinished run: {len(completed)} files already done")
+            files = self.skip_completed(files, completed)
+        else:
+            self.store.start_run()
+        
+        # Stream markdown files through optimization, merging results in
+        # input order so parallel runs match serial ones
+        results = parallel_map(self, method, files, workers)
+        for i, result in enumerate(results, 1):
             if i % 10 == 0:
-                print(f"Processing file {i}/{total_files}...")
+                print(f"Processing file {i}...")
             
-            self.process_file(md_file)
+            self.record_result(result)
+            if i % CHECKPOINT_INTERVAL == 0:
+                self.checkpoint()
+        self.checkpoint()
+        self.store.finish_run()
+        
+        if self.search_index is not None:
+            with self.profiler.stage('search_index'):
+                size = self.search_index.save(self.output_dir / SEARCH_INDEX_NAME)
+            print(f"Search index: {len(self.search_index)} documents, {size / 1024:.0f} KB")
         
         print(f"\nProcessing complete!")
-        print(f"Successfully processed: {self.processed_count} files")
-        print(f"Errors encountered: {self.error_count} files")
+        print(f"Successfully processed: {self.store.document_count()} files")
+        print(f"Errors encountered: {len(self.store.errors())} files")
         
     def generate_report(self):
-        """Generate optimization report"""
+        """Generate the optimization report and detailed log from the metadata store"""
         report_path = self.output_dir / 'OPTIMIZATION_REPORT.md'
-        
-        with open(report_path, 'w', encoding='utf-8') as f:
-            f.write("# Documentation Optimization Report\n\n")
-            f.write(f"**Date:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            
-            f.write("## Summary\n\n")
-            f.write(f"- **Total Files Processed:** {self.processed_count}\n")
-            f.write(f"- **Errors:** {self.error_count}\n")
-            f.write(f"- **Success Rate:** {(self.processed_count/(self.processed_count+self.error_count)*100):.1f}%\n\n")
-            
-            f.write("## Optimizations Applied\n\n")
-            f.write("1. ✅ Removed all HTML tags and artifacts\n")
-            f.write("2. ✅ Converted HTML elements to pure markdown\n")
-            f.write("3. ✅ Fixed YAML frontmatter with descriptive titles\n")
-            f.write("4. ✅ Enhanced code blocks with language hints\n")
-            f.write("5. ✅ Added explanations for non-developers\n")
-            f.write("6. ✅ Improved document structure with emojis\n")
-            f.write("7. ✅ Added integration tips for n8n/WeWeb\n")
-            f.write("8. ✅ Generated clean, descriptive filenames\n")
-            f.write("9. ✅ Added related resources links\n")
-            f.write("10. ✅ Preserved all original content\n\n")
-            
-            f.write("## Categories Processed\n\n")
-            categories = {}
-            for log in self.optimization_log:
-                if log['status'] == 'success':
-                    cat = log.get('category', 'Unknown')
-                    categories[cat] = categories.get(cat, 0) + 1
-            
-            for cat, count in sorted(categories.items()):
-                f.write(f"- **{cat}:** {count} files\n")
-            
-            f.write("\n## Common Tags Found\n\n")
-            all_tags = {}
-            for log in self.optimization_log:
-                if log['status'] == 'success':
-                    for tag in log.get('tags', []):
-                        all_tags[tag] = all_tags.get(tag, 0) + 1
-            
-            for tag, count in sorted(all_tags.items(), key=lambda x: x[1], reverse=True)[:10]:
-                f.write(f"- **{tag}:** {count} occurrences\n")
-            
-            if self.error_count > 0:
-                f.write("\n## Errors Encountered\n\n")
-                for log in self.optimization_log:
-                    if log['status'] == 'error':
-                        f.write(f"- {log['file']}: {log.get('error', 'Unknown error')}\n")
-            
-            f.write("\n---\n\n")
-            f.write("*This report was automatically generated by the Xano Documentation Optimizer*\n")
-        
-        # Save detailed log as JSON
-        log_path = self.output_dir / 'optimization_log.json'
-        with open(log_path, 'w', encoding='utf-8') as f:
-            json.dump(self.optimization_log, f, indent=2, default=str)
+        processed_count = self.store.document_count()
+        errors = self.store.errors()
+        error_count = len(errors)
+        
+        # Assemble the report in memory and write it in one go
+        report = []
+        report.append("# Documentation Optimization Report\n\n")
+        report.append(f"**Date:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+        
+        report.append("## Summary\n\n")
+        report.append(f"- **Total Files Processed:** {processed_count}\n")
+        report.append(f"- **Errors:** {error_count}\n")
+        report.append(f"- **Success Rate:** {(processed_count/(processed_count+error_count)*100):.1f}%\n\n")
+        
+        report.append("## Optimizations Applied\n\n")
+        report.append("1. ✅ Removed all HTML tags and artifacts\n")
+        report.append("2. ✅ Converted HTML elements to pure markdown\n")
+        report.append("3. ✅ Fixed YAML frontmatter with descriptive titles\n")
+        report.append("4. ✅ Enhanced code blocks with language hints\n")
+        report.append("5. ✅ Added explanations for non-developers\n")
+        report.append("6. ✅ Improved document structure with emojis\n")
+        report.append("7. ✅ Added integration tips for n8n/WeWeb\n")
+        report.append("8. ✅ Generated clean, descriptive filenames\n")
+        report.append("9. ✅ Added related resources links\n")
+        report.append("10. ✅ Preserved all original content\n\n")
+        
+        report.append("## Categories Processed\n\n")
+        for cat, count in sorted(self.store.category_counts().items()):
+            report.append(f"- **{cat}:** {count} files\n")
+        
+        report.append("\n## Common Tags Found\n\n")
+        for tag, count in sorted(self.store.tag_counts().items(), key=lambda x: x[1], reverse=True)[:10]:
+            report.append(f"- **{tag}:** {count} occurrences\n")
+        
+        if error_count > 0:
+            report.append("\n## Errors Encountered\n\n")
+            for log in errors:
+                report.append(f"- {log['file']}: {log.get('error', 'Unknown error')}\n")
+        
+        if self.profiler.enabled:
+            report.append("\n")
+            report.extend(self.profiler.markdown())
+            self.profiler.save(self.output_dir / PROFILE_NAME)
+        
+        report.append("\n---\n\n")
+        report.append("*This report was automatically generated by the Xano Documentation Optimizer*\n")
+        self.writer.write(report_path, ''.join(report))
+        for output, error in self.writer.close():
+            print(f"Error writing {output}: {error}")
+        
+        # Stream the detailed JSON log out of the store
+        log_writer = JsonArrayWriter(self.output_dir / 'optimization_log.json')
+        for entry in self.store.log_entries():
+            log_writer.write(entry)
+        log_writer.close()
+        log_path = log_writer.path
+        self.store.close()
         
         print(f"\nReport generated: {report_path}")
         print(f"Detailed log saved: {log_path}")
+        if self.profiler.enabled:
+            print(f"Profile saved: {self.output_dir / PROFILE_NAME}")
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Optimize Xano documentation for non-developers")
+    parser.add_argument('--workers', type=int, default=1, help="Number of worker processes")
+    parser.add_argument('--profile', action='store_true', help=f"Time each stage and rule and write {PROFILE_NAME}")
+    parser.add_argument('--search-index', action='store_true', help=f"Also build a full-text index, {SEARCH_INDEX_NAME}")
+    parser.add_argument('--rules-config', help="JSON file adding or disabling cleaning rules")
+    parser.add_argument('--report-only', action='store_true',
+                        help=f"Regenerate the report and log from {METADATA_STORE_NAME} without processing")
+    parser.add_argument('--backup-mode', choices=['snapshot', 'copy'], default='snapshot',
+                        help="Hard-link files unchanged since the last backup, or copy everything")
+    parser.add_argument('--keep-backups', type=int, default=KEEP_SNAPSHOTS,
+                        help="Number of backups to keep; older ones are deleted")
+    parser.add_argument('--resume', action='store_true',
+                        help="Continue the last run from its last checkpoint if it did not finish")
+    args = parser.parse_args()
+    
+    if args.rules_config:
+        try:
+            RULES.load_config(args.rules_config)
+        except (OSError, ValueError) as e:
+            parser.error(f"--rules-config: {e}")
+    
     # Set directories
     input_dir = "/root/xano-knowledge"
     output_dir = "/root/xano-knowledge-optimized"
@@ -563,14 +852,28 @@ def main():
     
     # Create optimizer
     optimizer = XanoDocOptimizer(input_dir, output_dir, backup_dir)
+    if args.profile:
+        optimizer.profiler = Profiler()
+    if args.search_index:
+        optimizer.search_index = IndexBuilder()
+    
+    if args.report_only:
+        try:
+            optimizer.generate_report()
+        except (sqlite3.Error, ValueError) as e:
+            parser.error(f"--report-only: {e}")
+        return
     
-    # Create backup
-    print("Creating backup...")
-    backup_path = optimizer.backup_existing()
+    # Create backup, unless resuming a run that took one when it started
+    resume = args.resume and optimizer.store.unfinished_run() is not None
+    backup_path = None
+    if not resume:
+        print("Creating backup...")
+        backup_path = optimizer.backup_existing(args.backup_mode, args.keep_backups)
     
     # Process all files
     print("\nStarting optimization process...")
-    optimizer.process_all_files()
+    optimizer.process_all_files(workers=args.workers, resume=resume)
     
     # Generate report
     print("\nGenerating report...")
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Shared Pipeline Helpers
+Composable generator stages that stream documents through the processors
+"""
+
+import os
+import json
+import mmap
+import contextlib
+from pathlib import Path
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from writer import temp_path
+
+# Processor instance owned by each pool worker
+_worker_processor = None
+
+# Inputs at least this large are memory-mapped rather than read into a bytes copy
+MMAP_THRESHOLD = 16 * 1024
+
+
+def discover_files(input_dir, pattern='*.md', seen=None):
+    """Lazily yield input files, optionally recording their paths in seen"""
+    for path in Path(input_dir).rglob(pattern):
+        if seen is not None:
+            seen.add(str(path))
+        yield path
+
+
+@contextlib.contextmanager
+def open_input(path, size):
+    """Yield an input's raw bytes, memory-mapped when size reaches MMAP_THRESHOLD"""
+    with open(path, 'rb') as f:
+        if size < MMAP_THRESHOLD:
+            yield f.read()
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                yield data
+
+
+def decode_input(data):
+    """Decode raw input as UTF-8 with universal newlines, as text-mode reads do"""
+    text = str(data, 'utf-8')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+def read_input(path, size):
+    """Read and decode an input without an intermediate bytes copy for large files"""
+    with open_input(path, size) as data:
+        return decode_input(data)
+
+
+def _init_worker(processor):
+    """Install the processor copy used by this worker"""
+    global _worker_processor
+    _worker_processor = processor
+
+
+def _call_worker(method, item):
+    """Run one per-file method on the worker's processor"""
+    return getattr(_worker_processor, method)(item)
+
+
+def parallel_map(processor, method, items, workers=1, window_per_worker=4):
+    """Yield processor.method(item) for every item, in the order of items
+
+    With workers > 1 the calls run in a process pool seeded with a copy of the
+    processor, so the method must not depend on state merged in the parent.
+    At most workers * window_per_worker calls are in flight at once.
+    """
+    if workers <= 1:
+        for item in items:
+            yield getattr(processor, method)(item)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(processor,)) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(_call_worker, method, item))
+            if len(pending) >= workers * window_per_worker:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class JsonArrayWriter:
+    """Streams entries to a JSON array laid out like json.dump(entries, indent=2)
+
+    The array is built in a temporary file that replaces path on close.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = open(temp_path(self.path), 'w', encoding='utf-8')
+        self.count = 0
+
+    def write(self, entry):
+        """Append one entry to the array"""
+        text = json.dumps(entry, indent=2, default=str).replace('\n', '\n  ')
+        self.file.write(('[\n  ' if self.count == 0 else ',\n  ') + text)
+        self.count += 1
+
+    def close(self):
+        """Terminate the array and close the file"""
+        self.file.write('\n]' if self.count else '[]')
+        self.file.close()
+        os.replace(self.file.name, self.path)
@@ -7,27 +7,159 @@ Cleans, organizes, and optimizes Xano documentation for knowledge base use
 import os
 import re
 import json
-import yaml
 import shutil
 from pathlib import Path
 from datetime import datetime
-from collections import defaultdict
+import sqlite3
 import hashlib
+import argparse
+
+from rule_engine import SpanGuard, MAX_SPAN
+from rules import RULES
+from pipeline import parallel_map, discover_files, open_input, decode_input
+from manifest import BuildManifest
+from keyword_index import KeywordIndex
+from document import DocumentAnalysis
+from writer import OutputWriter, DocumentSpool
+from profiling import NullProfiler, Profiler
+from similarity import SimilarityIndex, term_counts
+from dedup import DuplicateIndex, simhash
+from search_index import IndexBuilder, strip_frontmatter
+from metadata_store import MetadataStore
+from frontmatter_codec import dump_frontmatter, load_frontmatter
+from link_rewrite import LinkRewriter
+
+# Bump when processing logic changes so cached results are rebuilt
+PROCESSOR_VERSION = '1.4'
+MANIFEST_NAME = '.build-manifest.json'
+
+# Run metadata queried for metadata.json and the README statistics
+METADATA_STORE_NAME = 'metadata.db'
+
+# Shortest cleaned page that is kept; cleaning never lengthens a page, so
+# smaller inputs are skipped without being read
+MIN_CONTENT_LENGTH = 100
+
+# Related documents listed in each file's frontmatter
+RELATED_DOCS = 5
+
+# Full-text index written by --search-index runs
+SEARCH_INDEX_NAME = 'search.idx'
+
+# Machine-readable profile written by --profile runs
+PROFILE_NAME = 'processing_profile.json'
+
+# Navigation elements removed as whole lines
+NAVIGATION_PATTERNS = [
+    r'^.*Welcome to Xano!.*$',
+    r'^.*Frequently Asked Questions.*$',
+    r'^.*Security & Compliance.*$',
+    r'^.*Feature Requests.*$',
+    r'^.*Known Issues.*$',
+    r'^.*Before You Begin.*$',
+    r'^.*The Visual Builder.*$',
+    r'^\[Ctrl\].*\[K\].*$',
+    r'^.*Xano Documentation.*$'
+]
+
+# Marketing CTAs removed as whole lines (case-insensitive)
+CTA_PATTERNS = [
+    r'^.*Get Started.*Free.*$',
+    r'^.*Sign Up.*$',
+    r'^.*Contact.*Support.*$',
+    r'^.*Ask.*Question.*$'
+]
+
+# Ordered (pattern, replacement, flags) rules applied by clean_content
+CLEAN_CONTENT_RULES = [
+    # Remove CSS class definitions and divs
+    (r'::: \{[^}]+\}', '', 0),
+    (r':::(\s|$)', '', 0),
+    
+    # Remove inline CSS classes
+    (r'\{[^}]*\.[^}]+\}', '', 0),
+    
+    # Clean up links with classes
+    (r'\]\([^)]+\)\{[^}]+\}', ']', 0),
+    
+    # Remove style, data, aria and excessive image attributes
+    (r'style="[^"]*"', '', 0),
+    (r'style=\'[^\']*\'', '', 0),
+    (r'data-[^=]+="[^"]*"', '', 0),
+    (r'testid="[^"]*"', '', 0),
+    (r'aria-[^=]+="[^"]*"', '', 0),
+    (r'srcset="[^"]*"', '', 0),
+    (r'sizes="[^"]*"', '', 0),
+    (r'width="[^"]*"', '', 0),
+    (r'height="[^"]*"', '', 0),
+    
+    # Remove font-emoji spans
+    (r'\[([^]]+)\]\{\.font-emoji[^}]*\}', r'\1', 0),
+    
+    # Clean up empty lines
+    (r'\n{3,}', '\n\n', 0),
+    
+    # Remove navigation elements and marketing CTAs
+    *[(pattern, '', re.MULTILINE) for pattern in NAVIGATION_PATTERNS],
+    *[(pattern, '', re.MULTILINE | re.IGNORECASE) for pattern in CTA_PATTERNS],
+]
+
+# Bounds for the rules that backtrack badly on unclosed braces and brackets
+CLEAN_CONTENT_GUARDS = {
+    r'\{[^}]*\.[^}]+\}': SpanGuard('{', '}'),
+    r'\]\([^)]+\)\{[^}]+\}': SpanGuard('](', ')', tail=MAX_SPAN),
+    r'\[([^]]+)\]\{\.font-emoji[^}]*\}': SpanGuard('[', ']', tail=MAX_SPAN),
+}
+
+RULES.register('clean_content', CLEAN_CONTENT_RULES, guards=CLEAN_CONTENT_GUARDS)
+
+# Common Xano concepts used as tags
+TAG_KEYWORDS = [
+    'api', 'database', 'function', 'expression', 'filter',
+    'authentication', 'webhook', 'trigger', 'middleware',
+    'background-task', 'custom-function', 'query', 'crud',
+    'rest', 'graphql', 'websocket', 'realtime', 'cache',
+    'transaction', 'validation', 'transformation', 'integration'
+]
+
+# Content complexity indicators used to determine difficulty
+ADVANCED_INDICATORS = [
+    'transaction', 'optimization', 'performance', 'scaling',
+    'custom function', 'complex', 'advanced', 'enterprise'
+]
+
+INTERMEDIATE_INDICATORS = [
+    'filter', 'expression', 'webhook', 'api', 'integration',
+    'authentication', 'validation', 'transformation'
+]
+
+# Content keywords consulted by categorize_file
+CATEGORY_KEYWORDS = ['artificial']
 
 class XanoDocProcessor:
     def __init__(self, input_dir, output_dir):
         self.input_dir = Path(input_dir)
         self.output_dir = Path(output_dir)
-        self.metadata = {
-            "total_files": 0,
-            "categories": defaultdict(list),
-            "tags": defaultdict(int),
-            "difficulty_distribution": defaultdict(int),
-            "code_examples_count": 0,
-            "cross_references": [],
-            "processing_date": datetime.now().isoformat()
-        }
+        self.processing_date = datetime.now().isoformat()
+        self.store = MetadataStore(self.output_dir / METADATA_STORE_NAME)
         self.file_mapping = {}
+        self.sources = {}
+        self.links = LinkRewriter(self.input_dir, {})
+        self.cleaner = RULES.engine('clean_content')
+        self.keyword_index = KeywordIndex(TAG_KEYWORDS + ADVANCED_INDICATORS +
+                                          INTERMEDIATE_INDICATORS + CATEGORY_KEYWORDS)
+        self.manifest = None
+        self.written_outputs = set()
+        # (frontmatter, body) of outputs analyzed this run, spooled to disk and
+        # written once their related docs are known
+        self.documents = DocumentSpool()
+        self.cached_count = 0
+        self.duplicate_count = 0
+        self.writer = OutputWriter()
+        self.profiler = NullProfiler()
+        self.similarity = SimilarityIndex()
+        self.duplicates = DuplicateIndex()
+        self.search_index = None
         
     def setup_output_structure(self):
         """Create organized directory structure"""
@@ -54,70 +186,15 @@ class XanoDocProcessor:
         for dir_path in directories:
             (self.output_dir / dir_path).mkdir(parents=True, exist_ok=True)
             
-    def clean_content(self, content):
-        """Remove HTML artifacts and clean markdown content"""
-        
-        # Remove CSS class definitions and divs
-        content = re.sub(r'::: \{[^}]+\}', '', content)
-        content = re.sub(r':::(\s|$)', '', content)
-        
-        # Remove inline CSS classes
-        content = re.sub(r'\{[^}]*\.[^}]+\}', '', content)
-        
-        # Clean up links with classes
-        content = re.sub(r'\]\([^)]+\)\{[^}]+\}', ']', content)
-        
-        # Remove style attributes
-        content = re.sub(r'style="[^"]*"', '', content)
-        content = re.sub(r'style=\'[^\']*\'', '', content)
-        
-        # Remove data attributes
-        content = re.sub(r'data-[^=]+="[^"]*"', '', content)
-        content = re.sub(r'testid="[^"]*"', '', content)
-        
-        # Remove aria attributes
-        content = re.sub(r'aria-[^=]+="[^"]*"', '', content)
-        
-        # Clean up image tags with excessive attributes
-        content = re.sub(r'srcset="[^"]*"', '', content)
-        content = re.sub(r'sizes="[^"]*"', '', content)
-        content = re.sub(r'width="[^"]*"', '', content)
-        content = re.sub(r'height="[^"]*"', '', content)
-        
-        # Remove font-emoji spans
-        content = re.sub(r'\[([^]]+)\]\{\.font-emoji[^}]*\}', r'\1', content)
-        
-        # Clean up empty lines
-        content = re.sub(r'\n{3,}', '\n\n', content)
-        
-        # Remove navigation elements
-        navigation_patterns = [
-            r'^.*Welcome to Xano!.*$',
-            r'^.*Frequently Asked Questions.*$',
-            r'^.*Security & Compliance.*$',
-            r'^.*Feature Requests.*$',
-            r'^.*Known Issues.*$',
-            r'^.*Before You Begin.*$',
-            r'^.*The Visual Builder.*$',
-            r'^\[Ctrl\].*\[K\].*$',
-            r'^.*Xano Documentation.*$'
-        ]
-        
-        for pattern in navigation_patterns:
-            content = re.sub(pattern, '', content, flags=re.MULTILINE)
-            
-        # Remove marketing CTAs
-        cta_patterns = [
-            r'.*Get Started.*Free.*',
-            r'.*Sign Up.*',
-            r'.*Contact.*Support.*',
-            r'.*Ask.*Question.*'
-        ]
+    def clean_content(self, content, source=None):
+        """Remove HTML artifacts and clean markdown content
         
-        for pattern in cta_patterns:
-            content = re.sub(pattern, '', content, flags=re.MULTILINE | re.IGNORECASE)
-            
-        return content.strip()
+        content may be raw UTF-8 input that the cleaner accepts as bytes.
+        """
+        cleaned = self.cleaner.apply(content, self.profiler.rule_timings(), source)
+        if not isinstance(cleaned, str):
+            cleaned = str(cleaned, 'utf-8')
+        return cleaned.strip()
         
     def extract_title(self, content):
         """Extract the main title from content"""
@@ -134,10 +211,15 @@ class XanoDocProcessor:
                 
         return "Untitled"
         
-    def categorize_file(self, file_path, content):
+    def scan_keywords(self, content):
+        """Find every tag, difficulty and category keyword in one pass"""
+        return self.keyword_index.scan(content.lower())
+        
+    def categorize_file(self, file_path, content, hits=None):
         """Determine category based on file path and content"""
         path_str = str(file_path).lower()
-        content_lower = content.lower()
+        if hits is None:
+            hits = self.scan_keywords(content)
         
         # Category mapping rules
         if 'getting-started' in path_str or 'before-you-begin' in path_str:
@@ -150,7 +232,7 @@ class XanoDocProcessor:
             return "02-core-concepts/api-endpoints"
         elif 'auth' in path_str or 'security' in path_str:
             return "02-core-concepts/authentication"
-        elif 'ai-' in path_str or 'ai_' in path_str or 'artificial' in content_lower:
+        elif 'ai-' in path_str or 'ai_' in path_str or 'artificial' in hits:
             return "04-integrations/ai-services"
         elif 'external' in path_str or 'integration' in path_str:
             return "04-integrations/external-apis"
@@ -169,42 +251,21 @@ class XanoDocProcessor:
         else:
             return "08-reference/functions"
             
-    def extract_tags(self, content):
+    def extract_tags(self, content, hits=None):
         """Extract relevant tags from content"""
-        tags = set()
-        
-        # Common Xano concepts
-        keywords = [
-            'api', 'database', 'function', 'expression', 'filter',
-            'authentication', 'webhook', 'trigger', 'middleware',
-            'background-task', 'custom-function', 'query', 'crud',
-            'rest', 'graphql', 'websocket', 'realtime', 'cache',
-            'transaction', 'validation', 'transformation', 'integration'
-        ]
-        
-        content_lower = content.lower()
-        for keyword in keywords:
-            if keyword in content_lower:
-                tags.add(keyword)
-                
-        return list(tags)
+        if hits is None:
+            hits = self.scan_keywords(content)
+            
+        # Keep keyword order so tags are identical across runs and processes
+        return [keyword for keyword in TAG_KEYWORDS if keyword in hits]
         
-    def determine_difficulty(self, content):
+    def determine_difficulty(self, content, hits=None):
         """Determine difficulty level based on content complexity"""
-        advanced_indicators = [
-            'transaction', 'optimization', 'performance', 'scaling',
-            'custom function', 'complex', 'advanced', 'enterprise'
-        ]
+        if hits is None:
+            hits = self.scan_keywords(content)
         
-        intermediate_indicators = [
-            'filter', 'expression', 'webhook', 'api', 'integration',
-            'authentication', 'validation', 'transformation'
-        ]
-        
-        content_lower = content.lower()
-        
-        advanced_count = sum(1 for ind in advanced_indicators if ind in content_lower)
-        intermediate_count = sum(1 for ind in intermediate_indicators if ind in content_lower)
+        advanced_count = sum(1 for ind in ADVANCED_INDICATORS if ind in hits)
+        intermediate_count = sum(1 for ind in INTERMEDIATE_INDICATORS if ind in hits)
         
         if advanced_count >= 2:
             return "advanced"
@@ -213,22 +274,32 @@ class XanoDocProcessor:
         else:
             return "beginner"
             
-    def count_code_examples(self, content):
+    def count_code_examples(self, content, doc=None):
         """Count code blocks in content"""
         # Count markdown code blocks
-        code_blocks = re.findall(r'```[\s\S]*?```', content)
+        code_blocks = doc.code_spans if doc is not None else re.findall(r'```[\s\S]*?```', content)
         inline_code = re.findall(r'`[^`]+`', content)
         
         return len(code_blocks) + (len(inline_code) // 3)  # Approximate
         
-    def generate_frontmatter(self, file_path, content, title):
-        """Generate YAML frontmatter for file"""
-        category = self.categorize_file(file_path, content)
-        tags = self.extract_tags(content)
-        difficulty = self.determine_difficulty(content)
+    def analyze_document(self, file_path, content):
+        """Compute the shared analysis of a cleaned document once"""
+        doc = DocumentAnalysis(file_path, content, self.keyword_index)
+        self.profiler.lap('keyword_scan')
+        doc.title = self.extract_title(content)
+        self.profiler.lap('title')
+        doc.category = self.categorize_file(file_path, content, doc.hits)
+        self.profiler.lap('categorize')
+        return doc
+        
+    def generate_frontmatter(self, doc):
+        """Generate YAML frontmatter for an analyzed document"""
+        category = doc.category
+        tags = self.extract_tags(doc.content, doc.hits)
+        difficulty = self.determine_difficulty(doc.content, doc.hits)
         
         frontmatter = {
-            'title': title,
+            'title': doc.title,
             'category': category.split('/')[-1],
             'subcategory': category if '/' in category else None,
             'tags': tags,
@@ -237,71 +308,271 @@ class XanoDocProcessor:
             'related_docs': []  # Will be populated in cross-reference phase
         }
         
-        # Update metadata
-        self.metadata['categories'][category].append(title)
-        self.metadata['difficulty_distribution'][difficulty] += 1
-        for tag in tags:
-            self.metadata['tags'][tag] += 1
-            
         return frontmatter
         
-    def process_file(self, input_path):
-        """Process a single markdown file"""
+    def analyze_file(self, input_path, use_manifest=True):
+        """Clean and classify a single file without touching shared state"""
+        self.profiler.begin_file()
         try:
-            with open(input_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            # Reuse the previous run's result when the input is unchanged
+            stat = os.stat(input_path)
+            manifest = self.manifest if use_manifest else None
+            if manifest is not None:
+                entry = manifest.lookup(input_path, stat)
+                if entry is not None:
+                    return self.cached_result(input_path, entry, entry)
+                    
+            source = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': None}
+            skipped = {'input': str(input_path), 'source': source, 'output': None}
+            
+            # Skip non-docs files and pages too small to keep before reading them
+            if ('gitbook' in str(input_path) or 'fontawesome' in str(input_path) or
+                    stat.st_size < MIN_CONTENT_LENGTH):
+                return skipped
+                
+            with open_input(input_path, stat.st_size) as raw:
+                source['hash'] = hashlib.sha256(raw).hexdigest()
                 
-            # Skip non-docs files
-            if 'gitbook' in str(input_path) or 'fontawesome' in str(input_path):
-                return None
+                # A touched file with identical bytes is still unchanged
+                if manifest is not None:
+                    entry = manifest.lookup(input_path, stat, source['hash'])
+                    if entry is not None:
+                        return self.cached_result(input_path, entry, source)
+                        
+                # Clean the raw bytes where that matches cleaning the text,
+                # which spares decoding the whole page to a wide str
+                content = raw if self.cleaner.accepts_bytes(raw) else decode_input(raw)
+                self.profiler.lap('read')
                 
-            # Clean content
-            cleaned_content = self.clean_content(content)
+                # Clean content
+                cleaned_content = self.clean_content(content, input_path)
+                self.profiler.lap('clean_content')
             
             # Skip if too little content remains
-            if len(cleaned_content) < 100:
-                return None
+            if len(cleaned_content) < MIN_CONTENT_LENGTH:
+                return skipped
                 
-            # Extract title
-            title = self.extract_title(cleaned_content)
+            # Analyze once: title, keyword hits and category
+            doc = self.analyze_document(input_path, cleaned_content)
             
             # Generate frontmatter
-            frontmatter = self.generate_frontmatter(input_path, cleaned_content, title)
+            frontmatter = self.generate_frontmatter(doc)
+            self.profiler.lap('tagging')
             
             # Count code examples
-            code_count = self.count_code_examples(cleaned_content)
-            self.metadata['code_examples_count'] += code_count
+            code_count = self.count_code_examples(cleaned_content, doc)
+            self.profiler.lap('code_blocks')
+            
+            # Signatures for cross-references and dedup, cached with the result
+            terms = term_counts(doc.lower)
+            fingerprint = simhash(doc.lower)
+            self.profiler.lap('signature')
             
             # Determine output path
-            category = self.categorize_file(input_path, cleaned_content)
             filename = Path(input_path).stem + '.md'
-            output_path = self.output_dir / category / filename
+            output_path = self.output_dir / doc.category / filename
+            
+            # Render processed file
+            header = '---\n' + dump_frontmatter(frontmatter) + '---\n\n'
+            text = header + cleaned_content
+            self.profiler.lap('render')
+            
+            return {
+                'input': str(input_path),
+                'source': source,
+                'output': str(output_path),
+                'category': doc.category,
+                'title': doc.title,
+                'tags': frontmatter['tags'],
+                'difficulty': frontmatter['difficulty'],
+                'code_count': code_count,
+                'terms': terms,
+                'simhash': fingerprint,
+                'text': text,
+                'frontmatter': frontmatter,
+                'body_start': len(header),
+                'profile': self.profiler.end_file()
+            }
+            
+        except Exception as e:
+            # Recorded by record_result, so errors keep input order with workers
+            return {'input': str(input_path), 'error': str(e)}
+            
+    def cached_result(self, input_path, entry, source):
+        """Rebuild a result from a manifest entry without re-reading the input"""
+        source = {key: source[key] for key in ('size', 'mtime_ns', 'hash')}
+        if entry['result'] is None:
+            return {'input': str(input_path), 'source': source, 'output': None, 'cached': True}
+        return {**entry['result'], 'input': str(input_path), 'source': source, 'cached': True}
+        
+    def record_result(self, result):
+        """Merge an analyzed file into the run metadata and keep its output for writing"""
+        if 'error' in result:
+            return self.record_error(result)
+            
+        # An earlier input overwrote this cached output during the run, so
+        # rebuild it to keep the last writer winning as in a full rebuild
+        if result.get('cached') and result['output'] in self.written_outputs:
+            result = self.analyze_file(result['input'], use_manifest=False)
+            if 'error' in result:
+                return self.record_error(result)
+                
+        # Near-duplicates of a kept document become aliases of its output
+        duplicate_of = None
+        if result['output'] is not None:
+            duplicate_of = self.duplicates.find(result['simhash'])
+            # A former alias never wrote an output of its own, so rebuild it
+            if duplicate_of is None and result.get('cached') and not os.path.exists(result['output']):
+                result = self.analyze_file(result['input'], use_manifest=False)
+                if 'error' in result:
+                    return self.record_error(result)
+                    
+        if self.manifest is not None:
+            record = {key: value for key, value in result.items()
+                      if key not in ('input', 'source', 'text', 'frontmatter', 'body_start',
+                                     'cached', 'profile', 'duplicate_of')}
+            if duplicate_of is not None:
+                record['duplicate_of'] = duplicate_of
+            self.manifest.update(result['input'], result['source'],
+                                 record if result['output'] is not None else None)
+        if result.get('cached'):
+            self.cached_count += 1
+        if result['output'] is None:
+            return None
+        self.profiler.merge(result['input'], result.get('profile'))
+        
+        if duplicate_of is not None:
+            self.file_mapping[result['input']] = duplicate_of
+            self.store.add_document(result['input'], result['output'], result['title'], result['category'],
+                                    duplicate_of=Path(duplicate_of).relative_to(self.output_dir).as_posix())
+            self.duplicate_count += 1
+            return None
             
-            # Store mapping for cross-references
-            self.file_mapping[str(input_path)] = str(output_path)
+        try:
+            # Store mapping for cross-references and link rewriting
+            self.file_mapping[result['input']] = result['output']
+            self.sources[result['output']] = result['input']
+            self.similarity.add(result['output'], result['terms'])
+            self.duplicates.add(result['output'], result['simhash'])
+            if self.search_index is not None:
+                with self.profiler.stage('search_index'):
+                    self.index_document(result)
             
-            # Write processed file
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write('---\n')
-                f.write(yaml.dump(frontmatter, default_flow_style=False))
-                f.write('---\n\n')
-                f.write(cleaned_content)
+            # Keep the processed file for writing unless the previous run already wrote it
+            output_path = Path(result['output'])
+            if not result.get('cached'):
+                self.documents[result['output']] = (result['frontmatter'], result['text'][result['body_start']:])
+                self.written_outputs.add(result['output'])
                 
-            self.metadata['total_files'] += 1
+            # Record the document's metadata for the reports
+            self.store.add_document(result['input'], result['output'], result['title'], result['category'],
+                                    result['difficulty'], result['tags'], result['code_count'],
+                                    result['source']['size'], profile=result.get('profile'))
             return output_path
             
         except Exception as e:
-            print(f"Error processing {input_path}: {e}")
+            print(f"Error processing {result['input']}: {e}")
             return None
             
+    def record_error(self, result):
+        """Report and record a file whose analysis failed"""
+        print(f"Error processing {result['input']}: {result['error']}")
+        self.store.add_error(result['input'], result['error'])
+        return None
+        
+    def index_document(self, result):
+        """Add a kept document's cleaned content to the search index"""
+        text = result.get('text')
+        if text is None:
+            # Cached results carry no text; their output is already on disk
+            with open(result['output'], 'r', encoding='utf-8') as f:
+                text = f.read()
+        path = Path(result['output']).relative_to(self.output_dir).as_posix()
+        self.search_index.add(path, result['title'], strip_frontmatter(text))
+        
+    def process_file(self, input_path):
+        """Process a single markdown file"""
+        output_path = self.record_result(self.analyze_file(input_path))
+        if output_path is not None and str(output_path) in self.documents:
+            with self.profiler.stage('write'):
+                self.writer.write(output_path, self.render_document(output_path, []))
+        self.finish_writes()
+        return output_path
+        
+    def finish_writes(self):
+        """Wait for queued output writes and report any that failed"""
+        with self.profiler.stage('write_flush'):
+            failures = self.writer.flush()
+        for output, error in failures:
+            print(f"Error writing {output}: {error}")
+            self.store.add_error(output, error, 'write')
+            self.similarity.documents.pop(output, None)
+            self.duplicates.remove(output)
+            if self.search_index is not None:
+                self.search_index.remove(Path(output).relative_to(self.output_dir).as_posix())
+            # Forget the inputs behind a failed write so the next run rebuilds them
+            if self.manifest is not None:
+                for input_path, entry in list(self.manifest.files.items()):
+                    if entry['result'] is not None and entry['result']['output'] == output:
+                        del self.manifest.files[input_path]
+            
+    def related_documents(self):
+        """Yield (output, related docs relative to the output dir) per kept document, recording each
+
+        Also indexes file_mapping for rewrite_links, now that every output is known.
+        """
+        with self.profiler.stage('similarity'):
+            related = self.similarity.related(RELATED_DOCS)
+        with self.profiler.stage('link_rewrite'):
+            self.links = LinkRewriter(self.input_dir, self.file_mapping)
+            
+        for output in sorted(related):
+            related_docs = [Path(other).relative_to(self.output_dir).as_posix() for other in related[output]]
+            self.store.add_cross_reference(Path(output).relative_to(self.output_dir).as_posix(), related_docs)
+            yield output, related_docs
+            
     def create_cross_references(self):
-        """Add cross-references between related documents"""
-        # This would analyze content similarity and add related_docs
-        # For now, we'll skip this complex step
-        pass
+        """Write every kept document with its cross-references"""
+        for output, related_docs in self.related_documents():
+            try:
+                with self.profiler.stage('cross_references'):
+                    text = self.render_document(output, related_docs)
+                with self.profiler.stage('write'):
+                    self.writer.write(output, text)
+            except Exception as e:
+                print(f"Error adding cross-references to {output}: {e}")
+                
+    def document_parts(self, output_path, related_docs):
+        """(frontmatter, body) of a kept document with related_docs set and its links retargeted
+
+        Documents analyzed this run come from the spool and are handed out
+        once; outputs reused from the manifest cache are read back.
+        """
+        parts = self.documents.pop(str(output_path), None)
+        if parts is None:
+            with open(output_path, 'r', encoding='utf-8') as f:
+                text = f.read()
+            end = text.index('\n---\n\n', 3)
+            parts = (load_frontmatter(text[4:end]), text[end + 6:])
+        frontmatter, body = parts
+        frontmatter['related_docs'] = related_docs
+        return frontmatter, self.rewrite_links(output_path, body)
+        
+    def render_document(self, output_path, related_docs):
+        """A kept document's text with related_docs set and its links retargeted"""
+        frontmatter, body = self.document_parts(output_path, related_docs)
+        return '---\n' + dump_frontmatter(frontmatter) + '---\n\n' + body
+        
+    def rewrite_links(self, output_path, body):
+        """Point the links in a document's body at the outputs of the mirror pages they name"""
+        input_path = self.sources.get(str(output_path))
+        if input_path is None:
+            return body
+        with self.profiler.stage('link_rewrite'):
+            return self.links.rewrite(input_path, output_path, body)
         
     def generate_index_files(self):
-        """Generate index and reference files"""
+        """Generate index and reference files from the metadata store"""
         
         # Generate README.md
         readme_content = """# Xano Knowledge Base
@@ -355,47 +626,111 @@ Common issues and their solutions.
 - Code Examples: {code_examples}
 - Last Updated: {date}
 """.format(
-            total_files=self.metadata['total_files'],
-            code_examples=self.metadata['code_examples_count'],
+            total_files=self.store.document_count(),
+            code_examples=self.store.code_examples_count(),
             date=datetime.now().strftime('%Y-%m-%d')
         )
         
-        with open(self.output_dir / 'README.md', 'w') as f:
-            f.write(readme_content)
+        self.writer.write(self.output_dir / 'README.md', readme_content)
             
         # Save metadata
-        with open(self.output_dir / 'metadata.json', 'w') as f:
-            json.dump(self.metadata, f, indent=2, default=str)
+        self.writer.write(self.output_dir / 'metadata.json',
+                          json.dumps(self.store.metadata(), indent=2, default=str))
+            
+    def regenerate_index_files(self):
+        """Rewrite README.md and metadata.json from the last recorded run without processing"""
+        _, started, finished = self.store.run_info()
+        if finished is None:
+            print(f"Warning: the run started {started} did not finish; reporting what it recorded")
+        self.generate_index_files()
+        self.finish_writes()
+        self.writer.close()
+        self.store.close()
+        print(f"Reports regenerated from the run started {started}")
             
-    def process_all(self):
+    def process_all(self, workers=1, incremental=True):
         """Process all markdown files"""
         self.setup_output_structure()
         
-        # Find all markdown files
-        md_files = list(self.input_dir.rglob('*.md'))
-        print(f"Found {len(md_files)} markdown files")
+        # Started before the pool so workers record their errors under this run
+        self.store.start_run(processing_date=self.processing_date)
+        
+        # Load the previous run's manifest so unchanged inputs are skipped;
+        # a full rebuild starts empty but still records a fresh manifest
+        self.manifest = BuildManifest(self.output_dir / MANIFEST_NAME, PROCESSOR_VERSION,
+                                      RULES.fingerprint('clean_content'), load=incremental)
         
-        # Process each file
-        for i, md_file in enumerate(md_files):
+        # Stream markdown files through analysis, merging results in input order;
+        # the total is only known once discovery has finished
+        md_files = set()
+        results = parallel_map(self, 'analyze_file', discover_files(self.input_dir, seen=md_files), workers)
+        for i, result in enumerate(results):
             if i % 10 == 0:
-                print(f"Processing file {i+1}/{len(md_files)}")
-            self.process_file(md_file)
+                print(f"Processing file {i+1}")
+            self.record_result(result)
+        print(f"Scanned {len(md_files)} markdown files")
             
-        # Create cross-references
+        # Create cross-references, writing every spooled document
         self.create_cross_references()
+        self.documents.close()
         
         # Generate index files
         self.generate_index_files()
         
+        # Wait for the queued writes before recording what was built
+        self.finish_writes()
+        self.writer.close()
+        self.manifest.prune(md_files)
+        self.manifest.save()
+        self.store.finish_run()
+        if self.search_index is not None:
+            with self.profiler.stage('search_index'):
+                size = self.search_index.save(self.output_dir / SEARCH_INDEX_NAME)
+            print(f"Search index: {len(self.search_index)} documents, {size / 1024:.0f} KB")
+        
         print(f"\nProcessing complete!")
-        print(f"Total files processed: {self.metadata['total_files']}")
-        print(f"Total code examples: {self.metadata['code_examples_count']}")
-        print(f"Categories: {len(self.metadata['categories'])}")
+        print(f"Total files processed: {self.store.document_count()}")
+        print(f"Unchanged files reused: {self.cached_count}")
+        print(f"Near-duplicates aliased: {self.duplicate_count}")
+        print(f"Links retargeted: {self.links.rewritten}")
+        print(f"Outputs written: {self.writer.written} ({self.writer.unchanged} already up to date)")
+        print(f"Total code examples: {self.store.code_examples_count()}")
+        print(f"Categories: {len(self.store.category_counts())}")
+        if self.profiler.enabled:
+            self.profiler.save(self.output_dir / PROFILE_NAME)
+            print(f"Profile saved: {self.output_dir / PROFILE_NAME}")
+        self.store.close()
         
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process Xano documentation into a knowledge base")
+    parser.add_argument('--workers', type=int, default=1, help="Number of worker processes")
+    parser.add_argument('--full', action='store_true', help="Ignore the build manifest and reprocess every file")
+    parser.add_argument('--profile', action='store_true', help=f"Time each stage and rule and write {PROFILE_NAME}")
+    parser.add_argument('--search-index', action='store_true', help=f"Also build a full-text index, {SEARCH_INDEX_NAME}")
+    parser.add_argument('--rules-config', help="JSON file adding or disabling cleaning rules")
+    parser.add_argument('--report-only', action='store_true',
+                        help=f"Regenerate README.md and metadata.json from {METADATA_STORE_NAME} without processing")
+    args = parser.parse_args()
+    
+    if args.rules_config:
+        try:
+            RULES.load_config(args.rules_config)
+        except (OSError, ValueError) as e:
+            parser.error(f"--rules-config: {e}")
+    
     processor = XanoDocProcessor(
         input_dir="/root/docu-download/output/markdown",
         output_dir="/root/xano-knowledge"
     )
-    processor.process_all()
\ No newline at end of file
+    if args.profile:
+        processor.profiler = Profiler()
+    if args.search_index:
+        processor.search_index = IndexBuilder()
+    if args.report_only:
+        try:
+            processor.regenerate_index_files()
+        except (sqlite3.Error, ValueError) as e:
+            parser.error(f"--report-only: {e}")
+    else:
+        processor.process_all(workers=args.workers, incremental=not args.full)
\ No newline at end of file
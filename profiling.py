@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Processing Profiler
+Opt-in per-stage and per-rule timing for the documentation processors
+"""
+
+import json
+import time
+import heapq
+import contextlib
+
+from writer import write_atomic
+
+# Upper bounds of the latency histogram buckets, in seconds
+HISTOGRAM_BOUNDS = [1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0]
+HISTOGRAM_LABELS = ['<10us', '<100us', '<1ms', '<10ms', '<100ms', '<1s', '>=1s']
+
+# Shared do-nothing stage used when profiling is off
+NO_STAGE = contextlib.nullcontext()
+
+
+class NullProfiler:
+    """Stands in for Profiler when profiling is off; every hook is a no-op"""
+
+    enabled = False
+
+    def begin_file(self):
+        pass
+
+    def end_file(self):
+        return None
+
+    def lap(self, name):
+        pass
+
+    def stage(self, name):
+        return NO_STAGE
+
+    def rule_timings(self):
+        return None
+
+    def merge(self, path, sample):
+        pass
+
+
+class TimingStats:
+    """Count, total, maximum and histogram of a set of timings"""
+
+    __slots__ = ('count', 'total', 'max', 'histogram')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.histogram = [0] * len(HISTOGRAM_LABELS)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        for bucket, bound in enumerate(HISTOGRAM_BOUNDS):
+            if seconds < bound:
+                break
+        else:
+            bucket = len(HISTOGRAM_BOUNDS)
+        self.histogram[bucket] += 1
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'total_seconds': round(self.total, 6),
+            'mean_ms': round(self.total * 1000 / self.count, 4) if self.count else 0.0,
+            'max_ms': round(self.max * 1000, 4),
+            'histogram': dict(zip(HISTOGRAM_LABELS, self.histogram))
+        }
+
+
+class Profiler:
+    """Collects stage and rule timings per file and aggregates them for a run
+
+    Per-file work brackets itself with begin_file()/end_file() and marks the
+    end of each stage with lap(); the returned sample travels with the file's
+    result (possibly from a pool worker) and is folded into the run totals by
+    merge() in the parent. Stages timed with stage() outside a file go
+    straight into the totals.
+    """
+
+    enabled = True
+
+    def __init__(self, slowest=10):
+        self.slowest = slowest
+        self.stages = {}
+        self.rules = {}
+        self.files = []
+        self.current = None
+        self.file_start = None
+        self.last_lap = None
+
+    def begin_file(self):
+        """Start collecting a sample for one file"""
+        self.current = {'stages': {}, 'rules': {}}
+        self.file_start = self.last_lap = time.perf_counter()
+
+    def lap(self, name):
+        """Charge the time since the previous lap, or since begin_file, to a stage"""
+        if self.current is None:
+            return
+        now = time.perf_counter()
+        stages = self.current['stages']
+        stages[name] = stages.get(name, 0.0) + now - self.last_lap
+        self.last_lap = now
+
+    def end_file(self):
+        """Finish the current file and return its sample"""
+        sample, self.current = self.current, None
+        if sample is not None:
+            sample['seconds'] = time.perf_counter() - self.file_start
+        return sample
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Time the enclosed block as one call of a stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            if self.current is not None:
+                stages = self.current['stages']
+                stages[name] = stages.get(name, 0.0) + seconds
+            else:
+                self.stages.setdefault(name, TimingStats()).add(seconds)
+
+    def rule_timings(self):
+        """Dict a RuleEngine adds its per-rule times to for the current file"""
+        return self.current['rules'] if self.current is not None else None
+
+    def merge(self, path, sample):
+        """Fold one file's sample into the run totals"""
+        if sample is None:
+            return
+        for name, seconds in sample['stages'].items():
+            self.stages.setdefault(name, TimingStats()).add(seconds)
+        for label, seconds in sample['rules'].items():
+            self.rules.setdefault(label, TimingStats()).add(seconds)
+
+        entry = (sample['seconds'], str(path), max(sample['stages'].items(), key=lambda item: item[1],
+                                                   default=(None, 0.0))[0])
+        if len(self.files) < self.slowest:
+            heapq.heappush(self.files, entry)
+        else:
+            heapq.heappushpop(self.files, entry)
+
+    def slowest_rules(self):
+        """Rules ordered by total time, slowest first"""
+        ranked = sorted(self.rules.items(), key=lambda item: item[1].total, reverse=True)
+        return ranked[:self.slowest]
+
+    def report(self):
+        """Machine-readable profile of the run"""
+        return {
+            'stages': {name: stats.to_dict() for name, stats in self.stages.items()},
+            'rules': {label: stats.to_dict() for label, stats in self.rules.items()},
+            'slowest_files': [
+                {'file': path, 'seconds': round(seconds, 6), 'slowest_stage': stage}
+                for seconds, path, stage in sorted(self.files, reverse=True)
+            ],
+            'slowest_rules': [
+                {'rule': label, 'total_seconds': round(stats.total, 6), 'max_ms': round(stats.max * 1000, 4)}
+                for label, stats in self.slowest_rules()
+            ]
+        }
+
+    def save(self, path):
+        """Write the profile as JSON"""
+        write_atomic(path, (json.dumps(self.report(), indent=2, ensure_ascii=False) + '\n').encode('utf-8'),
+                     fsync=False)
+
+    def markdown(self):
+        """Profile summary as a markdown report section"""
+        lines = ["## Performance Profile\n\n"]
+        lines.append("| Stage | Calls | Total (s) | Mean (ms) | Max (ms) |\n")
+        lines.append("|---|---|---|---|---|\n")
+        for name, stats in sorted(self.stages.items(), key=lambda item: item[1].total, reverse=True):
+            lines.append(f"| {name} | {stats.count} | {stats.total:.3f} | "
+                         f"{stats.total * 1000 / stats.count:.3f} | {stats.max * 1000:.3f} |\n")
+
+        if self.rules:
+            lines.append("\n### Slowest Rules\n\n")
+            for label, stats in self.slowest_rules():
+                lines.append(f"- `{label}`: {stats.total:.3f}s total, {stats.max * 1000:.3f}ms max\n")
+
+        if self.files:
+            lines.append("\n### Slowest Files\n\n")
+            for seconds, path, stage in sorted(self.files, reverse=True):
+                lines.append(f"- {path}: {seconds * 1000:.1f}ms (mostly {stage})\n")
+        return lines
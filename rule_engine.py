@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Regex Rule Engine
+Compiles cleaning rules once and applies them in as few passes as possible
+"""
+
+import re
+import time
+import codecs
+import hashlib
+
+# Flags that can be scoped to a single alternative with an inline group
+SCOPED_FLAGS = {re.IGNORECASE: 'i', re.MULTILINE: 'm', re.DOTALL: 's'}
+SCOPED_MASK = re.IGNORECASE | re.MULTILINE | re.DOTALL
+
+# Backreferences break when a pattern is renumbered inside an alternation
+BACKREFERENCE = re.compile(r'\\[1-9]|\(\?P=')
+
+# Parts of a ^...$ body that could match a newline or an empty line, or end
+# the match before the line does: negated classes, escapes for whitespace,
+# non-word or raw characters, groups other than (?:...) and alternation
+LINE_UNSAFE = re.compile(r'\[\^|\\[nsSWDxuU0-9AZz]|\(\?(?!:)|\||\n')
+
+# Seconds one rule, or all rules together, may spend on a single page
+# before the engine warns and stops running guarded rules unbounded
+RULE_BUDGET = 1.0
+FILE_BUDGET = 5.0
+
+# Longest span or line a guarded rule is still run over on a pathological page
+MAX_SPAN = 4096
+
+# Characters on which an ASCII str pattern and its bytes twin can disagree:
+# \r, which text-mode reads translate, the whitespace only Unicode \s
+# matches and the letters only Unicode IGNORECASE folds to ASCII
+BYTES_UNSAFE = re.compile(b'|'.join(re.escape(char.encode('utf-8')) for char in (
+    '\r\x1c\x1d\x1e\x1f\x85\xa0\u1680' + ''.join(map(chr, range(0x2000, 0x200b))) +
+    '\u2028\u2029\u202f\u205f\u3000\u0130\u0131\u017f\u212a')))
+
+# Pattern parts that match differently on UTF-8 bytes than on text even for
+# ASCII patterns: Unicode escapes, word, digit and boundary classes, and
+# counted repetitions of a character class or dot, which count bytes
+BYTES_UNSAFE_PATTERN = re.compile(r'\\[uUNwWbBdD]|[.\]]\{')
+
+# Bytes validated per step when checking raw input is UTF-8
+UTF8_CHUNK = 64 * 1024
+
+
+def is_utf8(data):
+    """Whether data decodes as UTF-8, checked in chunks to avoid a full-size str"""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        for start in range(0, len(data), UTF8_CHUNK):
+            decoder.decode(data[start:start + UTF8_CHUNK])
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+class SpanGuard:
+    """Bounds a rule whose matches run from an opener through a chain of closers
+
+    Patterns like <img\\s+[^>]*src=...[^>]*> backtrack cubically when an
+    opener is never closed. A page is pathological for the rule when some
+    opener's span runs over max_span characters, counting an unclosed one
+    as running to the end; the rule then only runs inside well-formed spans,
+    extended by tail characters for matches that continue past the last
+    closer, and leaves the malformed ones untouched.
+    """
+
+    def __init__(self, opener, *closers, tail=0, max_span=MAX_SPAN):
+        self.opener = opener
+        self.closers = closers
+        self.tail = tail
+        self.max_span = max_span
+        self.byte_opener = opener.encode('utf-8')
+        self.byte_closers = tuple(closer.encode('utf-8') for closer in closers)
+
+    def __repr__(self):
+        closers = ', '.join(map(repr, self.closers))
+        return f'SpanGuard({self.opener!r}, {closers}, tail={self.tail}, max_span={self.max_span})'
+
+    def spans(self, content):
+        """Yield (start, end) of every opener through its closers, end -1 if unclosed"""
+        opener, closers = (self.opener, self.closers) if isinstance(content, str) else \
+            (self.byte_opener, self.byte_closers)
+        first = -1
+        start = content.find(opener)
+        while start != -1:
+            # Openers before the same first closer share the rest of the chain
+            if first < start + len(opener):
+                first = end = content.find(closers[0], start + len(opener))
+                for previous, closer in zip(closers, closers[1:]):
+                    if end == -1:
+                        break
+                    end = content.find(closer, end + len(previous))
+                if end == -1:
+                    yield start, -1
+                    return
+                end += len(closers[-1])
+            yield start, end
+            start = content.find(opener, start + 1)
+
+    def is_pathological(self, content):
+        """Whether some opener spans more than max_span, running to the end if unclosed"""
+        return any((len(content) if end == -1 else end) - start > self.max_span
+                   for start, end in self.spans(content))
+
+    def apply(self, regex, replacement, content):
+        """Run the rule only on matches confined to well-formed spans"""
+        parts = []
+        position = 0
+        for start, end in self.spans(content):
+            if start < position or end == -1 or end - start > self.max_span:
+                continue
+            match = regex.match(content, start, min(end + self.tail, len(content)))
+            if match:
+                parts.append(content[position:start])
+                parts.append(match.expand(replacement))
+                position = match.end()
+        parts.append(content[position:])
+        return content[:0].join(parts)
+
+
+class LineGuard:
+    """Bounds a rule whose matches never cross a newline
+
+    Lazy .*? patterns go quadratic or worse on very long lines full of their
+    opener. A page is pathological for the rule when a line longer than
+    max_line contains the opener; the rule then runs line by line and skips
+    those lines.
+    """
+
+    def __init__(self, opener, max_line=MAX_SPAN):
+        self.opener = opener
+        self.max_line = max_line
+        self.byte_opener = opener.encode('utf-8')
+
+    def __repr__(self):
+        return f'LineGuard({self.opener!r}, max_line={self.max_line})'
+
+    def oversized(self, content):
+        """Predicate for lines of content over max_line that contain the opener"""
+        opener = self.opener if isinstance(content, str) else self.byte_opener
+        return lambda line: len(line) > self.max_line and opener in line
+
+    def is_pathological(self, content):
+        """Whether a line over max_line contains the opener"""
+        newline = '\n' if isinstance(content, str) else b'\n'
+        return len(content) > self.max_line and any(map(self.oversized(content), content.split(newline)))
+
+    def apply(self, regex, replacement, content):
+        """Run the rule on each line that is not oversized"""
+        newline = '\n' if isinstance(content, str) else b'\n'
+        is_oversized = self.oversized(content)
+        return newline.join(line if is_oversized(line) else regex.sub(replacement, line)
+                            for line in content.split(newline))
+
+
+class RuleEngine:
+    def __init__(self, rules, name='rules', merge=True, guards=None,
+                 rule_budget=RULE_BUDGET, file_budget=FILE_BUDGET):
+        """Compile (pattern, replacement, flags) rules into merged passes
+
+        Only consecutive whole-line deletions are merged; see is_mergeable.
+        With merge=False every rule keeps its own pass, which lets each rule
+        be timed on its own.
+        guards maps a rule's pattern to a SpanGuard or LineGuard that bounds
+        it on pathological pages; guarded rules always get their own pass.
+        """
+        self.name = name
+        self.rules = list(rules)
+        self.guards = dict(guards or {})
+        self.rule_budget = rule_budget
+        self.file_budget = file_budget
+        self.passes = []
+        self.labels = []
+        self.pass_guards = []
+
+        # Identifies the rule set so cached outputs can be invalidated
+        identity = repr(self.rules) + (repr(sorted(self.guards.items())) if self.guards else '')
+        self.fingerprint = hashlib.sha256(identity.encode('utf-8')).hexdigest()[:16]
+
+        pending = []
+        for index, (pattern, replacement, flags) in enumerate(self.rules):
+            guard = self.guards.get(pattern)
+            if merge and guard is None and replacement == '' and self.is_mergeable(pattern, flags):
+                pending.append((pattern, flags, index))
+                continue
+            self.flush(pending)
+            self.passes.append((re.compile(pattern, flags), replacement))
+            self.labels.append(f'{name}[{index}] {pattern}')
+            self.pass_guards.append(guard)
+        self.flush(pending)
+        
+        # Byte twins of the passes, which only plain ASCII rules can have
+        self.byte_passes = None
+        if all(pattern.isascii() and replacement.isascii() and not BYTES_UNSAFE_PATTERN.search(pattern)
+               for pattern, replacement, _ in self.rules):
+            self.byte_passes = [(re.compile(regex.pattern.encode('ascii'), regex.flags & ~re.UNICODE),
+                                 replacement.encode('ascii')) for regex, replacement in self.passes]
+
+    @staticmethod
+    def is_mergeable(pattern, flags):
+        """Check whether a deletion rule can join a combined alternation
+
+        One alternation only gives the same result as running the rules in
+        order when no rule's match can overlap another's or be created by an
+        earlier deletion. That holds for rules that empty a whole line:
+        ^body$ under MULTILINE, where the body never matches a newline or an
+        empty line. Every such rule matches from a line start to its end and
+        leaves the newline, so it does not matter which one empties a line.
+        Deletions of spans inside a line, such as attributes, can contain or
+        join up with each other's matches and keep their own passes.
+        """
+        if flags & ~SCOPED_MASK or not flags & re.MULTILINE or flags & re.DOTALL:
+            return False
+        if not pattern.startswith('^') or not pattern.endswith('$') or pattern.endswith('\\$'):
+            return False
+        if LINE_UNSAFE.search(pattern[1:-1]) or BACKREFERENCE.search(pattern):
+            return False
+        return re.compile(pattern, flags).match('') is None
+
+    def flush(self, pending):
+        """Merge consecutive deletion rules into one alternation pass"""
+        if not pending:
+            return
+        pattern, flags, index = pending[0]
+        if len(pending) == 1:
+            self.passes.append((re.compile(pattern, flags), ''))
+            self.labels.append(f'{self.name}[{index}] {pattern}')
+        else:
+            self.passes.append((re.compile(self.combine(pending)), ''))
+            self.labels.append(f'{self.name}[{index}-{pending[-1][2]}] {pattern} (+{len(pending) - 1} merged)')
+        self.pass_guards.append(None)
+        pending.clear()
+
+    @staticmethod
+    def combine(patterns):
+        """Join patterns into one alternation, scoping each one's flags"""
+        alternatives = []
+        for pattern, flags, *_ in patterns:
+            letters = ''.join(letter for flag, letter in SCOPED_FLAGS.items() if flags & flag)
+            alternatives.append(f'(?{letters}:{pattern})' if letters else f'(?:{pattern})')
+        return '|'.join(alternatives)
+
+    def accepts_bytes(self, data):
+        """Whether the passes give the same result on raw UTF-8 data as on its text
+
+        Byte passes copy one byte per character where a str holding any
+        character past U+FFFF copies four, so cleaning raw input is cheaper.
+        """
+        return self.byte_passes is not None and not BYTES_UNSAFE.search(data) and is_utf8(data)
+
+    def apply(self, content, timings=None, source=None):
+        """Run every pass over the content, adding each pass's time to timings if given
+
+        content is text, or raw UTF-8 bytes or a mapping of them that
+        accepts_bytes() approved, in which case bytes are returned. Guarded
+        passes run bounded when the page is pathological for them, or for
+        the rest of the page once it has used up the file budget. Passes that
+        overrun the rule budget are reported, naming source if given.
+        """
+        page_start = time.perf_counter()
+        over_budget = False
+        passes = self.passes if isinstance(content, str) else self.byte_passes
+        for (regex, replacement), label, guard in zip(passes, self.labels, self.pass_guards):
+            start = time.perf_counter()
+            if guard is not None and not isinstance(content, (str, bytes)):
+                content = bytes(content)
+            if guard is not None and (over_budget or guard.is_pathological(content)):
+                print(f"Warning: {source or 'input'}: running {label} bounded by {guard!r}")
+                content = guard.apply(regex, replacement, content)
+                label += ' [bounded]'
+            else:
+                content = regex.sub(replacement, content)
+            end = time.perf_counter()
+
+            if timings is not None:
+                timings[label] = timings.get(label, 0.0) + end - start
+            if end - start > self.rule_budget:
+                print(f"Warning: {source or 'input'}: {label} took {end - start:.2f}s")
+            if not over_budget and end - page_start > self.file_budget:
+                print(f"Warning: {source or 'input'}: rule budget of {self.file_budget:.0f}s used up")
+                over_budget = True
+        return content
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Rule Registry
+Versioned cleaning rule tables, compiled once per process and shared by every processor
+"""
+
+import re
+import json
+import hashlib
+
+from rule_engine import RuleEngine
+
+
+class RuleRegistry:
+    """Named (pattern, replacement, flags) tables and their compiled forms
+
+    Processors register their tables at import. A table is compiled the
+    first time it is used and the result is shared by every processor in
+    the process. fingerprint() hashes the tables' versions, rules and guards,
+    so caches keyed by it are invalidated when the rules or their config
+    change.
+
+    A JSON config can change the tables without editing code:
+
+        {"clean_content": {"disable": ["^.*Sign Up.*$"],
+                           "add": [{"pattern": "^Beta:.*$", "flags": ["MULTILINE"]}]}}
+
+    Disabled rules are named by pattern. Added rules run after the built-in
+    ones, and their replacement defaults to ''.
+    """
+
+    def __init__(self):
+        self.tables = {}
+        self.engines = {}
+        self.compiled_tables = {}
+
+    def register(self, name, rules, version=1, guards=None, merge=True):
+        """Declare a rule table; bump version when its meaning changes outside the rules"""
+        self.tables[name] = {'version': version, 'rules': list(rules),
+                             'guards': dict(guards or {}), 'merge': merge}
+        self.engines.pop(name, None)
+        self.compiled_tables.pop(name, None)
+
+    def rules(self, name):
+        """The table's current rules, in order"""
+        return list(self.tables[name]['rules'])
+
+    def engine(self, name):
+        """The table compiled into a RuleEngine, shared by every caller"""
+        engine = self.engines.get(name)
+        if engine is None:
+            table = self.tables[name]
+            engine = self.engines[name] = RuleEngine(table['rules'], name, merge=table['merge'],
+                                                     guards=table['guards'])
+        return engine
+
+    def compiled(self, name):
+        """The table as (compiled pattern, replacement) pairs, for callers
+        that apply the rules themselves"""
+        compiled = self.compiled_tables.get(name)
+        if compiled is None:
+            compiled = self.compiled_tables[name] = [
+                (re.compile(pattern, flags), replacement) for pattern, replacement, flags in self.tables[name]['rules']
+            ]
+        return compiled
+
+    def fingerprint(self, *names):
+        """Hash of the named tables, or of every table when none are named"""
+        identity = []
+        for name in sorted(names or self.tables):
+            table = self.tables[name]
+            identity.append((name, table['version'], table['rules'], sorted(table['guards'].items())))
+        return hashlib.sha256(repr(identity).encode('utf-8')).hexdigest()[:16]
+
+    def configure(self, config):
+        """Apply a config mapping table names to the rules they disable and add"""
+        for name, changes in config.items():
+            if name not in self.tables:
+                raise ValueError(f"Unknown rule table: {name}")
+            table = self.tables[name]
+            rules = table['rules']
+
+            disabled = set(changes.get('disable', []))
+            missing = disabled - {pattern for pattern, _, _ in rules}
+            if missing:
+                raise ValueError(f"{name}: no rules to disable matching {sorted(missing)}")
+            rules = [rule for rule in rules if rule[0] not in disabled]
+
+            for rule in changes.get('add', []):
+                flags = 0
+                for flag in rule.get('flags', []):
+                    if flag not in re.RegexFlag.__members__:
+                        raise ValueError(f"{name}: unknown regex flag {flag}")
+                    flags |= re.RegexFlag[flag]
+                try:
+                    re.compile(rule['pattern'], flags)
+                except re.error as e:
+                    raise ValueError(f"{name}: bad pattern {rule['pattern']!r}: {e}") from e
+                rules.append((rule['pattern'], rule.get('replacement', ''), flags))
+
+            self.register(name, rules, table['version'], table['guards'], table['merge'])
+
+    def load_config(self, path):
+        """Apply a JSON config file; see the class docstring for its format"""
+        with open(path, 'r', encoding='utf-8') as f:
+            self.configure(json.load(f))
+
+
+# The registry every processor registers its tables with
+RULES = RuleRegistry()
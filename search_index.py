@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Full-Text Search Index
+Builds a memory-mappable positional inverted index and ranks queries with BM25
+"""
+
+import re
+import sys
+import json
+import math
+import mmap
+import time
+import struct
+import argparse
+
+from writer import write_atomic
+
+TOKEN = re.compile(r'\w+')
+QUERY = re.compile(r'"([^"]*)"|(\S+)')
+
+# File layout: header, document table, term table sorted by term, string
+# blob (terms and document descriptions), then the postings blob. Each
+# term's postings hold, per document in id order, the varint-encoded id
+# delta, term frequency, byte length of the positions and the position deltas
+MAGIC = b'XKIX'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sIIIdQQQQ')
+DOCUMENT = struct.Struct('<QII')
+TERM = struct.Struct('<QIIQQ')
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text):
+    """Lowercased word tokens of text, in order"""
+    return TOKEN.findall(text.lower())
+
+
+def strip_frontmatter(text):
+    """Body of a rendered document without its YAML frontmatter"""
+    if text.startswith('---\n'):
+        end = text.find('\n---\n', 3)
+        if end != -1:
+            return text[end + 5:]
+    return text
+
+
+def encode_varint(value, out):
+    """Append value as a little-endian base-128 varint"""
+    while value >= 0x80:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varint(data, offset):
+    """Read a varint at offset and return (value, next offset)"""
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+class IndexBuilder:
+    """Collects documents as they are written and saves them as an index file"""
+
+    def __init__(self):
+        self.documents = {}
+
+    def __len__(self):
+        return len(self.documents)
+
+    def add(self, path, title, text):
+        """Index a document, replacing any earlier one at the same path"""
+        positions = {}
+        tokens = tokenize(text)
+        for position, token in enumerate(tokens):
+            positions.setdefault(token, []).append(position)
+        self.documents[path] = (title, len(tokens), positions)
+
+    def remove(self, path):
+        """Drop a document, e.g. because its output could not be written"""
+        self.documents.pop(path, None)
+
+    def build(self):
+        """Serialize the collected documents into the index file format"""
+        paths = sorted(self.documents)
+        strings = bytearray()
+        postings = bytearray()
+        documents = []
+        by_term = {}
+
+        for doc_id, path in enumerate(paths):
+            title, length, positions = self.documents[path]
+            description = json.dumps([path, title], ensure_ascii=False).encode('utf-8')
+            documents.append(DOCUMENT.pack(len(strings), len(description), length))
+            strings += description
+            for token, offsets in positions.items():
+                by_term.setdefault(token, []).append((doc_id, offsets))
+
+        terms = []
+        for token in sorted(by_term, key=lambda token: token.encode('utf-8')):
+            encoded = token.encode('utf-8')
+            start = len(postings)
+            previous = 0
+            for doc_id, offsets in by_term[token]:
+                encode_varint(doc_id - previous, postings)
+                encode_varint(len(offsets), postings)
+                deltas = bytearray()
+                last = 0
+                for offset in offsets:
+                    encode_varint(offset - last, deltas)
+                    last = offset
+                encode_varint(len(deltas), postings)
+                postings += deltas
+                previous = doc_id
+            terms.append(TERM.pack(len(strings), len(encoded), len(by_term[token]), start, len(postings) - start))
+            strings += encoded
+
+        total_length = sum(length for _, length, _ in self.documents.values())
+        docs_offset = HEADER.size
+        terms_offset = docs_offset + DOCUMENT.size * len(documents)
+        strings_offset = terms_offset + TERM.size * len(terms)
+        postings_offset = strings_offset + len(strings)
+        header = HEADER.pack(MAGIC, FORMAT_VERSION, len(documents), len(terms),
+                             total_length / len(documents) if documents else 0.0,
+                             docs_offset, terms_offset, strings_offset, postings_offset)
+        return b''.join([header, *documents, *terms, strings, postings])
+
+    def save(self, path):
+        """Write the index file atomically and return its size in bytes"""
+        data = self.build()
+        write_atomic(path, data)
+        return len(data)
+
+
+class SearchIndex:
+    """Read-only view of an index file, memory-mapped so opening it is cheap"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.doc_count, self.term_count, self.average_length,
+         self.docs_offset, self.terms_offset, self.strings_offset, self.postings_offset) = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.data.close()
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} search index")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.data.close()
+
+    def document(self, doc_id):
+        """(path, title, token count) of a document"""
+        offset, size, length = DOCUMENT.unpack_from(self.data, self.docs_offset + DOCUMENT.size * doc_id)
+        start = self.strings_offset + offset
+        path, title = json.loads(self.data[start:start + size])
+        return path, title, length
+
+    def lookup(self, token):
+        """(document frequency, postings bytes) of a token, or None"""
+        key = token.encode('utf-8')
+        low, high = 0, self.term_count
+        while low < high:
+            middle = (low + high) // 2
+            offset, size, df, postings, postings_size = TERM.unpack_from(
+                self.data, self.terms_offset + TERM.size * middle)
+            start = self.strings_offset + offset
+            term = self.data[start:start + size]
+            if term < key:
+                low = middle + 1
+            elif term > key:
+                high = middle
+            else:
+                start = self.postings_offset + postings
+                return df, self.data[start:start + postings_size]
+        return None
+
+    @staticmethod
+    def postings(data, positions=False):
+        """Yield (doc_id, tf, positions or None) from a term's postings bytes"""
+        doc_id = 0
+        offset = 0
+        while offset < len(data):
+            delta, offset = decode_varint(data, offset)
+            tf, offset = decode_varint(data, offset)
+            size, offset = decode_varint(data, offset)
+            doc_id += delta
+            found = None
+            if positions:
+                found = []
+                position = 0
+                cursor, end = offset, offset + size
+                while cursor < end:
+                    step, cursor = decode_varint(data, cursor)
+                    position += step
+                    found.append(position)
+            offset += size
+            yield doc_id, tf, found
+
+    def phrase_documents(self, tokens):
+        """Ids of documents containing the tokens as consecutive words"""
+        matches = None
+        for index, token in enumerate(tokens):
+            entry = self.lookup(token)
+            if entry is None:
+                return set()
+            starts = {}
+            for doc_id, _, found in self.postings(entry[1], positions=True):
+                if matches is None or doc_id in matches:
+                    shifted = {position - index for position in found}
+                    starts[doc_id] = shifted if matches is None else matches[doc_id] & shifted
+            matches = {doc_id: found for doc_id, found in starts.items() if found}
+        return set(matches or ())
+
+    def search(self, query, limit=10):
+        """Rank documents for a query with BM25; quoted phrases must match exactly"""
+        tokens = []
+        required = None
+        for phrase, word in QUERY.findall(query):
+            phrase_tokens = tokenize(phrase if phrase else word)
+            tokens.extend(phrase_tokens)
+            if phrase and phrase_tokens:
+                found = self.phrase_documents(phrase_tokens)
+                required = found if required is None else required & found
+
+        scores = {}
+        lengths = {}
+        for token in dict.fromkeys(tokens):
+            entry = self.lookup(token)
+            if entry is None:
+                continue
+            df, data = entry
+            idf = math.log(1 + (self.doc_count - df + 0.5) / (df + 0.5))
+            for doc_id, tf, _ in self.postings(data):
+                if required is not None and doc_id not in required:
+                    continue
+                length = lengths.get(doc_id)
+                if length is None:
+                    length = lengths[doc_id] = DOCUMENT.unpack_from(
+                        self.data, self.docs_offset + DOCUMENT.size * doc_id)[2]
+                norm = K1 * (1 - B + B * length / (self.average_length or 1.0))
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        results = []
+        for doc_id, score in ranked:
+            path, title, _ = self.document(doc_id)
+            results.append({'path': path, 'title': title, 'score': round(score, 4)})
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search a documentation index built with --search-index")
+    parser.add_argument('index', help="Index file, e.g. /root/xano-knowledge/search.idx")
+    parser.add_argument('query', nargs='+', help='Query words; wrap phrases in double quotes')
+    parser.add_argument('--limit', type=int, default=10, help="Number of results to show")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    try:
+        index = SearchIndex(args.index)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    with index:
+        start = time.perf_counter()
+        results = index.search(' '.join(args.query), args.limit)
+        elapsed = time.perf_counter() - start
+
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+        return
+    for rank, result in enumerate(results, 1):
+        print(f"{rank:2d}. {result['title']} ({result['score']:.2f})\n    {result['path']}")
+    print(f"{len(results)} results in {elapsed * 1000:.1f}ms from {index.doc_count} documents")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Content Similarity Index
+Finds each document's most related documents from TF-IDF term signatures
+"""
+
+import re
+import math
+import heapq
+from collections import Counter
+
+# Words worth comparing documents on; shorter tokens are mostly noise
+WORD = re.compile(r'[a-z][a-z0-9_]{2,}')
+
+STOPWORDS = frozenset(
+    'the and for with you your this that are can from will use using when which '
+    'into have has not but all any each more also then than its was were been '
+    'one two how what where why who our their there here these those them they '
+    'out about over only other such may must should would could like just get '
+    'set see new make sure way need want used does did per via xano'.split()
+)
+
+# Terms counted per document; kept in the build manifest as its signature
+TERMS_PER_DOCUMENT = 64
+
+# Highest-weighted terms a document is compared on
+SIGNATURE_TERMS = 16
+
+# Documents kept in each term's posting list, heaviest first; bounds the
+# work per document so finding related documents stays linear overall
+MAX_POSTINGS = 64
+
+
+def term_counts(lower, limit=TERMS_PER_DOCUMENT):
+    """Most frequent non-stopword terms of lowercased text with their counts"""
+    counts = Counter(word for word in WORD.findall(lower) if word not in STOPWORDS)
+    return dict(counts.most_common(limit))
+
+
+class SimilarityIndex:
+    """Related-document search over cosine similarity of TF-IDF signatures
+
+    Each document contributes its cached term counts. related() weights them
+    by inverse document frequency, keeps every document's SIGNATURE_TERMS
+    heaviest terms and scores candidates through posting lists truncated to
+    the MAX_POSTINGS heaviest documents per term, so the cost grows with the
+    number of documents rather than with its square.
+    """
+
+    def __init__(self, signature_terms=SIGNATURE_TERMS, max_postings=MAX_POSTINGS):
+        self.signature_terms = signature_terms
+        self.max_postings = max_postings
+        self.documents = {}
+
+    def __len__(self):
+        return len(self.documents)
+
+    def add(self, key, terms):
+        """Add or replace a document's term counts"""
+        self.documents[key] = terms
+
+    def signatures(self):
+        """Unit-length TF-IDF vectors of each document's heaviest terms"""
+        frequency = Counter(term for terms in self.documents.values() for term in terms)
+        total = len(self.documents)
+        idf = {term: math.log((1 + total) / (1 + df)) + 1 for term, df in frequency.items()}
+
+        signatures = {}
+        for key, terms in self.documents.items():
+            weights = heapq.nlargest(self.signature_terms,
+                                     (((1 + math.log(count)) * idf[term], term) for term, count in terms.items()))
+            norm = math.sqrt(sum(weight * weight for weight, _ in weights)) or 1.0
+            signatures[key] = {term: weight / norm for weight, term in weights}
+        return signatures
+
+    def related(self, k=5, min_score=0.1):
+        """Map every document to its k most similar others, best first"""
+        signatures = self.signatures()
+
+        postings = {}
+        for key, signature in signatures.items():
+            for term, weight in signature.items():
+                postings.setdefault(term, []).append((weight, key))
+        for term, entries in postings.items():
+            if len(entries) > self.max_postings:
+                postings[term] = heapq.nlargest(self.max_postings, entries)
+
+        related = {}
+        for key, signature in signatures.items():
+            scores = {}
+            for term, weight in signature.items():
+                for other_weight, other in postings[term]:
+                    scores[other] = scores.get(other, 0.0) + weight * other_weight
+            scores.pop(key, None)
+            best = heapq.nsmallest(k, ((-score, other) for other, score in scores.items() if score >= min_score))
+            related[key] = [other for _, other in best]
+        return related
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Snapshot Backups
+Incremental directory snapshots that hard-link files unchanged since the previous one
+"""
+
+import os
+import errno
+import shutil
+from pathlib import Path
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Not on POSIX; snapshots fall back to copies
+    fcntl = None
+
+# Snapshots kept in a backup directory; older ones are deleted after a new one is taken
+KEEP_SNAPSHOTS = 10
+
+SNAPSHOT_PREFIX = 'backup_'
+
+# Linux ioctl that makes dst share src's blocks on copy-on-write filesystems
+FICLONE = 0x40049409
+
+# Errors that mean a link or reflink is not possible here, rather than a failed copy
+UNSUPPORTED = {errno.EXDEV, errno.EPERM, errno.EMLINK, errno.EINVAL, errno.ENOTTY,
+               errno.EOPNOTSUPP, errno.ENOSYS, errno.EBADF}
+
+
+def snapshot_order(path):
+    """Sort key of a snapshot: its timestamp, then the count of earlier ones that second"""
+    stamp, _, count = path.name[len(SNAPSHOT_PREFIX):].partition('.')
+    return stamp, int(count) if count.isdigit() else 0
+
+
+def list_snapshots(backup_dir):
+    """Completed snapshots in backup_dir, oldest first"""
+    backup_dir = Path(backup_dir)
+    if not backup_dir.is_dir():
+        return []
+    return sorted((path for path in backup_dir.iterdir()
+                   if path.name.startswith(SNAPSHOT_PREFIX) and path.is_dir()), key=snapshot_order)
+
+
+def new_snapshot_path(backup_dir):
+    """Timestamped path for a new snapshot that sorts after every existing one"""
+    backup_dir = Path(backup_dir)
+    snapshots = list_snapshots(backup_dir)
+    name = SNAPSHOT_PREFIX + datetime.now().strftime("%Y%m%d_%H%M%S")
+    target = backup_dir / name
+    count = 1
+    # Snapshots taken within the same second are numbered
+    while target.exists() or (snapshots and snapshot_order(target) <= snapshot_order(snapshots[-1])):
+        target = backup_dir / f'{name}.{count}'
+        count += 1
+    return target
+
+
+def prune_snapshots(backup_dir, keep=KEEP_SNAPSHOTS):
+    """Delete all but the newest keep snapshots and return the deleted paths"""
+    snapshots = list_snapshots(backup_dir)
+    expired = snapshots[:max(len(snapshots) - keep, 0)]
+    for path in expired:
+        # Files hard-linked into newer snapshots survive through their other links
+        shutil.rmtree(path)
+    return expired
+
+
+class Snapshotter:
+    """Takes snapshots of a directory into timestamped siblings under backup_dir
+
+    A file whose size and modification time match the previous snapshot's
+    copy is hard-linked to it, like rsync --link-dest, so an unchanged tree
+    costs one directory entry per file. Other files are reflinked where the
+    filesystem supports copy-on-write and copied otherwise. Outputs are
+    replaced by rename rather than rewritten in place, so a linked copy is
+    never changed by a later run.
+
+    A snapshot is built under a hidden name and renamed into place when
+    complete, so an interrupted backup is never used as the previous one.
+    """
+
+    def __init__(self, backup_dir, keep=KEEP_SNAPSHOTS):
+        self.backup_dir = Path(backup_dir)
+        self.keep = keep
+        self.linked = 0
+        self.reflinked = 0
+        self.copied = 0
+        self.copied_bytes = 0
+        self.can_link = True
+        self.can_reflink = fcntl is not None
+
+    def snapshot(self, source):
+        """Snapshot source and prune old snapshots; returns the new snapshot's path"""
+        source = Path(source)
+        previous = list_snapshots(self.backup_dir)
+        previous = previous[-1] if previous else None
+        target = new_snapshot_path(self.backup_dir)
+
+        building = self.backup_dir / f'.{target.name}.partial'
+        if building.exists():
+            shutil.rmtree(building)
+        try:
+            # Symlinks are followed, as a plain copytree does
+            for directory, dirnames, filenames in os.walk(source, followlinks=True):
+                relative = Path(directory).relative_to(source)
+                (building / relative).mkdir(parents=True, exist_ok=True)
+                for filename in filenames:
+                    self.add(Path(directory) / filename, building / relative / filename,
+                             previous / relative / filename if previous is not None else None)
+                shutil.copystat(directory, building / relative)
+            os.rename(building, target)
+        except BaseException:
+            shutil.rmtree(building, ignore_errors=True)
+            raise
+
+        prune_snapshots(self.backup_dir, self.keep)
+        return target
+
+    def add(self, path, target, previous):
+        """Link path's unchanged previous copy to target, or reflink or copy path there"""
+        stat = os.stat(path)
+        if self.can_link and previous is not None:
+            try:
+                old = os.stat(previous)
+                if old.st_size == stat.st_size and old.st_mtime_ns == stat.st_mtime_ns:
+                    os.link(previous, target)
+                    self.linked += 1
+                    return
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                if e.errno not in UNSUPPORTED:
+                    raise
+                self.can_link = False
+
+        if self.can_reflink and self.reflink(path, target):
+            self.reflinked += 1
+        else:
+            shutil.copy2(path, target)
+            self.copied += 1
+            self.copied_bytes += stat.st_size
+
+    def reflink(self, path, target):
+        """Clone path's blocks into target; False if the filesystem cannot"""
+        with open(path, 'rb') as src, open(target, 'wb') as dst:
+            try:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            except OSError as e:
+                if e.errno not in UNSUPPORTED:
+                    raise
+                self.can_reflink = False
+                dst.close()
+                os.unlink(target)
+                return False
+        shutil.copystat(path, target)
+        return True
+
+    def summary(self):
+        """One-line account of how the last snapshot's files were stored"""
+        return (f"{self.linked} unchanged files linked, {self.reflinked} reflinked, "
+                f"{self.copied} copied ({self.copied_bytes / 1024:.0f} KB)")
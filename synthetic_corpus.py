@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Synthetic Corpus Generator
+Builds reproducible GitBook/HTTrack-style markdown mirrors for benchmarking
+"""
+
+import random
+import argparse
+from pathlib import Path
+
+# Mirror sections, shaped like the paths the categorizers look for
+SECTIONS = [
+    'before-you-begin',
+    'the-function-stack/functions/database-requests',
+    'the-function-stack/functions/apis-and-lambdas',
+    'the-function-stack/filters',
+    'the-database/database-basics',
+    'building-with-visual-development/apis',
+    'building-with-visual-development/custom-functions',
+    'xano-features/instance-settings',
+    'ai-tools',
+    'testing-and-debugging',
+    'troubleshooting-and-support/error-reference',
+    'examples'
+]
+
+TOPICS = [
+    'add record', 'edit record', 'query all records', 'get record', 'delete record',
+    'api endpoint', 'authentication', 'webhook', 'background task', 'expression',
+    'conditional', 'filter', 'middleware', 'file storage', 'realtime', 'lambda',
+    'custom function', 'database trigger', 'team permissions', 'rate limiting'
+]
+
+# Words for body text; mixes the terms every processor keys on
+VOCABULARY = (
+    'the a your this each when you can use to of and in for with by from '
+    'API endpoint database table query record function stack input variable '
+    'response request authentication auth token JWT OAuth webhook trigger event '
+    'filter expression conditional loop lambda cache transaction index schema '
+    'integration external n8n weweb frontend workflow automation CRUD JSON REST '
+    'performance optimization security validation transformation artificial '
+    'intelligence returns value field list object string integer boolean'
+).split()
+
+NAVIGATION = [
+    '[Ctrl] [K]',
+    '- [Welcome to Xano!](../index.html){.internal-link}',
+    '- [Before You Begin](../before-you-begin.html){.internal-link}',
+    '- [The Visual Builder](../the-visual-builder.html){.internal-link}',
+    '- [Frequently Asked Questions](../faq.html){.internal-link}',
+    '- [Security & Compliance](../security.html){.internal-link}',
+    '- [Feature Requests](../feature-requests.html){.internal-link}',
+    '- [Known Issues](../known-issues.html){.internal-link}',
+    'Xano Documentation'
+]
+
+CALLS_TO_ACTION = [
+    'Get Started for Free',
+    'Sign Up for a free account',
+    'Contact our Support team',
+    'Ask a Question in the community'
+]
+
+CODE_SAMPLES = [
+    ('javascript', 'const response = await fetch("https://x123.xano.io/api:v1/{name}", {{\n'
+                   '  method: "POST",\n  headers: {{ "Authorization": "Bearer " + token }}\n}});'),
+    ('json', '{{\n  "id": {n},\n  "name": "{name}",\n  "created_at": 1706000000000\n}}'),
+    ('bash', 'curl -X GET "https://x123.xano.io/api:v1/{name}" -H "accept: application/json"'),
+    ('python', 'import requests\nresponse = requests.get("https://x123.xano.io/api:v1/{name}")\nprint(response.json())'),
+    ('', 'return {name}.id > {n} ? "yes" : "no"')
+]
+
+
+def sentence(rng, words=12):
+    """A capitalized run of vocabulary words"""
+    text = ' '.join(rng.choice(VOCABULARY) for _ in range(words))
+    return text[0].upper() + text[1:] + '.'
+
+
+def paragraph(rng):
+    """Body text dressed with the inline markup of the real mirror"""
+    parts = [sentence(rng, rng.randint(6, 18)) for _ in range(rng.randint(2, 6))]
+    roll = rng.random()
+    if roll < 0.2:
+        parts.append(f'[{rng.choice(VOCABULARY)}](../{rng.choice(SECTIONS)}.html){{.internal-link}}')
+    elif roll < 0.35:
+        parts.append('[💡]{.font-emoji} ' + sentence(rng, 8))
+    elif roll < 0.5:
+        parts.append(f'<span class="hint" data-testid="hint-{rng.randint(1, 99)}">{sentence(rng, 6)}</span>')
+    elif roll < 0.6:
+        parts.append(f'<strong>{rng.choice(VOCABULARY)}</strong> <a href="https://docs.xano.com">docs</a>')
+    return ' '.join(parts)
+
+
+def image(rng, name):
+    """A responsive GitBook image with the attributes the cleaners strip"""
+    base = f'https://docs.xano.com/~gitbook/image?url={name}-{rng.randint(1, 9999)}.png'
+    return (f'<img src="{base}&width=768" srcset="{base}&width=400 400w, {base}&width=768 768w, '
+            f'{base}&width=1536 1536w" sizes="(max-width: 768px) 100vw, 768px" width="768" '
+            f'height="{rng.randint(200, 600)}" style="max-width:100%" data-testid="image" '
+            f'aria-label="{name}" alt="{name}">')
+
+
+def code_block(rng, name, n):
+    """A fenced code block, sometimes without a language hint"""
+    language, template = rng.choice(CODE_SAMPLES)
+    return f'```{language}\n{template.format(name=name, n=n)}\n```'
+
+
+def table(rng):
+    """A small HTML table as GitBook exports them"""
+    rows = ''.join(f'<tr><td>{rng.choice(VOCABULARY)}</td><td>{sentence(rng, 5)}</td></tr>'
+                   for _ in range(rng.randint(2, 5)))
+    return f'<table><thead><tr><th>Field</th><th>Description</th></tr></thead><tbody>{rows}</tbody></table>'
+
+
+def generate_document(rng, title, sections):
+    """Render one mirrored page with navigation chrome, fences and body sections"""
+    slug = title.lower().replace(' ', '_')
+    lines = ['::: {.page-wrapper tabindex="-1" role="main"}', '::: {.book-header role="navigation"}']
+    lines.extend(rng.sample(NAVIGATION, rng.randint(3, len(NAVIGATION))))
+    lines.extend([':::', '', '::: {.page-inner}', f'# {title}', '', f'{{#{slug} .heading-anchor}}', ''])
+
+    for i in range(sections):
+        lines.extend([f'## {rng.choice(TOPICS).title()} {i + 1}', '', ':::: {.content-block}', ''])
+        for _ in range(rng.randint(1, 4)):
+            lines.extend([paragraph(rng), ''])
+        roll = rng.random()
+        if roll < 0.35:
+            lines.extend([code_block(rng, slug, i), ''])
+        elif roll < 0.5:
+            lines.extend([image(rng, slug), ''])
+        elif roll < 0.6:
+            lines.extend([table(rng), ''])
+        elif roll < 0.7:
+            lines.extend([f'- `{rng.choice(VOCABULARY)}` {sentence(rng, 6)}' for _ in range(rng.randint(2, 5))])
+            lines.append('')
+        lines.extend(['::::', ''])
+        if rng.random() < 0.1:
+            lines.extend([rng.choice(CALLS_TO_ACTION), '', '', ''])
+
+    lines.extend([':::', '', rng.choice(CALLS_TO_ACTION), '', '[Previous](../index.html){.previous}', ':::', ''])
+    return '\n'.join(lines)
+
+
+def generate_corpus(output_dir, files, seed=0, min_sections=2, max_sections=16):
+    """Write the given number of synthetic pages under output_dir and return their total bytes"""
+    rng = random.Random(seed)
+    output_dir = Path(output_dir)
+    total = 0
+    for n in range(files):
+        topic = rng.choice(TOPICS)
+        title = f'{topic.title()} {n}'
+        # Keep directories to a thousand pages, as the larger mirror sections are
+        section = Path(rng.choice(SECTIONS)) / f'part-{n // 1000:03d}'
+        path = output_dir / section / (topic.replace(' ', '-') + f'-{n}.md')
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = generate_document(rng, title, rng.randint(min_sections, max_sections)).encode('utf-8')
+        path.write_bytes(data)
+        total += len(data)
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic Xano documentation mirror")
+    parser.add_argument('output_dir', help="Directory to write the markdown files into")
+    parser.add_argument('--files', type=int, default=1000, help="Number of pages to generate")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed; equal seeds give identical corpora")
+    args = parser.parse_args()
+
+    size = generate_corpus(args.output_dir, args.files, args.seed)
+    print(f"Wrote {args.files} files ({size / (1024 * 1024):.1f} MB) to {args.output_dir}")
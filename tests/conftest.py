@@ -0,0 +1,22 @@
+"""Shared fixtures; the scripts under test live at the repository root"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from synthetic_corpus import generate_corpus
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    """A small synthetic mirror in which every tenth page is not valid UTF-8"""
+    input_dir = tmp_path / 'mirror'
+    generate_corpus(input_dir, 110, seed=1)
+    for path in sorted(input_dir.rglob('*.md'))[::10]:
+        with open(path, 'ab') as f:
+            f.write(b'\nLatin-1 text from an old export: caf\xe9.\n')
+    return input_dir
@@ -0,0 +1,74 @@
+from code_examples import (ExampleStore, load_examples, extract_examples, detect_language,
+                           normalize_language, snippet_hash)
+from markdown_blocks import tokenize
+
+PAGE = '''# Queries
+
+```sql
+SELECT * FROM users WHERE id = 1;
+```
+
+## Script
+
+```
+import requests
+def fetch():
+    return requests.get(url)
+```
+
+```
+
+```
+'''
+
+UNLABELLED_COPY = '''# Copy
+
+```
+SELECT * FROM users WHERE id = 1;
+```
+'''
+
+
+def test_extract_examples():
+    examples = extract_examples(tokenize(PAGE))
+    assert [(e['language'], e['declared'], e['line'], e['heading']) for e in examples] == [
+        ('sql', True, 3, 'Queries'), ('python', False, 9, 'Script')]
+    assert examples[0]['score'] is None and examples[1]['score'] > 0
+    assert snippet_hash('  x = 1\n') == snippet_hash('x = 1')
+
+
+def test_language_labels():
+    assert normalize_language('JS') == 'javascript'
+    assert normalize_language('') is None
+    assert detect_language('hello there') == (None, 0)
+    assert detect_language('{"id": 1, "name": "Ada"}')[0] == 'json'
+
+
+def test_store_streams_and_merges_repeats(tmp_path):
+    path = tmp_path / 'code_examples.jsonl'
+    store = ExampleStore(path)
+    store.add(extract_examples(tokenize(UNLABELLED_COPY)), 'copy.md', 'Copy', ['database'])
+    store.add(extract_examples(tokenize(PAGE)), 'queries.md', 'Queries', ['database', 'api'])
+    store.add(extract_examples(tokenize(PAGE)), 'again.md', 'Again', [])
+    assert not path.exists()
+    store.close()
+
+    records = list(load_examples(path))
+    assert len(records) == len(store) == 2
+    sql, python = records
+    assert sql['language'] == 'sql' and sql['declared'] and sql['score'] is None
+    assert [source['path'] for source in sql['sources']] == ['copy.md', 'queries.md', 'again.md']
+    assert sql['topics'] == ['database', 'api']
+    assert [source['path'] for source in python['sources']] == ['queries.md', 'again.md']
+    assert store.blocks == 5
+    assert store.languages == {'sql': 1, 'python': 1}
+    assert store.topics == {'database': 2, 'api': 2}
+    assert '2 distinct examples from 5 code blocks' in store.summary()
+
+
+def test_store_without_path_only_counts(tmp_path):
+    store = ExampleStore()
+    store.add(extract_examples(tokenize(PAGE)), 'queries.md', 'Queries', [])
+    store.close()
+    assert len(store) == 2
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,77 @@
+import random
+
+import pytest
+
+from dedup import simhash, DuplicateIndex, MAX_DISTANCE, FINGERPRINT_BITS
+
+
+def flip(fingerprint, bits):
+    for bit in bits:
+        fingerprint ^= 1 << bit
+    return fingerprint
+
+
+def test_simhash_is_deterministic_and_fits():
+    text = 'add a record to the users table with the add record function'
+    assert simhash(text) == simhash(text)
+    assert 0 <= simhash(text) < 1 << FINGERPRINT_BITS
+    assert simhash('') == simhash('')
+
+
+def test_small_edits_stay_close_and_other_text_does_not():
+    rng = random.Random(0)
+    vocabulary = [f'word{n}' for n in range(500)]
+    words = [rng.choice(vocabulary) for _ in range(400)]
+    original = ' '.join(words)
+    edited = ' '.join(words[:200] + ['changed'] + words[201:])
+    unrelated = ' '.join(rng.choice(vocabulary) for _ in range(400))
+    assert (simhash(original) ^ simhash(edited)).bit_count() <= MAX_DISTANCE
+    assert (simhash(original) ^ simhash(unrelated)).bit_count() > MAX_DISTANCE
+
+
+@pytest.mark.parametrize('distance', range(MAX_DISTANCE + 1))
+def test_find_within_max_distance(distance):
+    base = random.Random(distance).getrandbits(FINGERPRINT_BITS)
+    index = DuplicateIndex()
+    index.add('kept.md', base)
+    # Spread the flipped bits over different blocks as well as within one
+    assert index.find(flip(base, range(distance))) == 'kept.md'
+    assert index.find(flip(base, range(0, FINGERPRINT_BITS, FINGERPRINT_BITS // 4)[:distance])) == 'kept.md'
+
+
+def test_nothing_found_past_max_distance():
+    base = random.Random(1).getrandbits(FINGERPRINT_BITS)
+    index = DuplicateIndex()
+    index.add('kept.md', base)
+    assert index.find(flip(base, range(MAX_DISTANCE + 1))) is None
+    assert index.find(flip(base, range(0, FINGERPRINT_BITS, 8))) is None
+
+
+def test_find_returns_the_closest():
+    base = random.Random(2).getrandbits(FINGERPRINT_BITS)
+    index = DuplicateIndex()
+    index.add('far.md', flip(base, [1, 20, 40]))
+    index.add('near.md', flip(base, [60]))
+    assert index.find(base) == 'near.md'
+
+
+def test_custom_max_distance():
+    base = random.Random(3).getrandbits(FINGERPRINT_BITS)
+    index = DuplicateIndex(max_distance=0)
+    index.add('kept.md', base)
+    assert index.find(base) == 'kept.md'
+    assert index.find(flip(base, [5])) is None
+
+
+def test_add_replaces_and_remove_forgets():
+    base = random.Random(4).getrandbits(FINGERPRINT_BITS)
+    other = flip(base, range(0, FINGERPRINT_BITS, 2))
+    index = DuplicateIndex()
+    index.add('page.md', base)
+    index.add('page.md', other)
+    assert index.find(base) is None
+    assert index.find(other) == 'page.md'
+    index.remove('page.md')
+    index.remove('missing.md')
+    assert index.find(other) is None
+    assert all(not keys for table in index.tables for keys in table.values())
@@ -0,0 +1,46 @@
+import pytest
+import yaml
+
+from frontmatter_codec import dump_frontmatter, load_frontmatter
+
+FRONTMATTER = [
+    {'title': 'Add Record', 'category': 'database', 'tags': ['database', 'api'], 'code_examples': 3},
+    {'title': 'Query: all records', 'description': "It's a #1 pick", 'tags': []},
+    {'title': 'yes', 'category': 'null', 'difficulty': 'true', 'version': '1.0', 'count': '42'},
+    {'title': '  padded  ', 'empty': '', 'none': None, 'flag': False, 'negative': -7},
+    {'title': '- dash', 'quote': '"quoted"', 'brace': '{x}', 'star': '*alias', 'at': '@user'},
+    {'title': 'Café crème', 'tags': ['naïve', 'über'], 'emoji': 'Rocket \U0001F680'},
+    {'title': 'Line one\nline two', 'tab': 'a\tb', 'colon': 'ends with:'},
+    {'description': ' '.join(['Long words that fold past the emitter width'] * 6)},
+    {'related_docs': ['a.md', 'b/c.md'], 'nested': {'key': 'value'}, 'float': 1.5},
+    {'title': '0x1F', 'octal': '0o17', 'date': '2024-01-01', 'tilde': '~'},
+]
+
+
+@pytest.mark.parametrize('frontmatter', FRONTMATTER)
+@pytest.mark.parametrize('allow_unicode', [False, True])
+def test_dump_matches_yaml(frontmatter, allow_unicode):
+    assert dump_frontmatter(frontmatter, allow_unicode) == yaml.dump(
+        frontmatter, default_flow_style=False, allow_unicode=allow_unicode)
+
+
+@pytest.mark.parametrize('frontmatter', FRONTMATTER)
+@pytest.mark.parametrize('allow_unicode', [False, True])
+def test_round_trip_matches_safe_load(frontmatter, allow_unicode):
+    text = dump_frontmatter(frontmatter, allow_unicode)
+    assert load_frontmatter(text) == yaml.safe_load(text) == frontmatter
+
+
+@pytest.mark.parametrize('text', [
+    'title: Plain\ntags:\n- a\n- b\n',
+    'title: "double quoted"\n',
+    "title: 'it''s'\n",
+    'title: yes\ncount: 012\n',
+    'title: one\ntitle: two\n',
+    'title: [a, b]\n',
+    'title: |\n  block\n',
+    'key: value # comment\n',
+    '',
+])
+def test_hand_written_text_matches_safe_load(text):
+    assert load_frontmatter(text) == yaml.safe_load(text)
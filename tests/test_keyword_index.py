@@ -0,0 +1,49 @@
+import random
+
+from keyword_index import KeywordIndex
+
+KEYWORDS = ['api', 'api key', 'apis', 'auth', 'authentication', 'key', 'aaa', 'aa']
+
+
+def count(text, keyword):
+    """Overlapping occurrences, as str.find steps through them"""
+    return sum(1 for i in range(len(text)) if text.startswith(keyword, i))
+
+
+def test_counts_match_overlapping_search():
+    index = KeywordIndex(KEYWORDS)
+    rng = random.Random(0)
+    fragments = ['api', ' key', 's', 'auth', 'entication', 'a', ' ', 'x']
+    for _ in range(300):
+        text = ''.join(rng.choice(fragments) for _ in range(rng.randint(0, 15)))
+        hits = index.scan(text)
+        for keyword in KEYWORDS:
+            assert hits.count(keyword) == count(text, keyword), (text, keyword)
+
+
+def test_positions_with_and_without_scan():
+    index = KeywordIndex(KEYWORDS)
+    text = 'apis use an api key; authentication uses auth. aaaa'
+    scanned = index.scan(text, positions=True)
+    counted = index.scan(text)
+    for keyword in KEYWORDS:
+        expected = [i for i in range(len(text)) if text.startswith(keyword, i)]
+        assert scanned.positions(keyword) == expected
+        assert counted.positions(keyword) == expected
+        assert scanned.count(keyword) == counted.count(keyword) == len(expected)
+
+
+def test_membership_and_any():
+    hits = KeywordIndex(KEYWORDS).scan('set your api key')
+    assert 'api key' in hits and 'api' in hits and 'key' in hits
+    assert 'auth' not in hits
+    assert hits.any(['auth', 'key'])
+    assert not hits.any(['auth', 'apis'])
+
+
+def test_keywords_with_regex_characters():
+    index = KeywordIndex(['c++', 'a.b', '(x)'])
+    hits = index.scan('c++ and a.b but not axb (x)')
+    assert hits.count('c++') == 1
+    assert hits.count('a.b') == 1
+    assert hits.count('(x)') == 1
@@ -0,0 +1,122 @@
+import os
+
+import pytest
+
+from link_check import LinkChecker, parse_links, heading_anchor
+
+PAGES = {
+    'README.md': (
+        '# Docs\n'
+        '\n'
+        'Start with [the guide](guides/setup.md) and [its steps](guides/setup.md#first-steps).\n'
+        'See [the API](api/) and [the site](https://docs.xano.com/).\n'
+        '[Missing](guides/nowhere.md)\n'
+        '[Bad anchor](guides/setup.md#no-such-heading)\n'
+        '[Outside](../elsewhere.md)\n'
+        '\n'
+        '```\n'
+        '[Not a link](ignored.md)\n'
+        '```\n'
+        'Inline `[code](ignored.md)` is skipped too.\n'
+        '\n'
+        '[ref]: guides/setup.md#repeat-1\n'
+    ),
+    'guides/setup.md': (
+        '# Setup\n'
+        '\n'
+        '## First Steps\n'
+        '\n'
+        '## Repeat\n'
+        '\n'
+        '## Repeat\n'
+        '\n'
+        '<a name="custom"></a>\n'
+        'Back to [the top](../README.md#docs), [here](#custom) and [nowhere](#absent).\n'
+        '<img src="images/missing.png">\n'
+        '[Root link](/api/reference.md)\n'
+    ),
+    'api/reference.md': (
+        '# Reference\n'
+        '\n'
+        '[Encoded](../guides/set%75p.md#first-steps)\n'
+        '[Query](../guides/setup.md?x=1#first-steps)\n'
+    ),
+}
+
+
+@pytest.fixture
+def tree(tmp_path):
+    for page, text in PAGES.items():
+        path = tmp_path / page
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+    return tmp_path
+
+
+def test_heading_anchors():
+    assert heading_anchor('First Steps') == 'first-steps'
+    assert heading_anchor('Use [links](a.md) and <b>tags</b>!') == 'use-links-and-tags'
+    parsed = parse_links('# A\n\n# A\n\n```\n# Not a heading\n```\n# A\n')
+    assert parsed['anchors'] == ['a', 'a-1', 'a-2']
+
+
+def test_broken_links(tree):
+    checker = LinkChecker(tree)
+    checker.load()
+    assert checker.check() == [
+        {'file': 'README.md', 'line': 5, 'target': 'guides/nowhere.md', 'problem': 'missing file'},
+        {'file': 'README.md', 'line': 6, 'target': 'guides/setup.md#no-such-heading', 'problem': 'missing anchor'},
+        {'file': 'README.md', 'line': 7, 'target': '../elsewhere.md', 'problem': 'outside the repository'},
+        {'file': 'guides/setup.md', 'line': 10, 'target': '#absent', 'problem': 'missing anchor'},
+        {'file': 'guides/setup.md', 'line': 11, 'target': 'images/missing.png', 'problem': 'missing file'},
+    ]
+    assert checker.external == 1
+    assert checker.link_count() == 15
+
+
+def test_link_graph(tree):
+    checker = LinkChecker(tree)
+    checker.load()
+    checker.check()
+    assert checker.link_graph() == {
+        'README.md': {'links': ['api', 'guides/setup.md'], 'backlinks': ['guides/setup.md']},
+        'api/reference.md': {'links': ['guides/setup.md'], 'backlinks': ['guides/setup.md']},
+        'guides/setup.md': {'links': ['README.md', 'api/reference.md'],
+                            'backlinks': ['README.md', 'api/reference.md']},
+    }
+
+
+def test_ignore_patterns(tree):
+    checker = LinkChecker(tree, ignore=[r'nowhere', r'\.png$'])
+    checker.load()
+    assert [link['target'] for link in checker.check()] == [
+        'guides/setup.md#no-such-heading', '../elsewhere.md', '#absent']
+
+
+def test_cached_parses_give_the_same_results(tree):
+    first = LinkChecker(tree)
+    first.load()
+    expected = first.check()
+    assert first.parsed == len(PAGES)
+
+    second = LinkChecker(tree)
+    second.load()
+    assert second.parsed == 0
+    assert second.check() == expected
+
+    # A deleted target is caught without reparsing the page linking to it
+    os.remove(tree / 'api' / 'reference.md')
+    third = LinkChecker(tree)
+    third.load()
+    assert third.parsed == 0
+    assert {'file': 'guides/setup.md', 'line': 12, 'target': '/api/reference.md',
+            'problem': 'missing file'} in third.check()
+
+
+def test_parallel_load_matches_serial(tree):
+    serial = LinkChecker(tree, cache=False)
+    serial.load()
+    parallel = LinkChecker(tree, cache=False)
+    parallel.load(workers=2)
+    assert parallel.pages == serial.pages
+    assert parallel.check() == serial.check()
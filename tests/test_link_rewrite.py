@@ -0,0 +1,53 @@
+import pytest
+
+from link_rewrite import LinkRewriter
+
+
+@pytest.fixture
+def rewriter(tmp_path):
+    mirror = tmp_path / 'mirror'
+    kb = tmp_path / 'kb'
+    mapping = {
+        mirror / 'index.md': kb / 'README.md',
+        mirror / 'the-database' / 'add-record.md': kb / '03-data-operations' / 'add_record.md',
+        mirror / 'the-database' / 'index.md': kb / '03-data-operations' / 'database_overview.md',
+        mirror / 'ai-tools' / 'agents.md': kb / '05-advanced-features' / 'ai agents.md',
+    }
+    return LinkRewriter(mirror, mapping), mirror, kb
+
+
+def rewrite(rewriter, page, output, body):
+    rewriter, mirror, kb = rewriter
+    return rewriter.rewrite(mirror / page, kb / output, body)
+
+
+def test_mirror_links_point_at_outputs(rewriter):
+    body = ('See [Add](add-record.html#steps), [the overview](./), [AI](../ai-tools/agents.html) '
+            'and [home](../index.html).\n')
+    assert rewrite(rewriter, 'the-database/edit-record.md', '03-data-operations/edit_record.md', body) == (
+        'See [Add](add_record.md#steps), [the overview](database_overview.md), '
+        '[AI](../05-advanced-features/ai%20agents.md) and [home](../README.md).\n')
+    assert rewriter[0].rewritten == 4
+
+
+def test_live_site_and_reference_links(rewriter):
+    body = ('[Live](https://docs.xano.com/the-database/add-record)\n'
+            '[Root](https://docs.xano.com)\n'
+            '[agents]: /ai-tools/agents.html\n')
+    assert rewrite(rewriter, 'index.md', 'README.md', body) == (
+        '[Live](03-data-operations/add_record.md)\n'
+        '[Root](README.md)\n'
+        '[agents]: 05-advanced-features/ai%20agents.md\n')
+
+
+def test_unknown_external_and_code_links_are_left_alone(rewriter):
+    body = ('[Gone](missing.html) [Site](https://example.com/a.html) [Plain](notes.txt) [Anchor](#top)\n'
+            '```\n[Code](add-record.html)\n```\n')
+    assert rewrite(rewriter, 'the-database/edit-record.md', '03-data-operations/edit_record.md', body) == body
+    assert rewriter[0].rewritten == 0
+
+
+def test_rewriting_twice_changes_nothing(rewriter):
+    body = 'See [Add](add-record.html) and [AI](../ai-tools/agents.html).\n'
+    once = rewrite(rewriter, 'the-database/edit-record.md', '03-data-operations/edit_record.md', body)
+    assert rewrite(rewriter, 'the-database/edit-record.md', '03-data-operations/edit_record.md', once) == once
@@ -0,0 +1,64 @@
+import os
+
+from manifest import BuildManifest
+
+
+def source(path):
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': 'h1'}
+
+
+def test_unchanged_inputs_are_found_by_size_and_mtime(tmp_path):
+    page = tmp_path / 'page.md'
+    page.write_text('# Page\n')
+    output = tmp_path / 'out.md'
+    output.write_text('rendered')
+    manifest = BuildManifest(tmp_path / 'manifest.json', '1', 'rules')
+    manifest.update(page, source(page), {'output': str(output)})
+    manifest.save()
+
+    loaded = BuildManifest(tmp_path / 'manifest.json', '1', 'rules')
+    assert loaded.lookup(page, os.stat(page))['result'] == {'output': str(output)}
+
+    os.utime(page, ns=(0, 0))
+    assert loaded.lookup(page, os.stat(page)) is None
+    # A touched file with the same content still counts as unchanged
+    assert loaded.lookup(page, os.stat(page), 'h1') is not None
+    assert loaded.lookup(page, os.stat(page), 'h2') is None
+
+
+def test_missing_outputs_are_rebuilt(tmp_path):
+    page = tmp_path / 'page.md'
+    page.write_text('# Page\n')
+    manifest = BuildManifest(tmp_path / 'manifest.json', '1', 'rules')
+    manifest.update(page, source(page), {'output': str(tmp_path / 'gone.md')})
+    assert manifest.lookup(page, os.stat(page)) is None
+
+    manifest.update(page, source(page), {'output': str(tmp_path / 'gone.md'), 'duplicate_of': 'other.md'})
+    assert manifest.lookup(page, os.stat(page)) is not None
+    manifest.update(page, source(page), None)
+    assert manifest.lookup(page, os.stat(page)) is not None
+
+
+def test_other_versions_and_rules_start_empty(tmp_path):
+    page = tmp_path / 'page.md'
+    page.write_text('# Page\n')
+    manifest = BuildManifest(tmp_path / 'manifest.json', '1', 'rules')
+    manifest.update(page, source(page), None)
+    manifest.save()
+
+    assert BuildManifest(tmp_path / 'manifest.json', '1', 'rules').files
+    assert not BuildManifest(tmp_path / 'manifest.json', '2', 'rules').files
+    assert not BuildManifest(tmp_path / 'manifest.json', '1', 'other').files
+    assert not BuildManifest(tmp_path / 'manifest.json', '1', 'rules', load=False).files
+
+
+def test_prune_and_unreadable_manifests(tmp_path):
+    manifest = BuildManifest(tmp_path / 'manifest.json', '1', 'rules')
+    for name in ('a.md', 'b.md'):
+        manifest.update(name, {'size': 1, 'mtime_ns': 1, 'hash': name}, None)
+    manifest.prune(['b.md'])
+    assert list(manifest.files) == ['b.md']
+
+    (tmp_path / 'broken.json').write_text('{not json')
+    assert BuildManifest(tmp_path / 'broken.json', '1', 'rules').files == {}
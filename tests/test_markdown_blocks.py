@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from markdown_blocks import tokenize, render, splice
+from synthetic_corpus import generate_document
+
+SAMPLES = [
+    '',
+    '\n',
+    '# Title\n\nText\n',
+    'Intro\n```python\nprint("# not a heading")\n```\nAfter',
+    '- one\n- two\n  continued\n1. three\n> quote\n> more\n\nend',
+    '```\nnever closed\n# still code',
+    '   ```js\nindented fence\n   ```\n',
+    '\n\n\n# A\n\n\n',
+]
+
+
+@pytest.mark.parametrize('text', SAMPLES)
+def test_render_inverts_tokenize(text):
+    assert render(tokenize(text)) == text
+
+
+def test_render_inverts_tokenize_on_generated_pages():
+    rng = random.Random(0)
+    for n in range(30):
+        text = generate_document(rng, f'Page {n}', rng.randint(2, 10))
+        assert render(tokenize(text)) == text
+
+
+def test_block_kinds():
+    blocks = tokenize(SAMPLES[3])
+    assert [block.kind for block in blocks] == ['paragraph', 'code', 'paragraph']
+    assert blocks[1].text == '```python\nprint("# not a heading")\n```'
+    kinds = [block.kind for block in tokenize(SAMPLES[4])]
+    assert kinds == ['list', 'paragraph', 'list', 'quote', 'paragraph']
+
+
+def test_unclosed_fence_runs_to_the_end():
+    blocks = tokenize(SAMPLES[5])
+    assert len(blocks) == 1
+    assert blocks[0].kind == 'code' and not blocks[0].closed
+
+
+def test_masked_code_keeps_offsets_and_lines():
+    text = SAMPLES[3]
+    masked = render(tokenize(text), mask_code=True)
+    assert len(masked) == len(text)
+    assert masked.count('\n') == text.count('\n')
+    assert '#' not in masked
+    assert masked.startswith('Intro\n') and masked.endswith('\nAfter')
+
+
+def test_splice_edits_inside_a_block():
+    text = '# Title\n\nSome text\n'
+    blocks = tokenize(text)
+    start = text.index('Some')
+    splice(blocks, start, start + 4, 'Other')
+    assert render(blocks) == '# Title\n\nOther text\n'
+    with pytest.raises(ValueError):
+        splice(blocks, 1000, 1001, '')
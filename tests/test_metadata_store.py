@@ -0,0 +1,113 @@
+import pytest
+
+from metadata_store import MetadataStore, KEEP_RUNS
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = MetadataStore(tmp_path / 'metadata.db', batch_size=None)
+    yield store
+    store.close()
+
+
+def reopen(store):
+    store.close()
+    return MetadataStore(store.path)
+
+
+def test_documents_and_errors_keep_input_order(store):
+    store.start_run()
+    store.add_document('a.md', 'out/a.md', 'A', 'database', tags=['api', 'database'], size=10)
+    store.add_error('b.md', 'bad bytes')
+    store.add_document('c.md', 'out/c.md', 'C', 'api', tags=['api'], size=20)
+    store.add_document('d.md', duplicate_of='a.md')
+    assert [entry['file'] for entry in store.log_entries()] == ['a.md', 'b.md', 'c.md', 'd.md']
+    assert store.errors() == [{'file': 'b.md', 'error': 'bad bytes', 'status': 'error'}]
+    assert store.document_count() == 2
+    assert store.tag_counts() == {'api': 2, 'database': 1}
+    assert store.category_counts() == {'database': 1, 'api': 1}
+    assert store.aliases() == {'a.md': ['d.md']}
+
+
+def test_nothing_is_persisted_before_a_flush(store):
+    store.start_run()
+    store.add_document('a.md', 'out/a.md', 'A')
+    store.add_error('b.md', 'bad bytes')
+    other = MetadataStore(store.path)
+    assert other.completed_inputs() == {}
+
+    store.flush()
+    assert other.completed_inputs() == {'a.md': ('out/a.md', 'A'), 'b.md': (None, None)}
+    other.close()
+
+
+def test_batches_flush_on_their_own(tmp_path):
+    store = MetadataStore(tmp_path / 'metadata.db', batch_size=2)
+    store.start_run()
+    store.add_document('a.md', 'out/a.md', 'A')
+    store.add_error('b.md', 'bad bytes')
+    other = MetadataStore(store.path)
+    assert set(other.completed_inputs()) == {'a.md', 'b.md'}
+    other.close()
+    store.close()
+
+
+def test_resume_continues_numbering(store):
+    store.start_run()
+    store.add_document('a.md', 'out/a.md', 'A')
+    store.add_error('b.md', 'bad bytes')
+    store.flush()
+    # Rows buffered after the last flush are lost with the crashed process
+    store.add_document('c.md', 'out/c.md', 'C')
+    store.pending = {table: [] for table in store.pending}
+    store.pending_count = 0
+    store.connection.close()
+
+    resumed = MetadataStore(store.path, batch_size=None)
+    assert resumed.resume_run() == 1
+    assert resumed.completed_inputs() == {'a.md': ('out/a.md', 'A'), 'b.md': (None, None)}
+    resumed.add_document('c.md', 'out/c.md', 'C')
+    resumed.finish_run()
+    assert [(entry['file'], entry['status']) for entry in resumed.log_entries()] == [
+        ('a.md', 'success'), ('b.md', 'error'), ('c.md', 'success')]
+    assert resumed.run_info()[2] is not None
+    assert resumed.resume_run() is None
+    resumed.close()
+
+
+def test_remove_output_and_input(store):
+    store.start_run()
+    store.add_document('a.md', 'out/a.md', 'A', tags=['api'])
+    store.add_document('b.md', 'out/b.md', 'B', tags=['api'])
+    store.add_error('b.md', 'write failed', 'write')
+    store.remove_output('out/a.md')
+    assert [entry['file'] for entry in store.log_entries()] == ['b.md', 'b.md']
+    assert store.tag_counts() == {'api': 1}
+    store.remove_input('b.md')
+    assert list(store.log_entries()) == []
+
+
+def test_old_runs_are_dropped_and_reports_read_the_latest(store):
+    for n in range(KEEP_RUNS + 2):
+        store.start_run(number=n)
+        store.add_document(f'{n}.md', f'out/{n}.md', str(n))
+        store.finish_run()
+    reader = reopen(store)
+    assert reader.run_info()[0] == {'number': KEEP_RUNS + 1}
+    assert reader.connection.execute("SELECT COUNT(*) FROM runs").fetchone()[0] == KEEP_RUNS
+    assert reader.completed_inputs() == {f'{KEEP_RUNS + 1}.md': (f'out/{KEEP_RUNS + 1}.md', str(KEEP_RUNS + 1))}
+    reader.close()
+
+
+def test_metadata_summary(store):
+    store.start_run(processing_date='2024-01-01')
+    store.add_document('a.md', 'out/a.md', 'A', 'database', 'beginner', tags=['api'], code_count=3)
+    store.add_cross_reference('out/a.md', ['out/b.md'])
+    store.finish_run()
+    metadata = store.metadata()
+    assert metadata['total_files'] == 1
+    assert metadata['categories'] == {'database': ['A']}
+    assert metadata['difficulty_distribution'] == {'beginner': 1}
+    assert metadata['code_examples_count'] == 3
+    assert metadata['cross_references'] == [{'file': 'out/a.md', 'related_docs': ['out/b.md']}]
+    assert metadata['processing_date'] == '2024-01-01'
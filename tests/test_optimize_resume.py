@@ -0,0 +1,78 @@
+import pytest
+
+from optimize_docs import XanoDocOptimizer, CHECKPOINT_INTERVAL, METADATA_STORE_NAME
+
+
+class Crash(Exception):
+    pass
+
+
+def read_outputs(output_dir):
+    return {path.relative_to(output_dir).as_posix(): path.read_bytes()
+            for path in sorted(output_dir.rglob('*.md'))}
+
+
+def log(optimizer):
+    """The run's log entries with output paths made relative to the output directory"""
+    entries = []
+    for entry in optimizer.store.log_entries():
+        if entry.get('output') is not None:
+            entry['output'] = str(entry['output']).replace(str(optimizer.output_dir), '<out>')
+        entries.append(entry)
+    return entries
+
+
+def run(corpus, output_dir, crash_at=None, workers=1):
+    """Optimize corpus, optionally crashing before recording file crash_at and resuming"""
+    optimizer = XanoDocOptimizer(corpus, output_dir, output_dir.parent / 'backups')
+    if crash_at is not None:
+        recorded = 0
+        record_result = optimizer.record_result
+
+        def crashing(result):
+            nonlocal recorded
+            recorded += 1
+            if recorded == crash_at:
+                raise Crash
+            return record_result(result)
+
+        optimizer.record_result = crashing
+        with pytest.raises(Crash):
+            optimizer.process_all_files(workers=workers)
+        optimizer.writer.close()
+        optimizer.store.connection.close()
+
+        optimizer = XanoDocOptimizer(corpus, output_dir, output_dir.parent / 'backups')
+        optimizer.process_all_files(workers=workers, resume=True)
+    else:
+        optimizer.process_all_files(workers=workers)
+    entries = log(optimizer)
+    optimizer.store.close()
+    return entries, read_outputs(output_dir)
+
+
+@pytest.fixture
+def uninterrupted(corpus, tmp_path):
+    return run(corpus, tmp_path / 'uninterrupted')
+
+
+@pytest.mark.parametrize('crash_at', [1, CHECKPOINT_INTERVAL, CHECKPOINT_INTERVAL + 23, 2 * CHECKPOINT_INTERVAL + 1])
+def test_resumed_run_matches_uninterrupted_run(corpus, tmp_path, uninterrupted, crash_at):
+    entries, outputs = uninterrupted
+    assert any(entry['status'] == 'error' for entry in entries)
+    assert run(corpus, tmp_path / 'resumed', crash_at) == (entries, outputs)
+
+
+def test_parallel_resumed_run_matches_uninterrupted_run(corpus, tmp_path, uninterrupted):
+    assert run(corpus, tmp_path / 'resumed', CHECKPOINT_INTERVAL + 7, workers=2) == uninterrupted
+
+
+def test_resume_after_a_finished_run_starts_over(corpus, tmp_path, uninterrupted):
+    output_dir = tmp_path / 'finished'
+    run(corpus, output_dir)
+    optimizer = XanoDocOptimizer(corpus, output_dir, tmp_path / 'backups')
+    optimizer.process_all_files(resume=True)
+    assert log(optimizer) == uninterrupted[0]
+    assert optimizer.store.run_id() == 2
+    optimizer.store.close()
+    assert (output_dir / METADATA_STORE_NAME).exists()
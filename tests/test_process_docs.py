@@ -0,0 +1,45 @@
+import json
+
+from process_xano_docs import XanoDocProcessor, METADATA_STORE_NAME
+from metadata_store import MetadataStore
+
+
+def read_outputs(output_dir):
+    """Rendered pages, without the index files that carry the processing date"""
+    return {path.relative_to(output_dir).as_posix(): path.read_bytes()
+            for path in sorted(output_dir.rglob('*.md')) if path.name != 'README.md'}
+
+
+def run(corpus, output_dir, **options):
+    processor = XanoDocProcessor(corpus, output_dir)
+    processor.process_all(**options)
+    return processor
+
+
+def test_parallel_run_matches_serial_run(corpus, tmp_path):
+    run(corpus, tmp_path / 'serial')
+    run(corpus, tmp_path / 'parallel', workers=2)
+    serial = read_outputs(tmp_path / 'serial')
+    assert len(serial) > 90
+    assert read_outputs(tmp_path / 'parallel') == serial
+
+    serial_store = MetadataStore(tmp_path / 'serial' / METADATA_STORE_NAME)
+    parallel_store = MetadataStore(tmp_path / 'parallel' / METADATA_STORE_NAME)
+    assert len(serial_store.errors()) == 11
+    assert parallel_store.errors() == serial_store.errors()
+    serial_store.close()
+    parallel_store.close()
+
+
+def test_incremental_run_reuses_unchanged_inputs(corpus, tmp_path):
+    output_dir = tmp_path / 'kb'
+    run(corpus, output_dir)
+    outputs = read_outputs(output_dir)
+
+    # Only the pages that failed are analyzed again, and only README.md changes
+    second = run(corpus, output_dir)
+    assert second.cached_count == 99
+    assert second.writer.written == 1
+    assert read_outputs(output_dir) == outputs
+    metadata = json.loads((output_dir / 'metadata.json').read_text())
+    assert metadata['total_files'] == len(outputs)
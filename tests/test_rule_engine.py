@@ -0,0 +1,71 @@
+import random
+import re
+
+import pytest
+
+from benchmark import merge_mismatches, MERGE_ADVERSARIAL
+from rule_engine import RuleEngine
+from rules import RULES
+from synthetic_corpus import generate_document
+
+
+def documents(count=20, seed=0):
+    rng = random.Random(seed)
+    return [generate_document(rng, f'Page {n}', rng.randint(2, 8)) for n in range(count)]
+
+
+@pytest.mark.parametrize('name', sorted(RULES.tables))
+def test_merged_passes_match_sequential_rules(name):
+    assert merge_mismatches(name, documents(), generated=500) == []
+
+
+def test_merged_passes_are_fewer_than_rules():
+    engine = RULES.engine('clean_content')
+    assert len(engine.passes) < len(engine.rules)
+    assert any('merged' in label for label in engine.labels)
+
+
+@pytest.mark.parametrize('pattern, flags, mergeable', [
+    (r'^.*Sign Up.*$', re.MULTILINE, True),
+    (r'^Known Issues$', re.MULTILINE | re.IGNORECASE, True),
+    (r'^.*Sign Up.*$', 0, False),
+    (r'^.*Sign Up.*$', re.MULTILINE | re.DOTALL, False),
+    (r'^.*$', re.MULTILINE, False),
+    (r'^[^x]*$', re.MULTILINE, False),
+    (r'^a|b$', re.MULTILINE, False),
+    (r'^(a)\1$', re.MULTILINE, False),
+    (r'\s*data-\w+="[^"]*"', 0, False),
+    (r'^.*\$', re.MULTILINE, False),
+])
+def test_is_mergeable(pattern, flags, mergeable):
+    assert RuleEngine.is_mergeable(pattern, flags) is mergeable
+
+
+def test_overlapping_deletions_keep_their_order():
+    rules = [(r'data-[a-z]+="[^"]*"', '', 0), (r'\s*aria-[a-z]+', '', 0), (r'^\s*$\n', '', re.MULTILINE)]
+    merged = RuleEngine(rules)
+    sequential = RuleEngine(rules, merge=False)
+    for text in MERGE_ADVERSARIAL:
+        assert merged.apply(text) == sequential.apply(text)
+
+
+def test_byte_passes_match_text_passes():
+    engine = RULES.engine('clean_content')
+    for text in documents(5, seed=3):
+        data = text.encode('utf-8')
+        assert engine.accepts_bytes(data)
+        assert engine.apply(data).decode('utf-8') == engine.apply(text)
+
+
+def test_bytes_are_refused_where_they_could_disagree():
+    engine = RULES.engine('clean_content')
+    assert engine.accepts_bytes('Café \U0001F600'.encode('utf-8'))
+    assert not engine.accepts_bytes('Sign\u00a0Up'.encode('utf-8'))
+    assert not engine.accepts_bytes(b'line\r\n')
+    assert not engine.accepts_bytes(b'caf\xe9')
+
+
+def test_fingerprint_follows_the_rules():
+    rules = [(r'^a$', '', re.MULTILINE)]
+    assert RuleEngine(rules).fingerprint == RuleEngine(list(rules)).fingerprint
+    assert RuleEngine(rules).fingerprint != RuleEngine(rules + [(r'^b$', '', re.MULTILINE)]).fingerprint
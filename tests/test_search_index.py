@@ -0,0 +1,88 @@
+import pytest
+
+from search_index import (IndexBuilder, SearchIndex, tokenize, strip_frontmatter,
+                          encode_varint, decode_varint)
+
+DOCUMENTS = {
+    'database/add-record.md': ('Add Record', 'Add a record to a database table. The record gets an id.'),
+    'database/edit-record.md': ('Edit Record', 'Edit a record in a table by its id.'),
+    'api/webhooks.md': ('Webhooks', 'A webhook sends a record to your endpoint when a table changes.'),
+    'api/endpoints.md': ('Endpoints', 'Each API endpoint runs a function stack. Añadir registro.'),
+}
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    builder = IndexBuilder()
+    for path, (title, text) in DOCUMENTS.items():
+        builder.add(path, title, text)
+    path = tmp_path / 'search.idx'
+    assert builder.save(path) == path.stat().st_size
+    return path
+
+
+def test_varints_round_trip():
+    out = bytearray()
+    values = [0, 1, 127, 128, 300, 2 ** 32, 2 ** 63]
+    for value in values:
+        encode_varint(value, out)
+    offset = 0
+    for value in values:
+        decoded, offset = decode_varint(out, offset)
+        assert decoded == value
+    assert offset == len(out)
+
+
+def test_strip_frontmatter():
+    assert strip_frontmatter('---\ntitle: x\n---\n\nBody') == '\nBody'
+    assert strip_frontmatter('No frontmatter') == 'No frontmatter'
+
+
+def test_documents_are_stored_sorted(index_path):
+    with SearchIndex(index_path) as index:
+        assert index.doc_count == len(DOCUMENTS)
+        paths = [index.document(doc_id)[0] for doc_id in range(index.doc_count)]
+        assert paths == sorted(DOCUMENTS)
+        assert index.document(0)[1] == 'Endpoints'
+
+
+def test_search_ranks_matching_documents(index_path):
+    with SearchIndex(index_path) as index:
+        results = index.search('record')
+        assert [result['path'] for result in results][:1] == ['database/add-record.md']
+        assert {result['path'] for result in results} == {
+            'database/add-record.md', 'database/edit-record.md', 'api/webhooks.md'}
+        assert [result['score'] for result in results] == sorted((r['score'] for r in results), reverse=True)
+        assert index.search('record', limit=1) == results[:1]
+        assert index.search('nonexistent') == []
+
+
+def test_phrases_must_match_exactly(index_path):
+    with SearchIndex(index_path) as index:
+        assert [r['path'] for r in index.search('"database table"')] == ['database/add-record.md']
+        assert index.search('"table database"') == []
+        assert {r['path'] for r in index.search('"when a table" record')} == {'api/webhooks.md'}
+
+
+def test_unicode_tokens(index_path):
+    assert tokenize('Añadir REGISTRO') == ['añadir', 'registro']
+    with SearchIndex(index_path) as index:
+        assert [r['path'] for r in index.search('añadir')] == ['api/endpoints.md']
+
+
+def test_removed_documents_are_not_indexed(tmp_path):
+    builder = IndexBuilder()
+    builder.add('a.md', 'A', 'alpha beta')
+    builder.add('b.md', 'B', 'beta gamma')
+    builder.remove('a.md')
+    builder.save(tmp_path / 'search.idx')
+    with SearchIndex(tmp_path / 'search.idx') as index:
+        assert index.search('alpha') == []
+        assert [r['path'] for r in index.search('beta')] == ['b.md']
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / 'other.idx'
+    path.write_bytes(b'\0' * 128)
+    with pytest.raises(ValueError):
+        SearchIndex(path)
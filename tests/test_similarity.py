@@ -0,0 +1,54 @@
+from similarity import SimilarityIndex, term_counts
+
+DOCUMENTS = {
+    'add-record.md': 'add record database table insert record fields database',
+    'edit-record.md': 'edit record database table update record fields database',
+    'delete-record.md': 'delete record database table remove record database',
+    'webhook.md': 'webhook event trigger payload endpoint webhook signature',
+    'webhook-retry.md': 'webhook retry event payload delivery webhook failure',
+    'pricing.md': 'plans billing invoices pricing seats upgrade',
+}
+
+
+def index(documents=DOCUMENTS, **options):
+    similarity = SimilarityIndex(**options)
+    for key, text in documents.items():
+        similarity.add(key, term_counts(text))
+    return similarity
+
+
+def test_term_counts_skip_stopwords_and_short_words():
+    counts = term_counts('the api and an api of the database is ok')
+    assert counts == {'api': 2, 'database': 1}
+
+
+def test_related_documents_share_terms():
+    related = index().related(k=2)
+    assert set(related['add-record.md']) == {'edit-record.md', 'delete-record.md'}
+    assert related['webhook.md'] == ['webhook-retry.md']
+    assert related['pricing.md'] == []
+    assert all(key not in others for key, others in related.items())
+
+
+def test_related_is_best_first_and_limited():
+    related = index().related(k=1)
+    assert related['webhook-retry.md'] == ['webhook.md']
+    assert all(len(others) <= 1 for others in related.values())
+
+
+def test_min_score_filters_weak_matches():
+    assert all(not others for others in index().related(min_score=1.1).values())
+
+
+def test_add_replaces_a_document():
+    similarity = index()
+    similarity.add('pricing.md', term_counts('webhook event payload webhook'))
+    assert len(similarity) == len(DOCUMENTS)
+    assert 'pricing.md' in similarity.related()['webhook.md']
+
+
+def test_truncated_postings_still_find_the_strongest_match():
+    documents = {f'filler-{n}.md': f'database common filler{n}' for n in range(20)}
+    documents['pair-a.md'] = documents['pair-b.md'] = 'database common unique shared words'
+    related = index(documents, max_postings=4).related(k=1)
+    assert related['pair-a.md'] == ['pair-b.md']
@@ -0,0 +1,79 @@
+import os
+import shutil
+
+from snapshot import Snapshotter, list_snapshots, prune_snapshots, new_snapshot_path
+from writer import write_atomic
+
+
+def read_tree(root):
+    return {path.relative_to(root).as_posix(): path.read_bytes()
+            for path in sorted(root.rglob('*')) if path.is_file()}
+
+
+def make_source(root):
+    (root / 'guides').mkdir(parents=True)
+    (root / 'README.md').write_text('# Knowledge base\n')
+    (root / 'guides' / 'a.md').write_text('# A\n\nFirst page\n')
+    (root / 'guides' / 'b.md').write_text('# B\n\nSecond page\n')
+    return root
+
+
+def test_snapshot_restores_the_tree_as_taken(tmp_path):
+    source = make_source(tmp_path / 'kb')
+    original = read_tree(source)
+    snapshot = Snapshotter(tmp_path / 'backups').snapshot(source)
+    assert read_tree(snapshot) == original
+
+    # The next run replaces one output, adds one and deletes one
+    write_atomic(source / 'guides' / 'a.md', b'# A\n\nRewritten\n')
+    (source / 'new.md').write_text('# New\n')
+    (source / 'guides' / 'b.md').unlink()
+    Snapshotter(tmp_path / 'backups').snapshot(source)
+
+    shutil.rmtree(source)
+    shutil.copytree(snapshot, source)
+    assert read_tree(source) == original
+
+
+def test_unchanged_files_are_linked(tmp_path):
+    source = make_source(tmp_path / 'kb')
+    first = Snapshotter(tmp_path / 'backups').snapshot(source)
+    write_atomic(source / 'guides' / 'a.md', b'# A\n\nChanged\n')
+
+    snapshotter = Snapshotter(tmp_path / 'backups')
+    second = snapshotter.snapshot(source)
+    assert snapshotter.linked == 2
+    assert snapshotter.reflinked + snapshotter.copied == 1
+    assert os.stat(first / 'README.md').st_ino == os.stat(second / 'README.md').st_ino
+    assert os.stat(first / 'guides' / 'a.md').st_ino != os.stat(second / 'guides' / 'a.md').st_ino
+    assert (first / 'guides' / 'a.md').read_text() == '# A\n\nFirst page\n'
+    assert (second / 'guides' / 'a.md').read_text() == '# A\n\nChanged\n'
+
+
+def test_snapshots_sort_in_order_taken_and_are_pruned(tmp_path):
+    source = make_source(tmp_path / 'kb')
+    backups = tmp_path / 'backups'
+    taken = [Snapshotter(backups, keep=3).snapshot(source) for _ in range(5)]
+    assert list_snapshots(backups) == taken[-3:]
+    assert new_snapshot_path(backups) not in taken
+    assert read_tree(taken[-1]) == read_tree(source)
+
+    assert prune_snapshots(backups, keep=1) == taken[-3:-1]
+    assert list_snapshots(backups) == taken[-1:]
+
+
+def test_interrupted_snapshot_leaves_no_partial_backup(tmp_path, monkeypatch):
+    source = make_source(tmp_path / 'kb')
+    backups = tmp_path / 'backups'
+    snapshotter = Snapshotter(backups)
+
+    def fail(path, target, previous):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(snapshotter, 'add', fail)
+    try:
+        snapshotter.snapshot(source)
+    except KeyboardInterrupt:
+        pass
+    assert list_snapshots(backups) == []
+    assert list(backups.iterdir()) == []
@@ -0,0 +1,76 @@
+import os
+import pickle
+
+from writer import write_atomic, OutputWriter, MemoryWriter, DocumentSpool
+
+
+def test_write_atomic_skips_identical_bytes(tmp_path):
+    path = tmp_path / 'nested' / 'page.md'
+    assert write_atomic(path, b'one', fsync=False)
+    inode = os.stat(path).st_ino
+    assert not write_atomic(path, b'one', fsync=False)
+    assert os.stat(path).st_ino == inode
+    assert write_atomic(path, b'two', fsync=False)
+    assert path.read_bytes() == b'two'
+    assert os.listdir(path.parent) == ['page.md']
+
+
+def test_output_writer_keeps_the_last_write_per_path(tmp_path):
+    writer = OutputWriter(threads=4, max_pending=2, fsync=False)
+    for n in range(20):
+        writer.write(tmp_path / f'{n % 3}.md', f'version {n}')
+    assert writer.close() == []
+    assert {path.name: path.read_text() for path in tmp_path.iterdir()} == {
+        '0.md': 'version 18', '1.md': 'version 19', '2.md': 'version 17'}
+    assert writer.written + writer.unchanged == 20
+
+
+def test_output_writer_reports_failures_once(tmp_path):
+    (tmp_path / 'file').write_text('not a directory')
+    writer = OutputWriter(fsync=False)
+    writer.write(tmp_path / 'file' / 'page.md', 'text')
+    writer.write(tmp_path / 'ok.md', 'text')
+    failures = writer.flush()
+    assert [output for output, _ in failures] == [str(tmp_path / 'file' / 'page.md')]
+    assert writer.close() == []
+    assert not pickle.loads(pickle.dumps(writer)).pending
+
+
+def test_memory_writer(tmp_path):
+    writer = MemoryWriter()
+    writer.write(tmp_path / 'b.md', 'one')
+    writer.write(tmp_path / 'a.md', 'two')
+    writer.write(tmp_path / 'b.md', 'one')
+    writer.write(tmp_path / 'b.md', 'three')
+    assert [(path.name, text) for path, text in writer.documents()] == [('b.md', 'three'), ('a.md', 'two')]
+    assert (writer.written, writer.unchanged) == (3, 1)
+    assert writer.read(str(tmp_path / 'a.md')) == 'two'
+
+
+def test_document_spool_is_an_ordered_mapping():
+    spool = DocumentSpool()
+    assert len(spool) == 0 and list(spool) == [] and 'a' not in spool
+    assert spool.pop('a', 'default') == 'default'
+
+    spool['b'] = ({'title': 'B'}, 'body b')
+    spool['a'] = ({'title': 'A'}, 'body a')
+    spool['b'] = ({'title': 'B2'}, 'body b2')
+    assert list(spool) == ['b', 'a'] and len(spool) == 2
+    assert 'a' in spool
+    assert spool.pop('b') == ({'title': 'B2'}, 'body b2')
+    assert spool.pop('b') is None
+    assert list(spool) == ['a']
+
+    path = spool.path
+    assert os.path.exists(path)
+    spool.close()
+    assert not os.path.exists(path)
+    assert len(spool) == 0
+
+
+def test_document_spool_is_not_shared_with_workers():
+    spool = DocumentSpool()
+    spool['a'] = 'value'
+    copy = pickle.loads(pickle.dumps(spool))
+    assert list(copy) == [] and spool.pop('a') == 'value'
+    spool.close()
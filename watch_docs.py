@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Documentation Watch Mode
+Keeps the knowledge base up to date as input pages change, rebuilding only the touched pages
+"""
+
+import os
+import time
+import argparse
+from pathlib import Path
+from collections import deque
+
+from rules import RULES
+from pipeline import discover_files
+from file_watch import open_watcher, debounced_changes, POLL_INTERVAL
+from search_index import IndexBuilder
+from process_xano_docs import XanoDocProcessor, SEARCH_INDEX_NAME
+
+# Seconds without further changes before a burst of them is rebuilt
+DEBOUNCE = 0.1
+
+
+class WatchSession:
+    """Runs one full build, then rebuilds changed inputs against the warm processor
+
+    The processor keeps its compiled rules, keyword automaton, similarity
+    and duplicate indexes, manifest and metadata run between batches, so a
+    batch costs only the changed pages. An input's old state is dropped
+    before it is rebuilt. Inputs that shared its output, as aliases of a
+    near-duplicate or by writing the same path, are rebuilt with it, and an
+    output nothing maps to any more is deleted. Cross-references are
+    recomputed for the whole knowledge base but rewritten only where they
+    changed.
+
+    The manifest is saved only on close; after a crash the next build
+    finds the stale entries by their hashes and rebuilds those inputs.
+    """
+
+    def __init__(self, processor):
+        self.processor = processor
+        self.related = {}
+
+    def relative(self, output):
+        return Path(output).relative_to(self.processor.output_dir).as_posix()
+
+    def build(self, workers=1, incremental=True):
+        """Full build, as process_xano_docs.py runs it"""
+        self.processor.process_all(workers=workers, incremental=incremental)
+        self.related = {entry['file']: entry['related_docs']
+                        for entry in self.processor.store.cross_references()}
+
+    def affected_inputs(self, paths):
+        """Inputs to rebuild for changed paths, which may be directories or vanished"""
+        known = self.processor.manifest.files
+        inputs = set()
+        for path in paths:
+            path = Path(path)
+            if path.is_dir():
+                inputs.update(str(found) for found in discover_files(path))
+            elif path.suffix == '.md':
+                inputs.add(str(path))
+            # A moved or deleted directory reports no events for its files
+            prefix = str(path) + os.sep
+            inputs.update(input_path for input_path in known if input_path.startswith(prefix))
+        return inputs
+
+    def release(self, input_path):
+        """Drop an input's previous result, returning its output if it owned one"""
+        processor = self.processor
+        entry = processor.manifest.files.pop(input_path, None)
+        processor.store.remove_input(input_path)
+        output = processor.file_mapping.pop(input_path, None)
+        if output is None or entry is None or entry['result'] is None or 'duplicate_of' in entry['result']:
+            return None
+
+        processor.sources.pop(output, None)
+        processor.documents.pop(output, None)
+        processor.similarity.documents.pop(output, None)
+        processor.duplicates.remove(output)
+        processor.written_outputs.discard(output)
+        if processor.search_index is not None:
+            processor.search_index.remove(self.relative(output))
+        return output
+
+    def rebuild(self, paths):
+        """Rebuild the inputs behind changed paths; returns how many were rebuilt"""
+        processor = self.processor
+        queue = deque(sorted(self.affected_inputs(paths)))
+        forced = set()
+        done = set()
+        released = set()
+        rebuilt = 0
+
+        while queue:
+            input_path = queue.popleft()
+            if input_path in done:
+                continue
+            done.add(input_path)
+
+            # Editors often save a page without changing it
+            try:
+                stat = os.stat(input_path)
+            except FileNotFoundError:
+                stat = None
+            if stat is not None and input_path not in forced and processor.manifest.lookup(input_path, stat):
+                continue
+            rebuilt += 1
+
+            output = self.release(input_path)
+            if output is not None:
+                released.add(output)
+                dependents = sorted(other for other, target in processor.file_mapping.items() if target == output)
+                forced.update(dependents)
+                done.difference_update(dependents)
+                queue.extend(dependents)
+            if stat is None:
+                continue
+
+            processor.record_result(processor.analyze_file(input_path, use_manifest=False))
+
+        processor.finish_writes()
+        for output in sorted(released - set(processor.file_mapping.values())):
+            try:
+                os.remove(output)
+                print(f"Removed {self.relative(output)}")
+            except FileNotFoundError:
+                pass
+
+        if rebuilt:
+            self.update_cross_references()
+            processor.generate_index_files()
+            processor.finish_writes()
+            processor.store.flush()
+            if processor.search_index is not None:
+                processor.search_index.save(processor.output_dir / SEARCH_INDEX_NAME)
+        return rebuilt
+
+    def update_cross_references(self):
+        """Record every document's related docs, writing the rebuilt ones and those whose list changed"""
+        processor = self.processor
+        processor.store.clear_cross_references()
+        related = {}
+        for output, related_docs in processor.related_documents():
+            relative = self.relative(output)
+            related[relative] = related_docs
+            if output in processor.documents or self.related.get(relative) != related_docs:
+                try:
+                    processor.writer.write(output, processor.render_document(output, related_docs))
+                except Exception as e:
+                    print(f"Error adding cross-references to {output}: {e}")
+        self.related = related
+
+    def watch(self, watcher, debounce=DEBOUNCE):
+        """Rebuild each debounced burst of changes until interrupted"""
+        print(f"Watching {self.processor.input_dir} (Ctrl-C to stop)")
+        while True:
+            changed = debounced_changes(watcher, debounce)
+            started = time.perf_counter()
+            count = self.rebuild(changed)
+            if count:
+                print(f"Rebuilt {count} file{'s' if count != 1 else ''} "
+                      f"in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    def close(self):
+        """Finish pending writes, save the manifest and close the document spool and metadata store"""
+        for output, error in self.processor.writer.close():
+            print(f"Error writing {output}: {error}")
+        self.processor.documents.close()
+        if self.processor.manifest is not None:
+            self.processor.manifest.save()
+        self.processor.store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the Xano knowledge base as documentation pages change")
+    parser.add_argument('--input-dir', default="/root/docu-download/output/markdown",
+                        help="Markdown mirror to watch")
+    parser.add_argument('--output-dir', default="/root/xano-knowledge", help="Knowledge base to keep up to date")
+    parser.add_argument('--workers', type=int, default=1, help="Number of worker processes for the initial build")
+    parser.add_argument('--full', action='store_true', help="Ignore the build manifest in the initial build")
+    parser.add_argument('--poll', action='store_true', help="Poll for changes instead of using inotify")
+    parser.add_argument('--poll-interval', type=float, default=POLL_INTERVAL, help="Seconds between polls")
+    parser.add_argument('--debounce', type=float, default=DEBOUNCE,
+                        help="Seconds without changes before a burst is rebuilt")
+    parser.add_argument('--search-index', action='store_true', help=f"Also keep {SEARCH_INDEX_NAME} up to date")
+    parser.add_argument('--rules-config', help="JSON file adding or disabling cleaning rules")
+    args = parser.parse_args()
+
+    if args.rules_config:
+        try:
+            RULES.load_config(args.rules_config)
+        except (OSError, ValueError) as e:
+            parser.error(f"--rules-config: {e}")
+
+    processor = XanoDocProcessor(input_dir=args.input_dir, output_dir=args.output_dir)
+    if args.search_index:
+        processor.search_index = IndexBuilder()
+
+    session = WatchSession(processor)
+    # Watch before building so edits made during the build are not missed
+    watcher = open_watcher(args.input_dir, poll=args.poll, interval=args.poll_interval)
+    try:
+        session.build(workers=args.workers, incremental=not args.full)
+        session.watch(watcher, args.debounce)
+    except KeyboardInterrupt:
+        print("\nStopped watching")
+    finally:
+        watcher.close()
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Output Writer
+Writes finished documents from a bounded thread pool with atomic renames
+"""
+
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+from pathlib import Path
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+def temp_path(path):
+    """Hidden sibling of path that is unique to this process and thread"""
+    return path.with_name(f'.{path.name}.{os.getpid()}-{threading.get_ident()}.tmp')
+
+
+def write_atomic(path, data, fsync=True):
+    """Replace path with data unless it already holds exactly those bytes
+
+    The bytes go to a temporary file in the same directory that is renamed
+    over the target, so readers and crashes never see a partial document.
+    Returns True if the file was written and False if it was unchanged.
+    """
+    path = Path(path)
+    try:
+        if path.stat().st_size == len(data):
+            with open(path, 'rb') as f:
+                if f.read() == data:
+                    return False
+    except FileNotFoundError:
+        pass
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = temp_path(path)
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    return True
+
+
+class OutputWriter:
+    """Queues whole-document writes so slow storage overlaps with processing
+
+    At most max_pending writes are queued at once; write() waits for the
+    oldest when the queue is full. Writes to the same path keep their order.
+    """
+
+    def __init__(self, threads=4, max_pending=64, fsync=True):
+        self.threads = threads
+        self.max_pending = max_pending
+        self.fsync = fsync
+        self.executor = None
+        self.pending = deque()
+        self.by_path = {}
+        self.written = 0
+        self.unchanged = 0
+        self.failures = []
+
+    def __getstate__(self):
+        # Pool workers get an idle writer; queued writes stay with the parent
+        return {'threads': self.threads, 'max_pending': self.max_pending, 'fsync': self.fsync}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def write(self, path, text):
+        """Queue text to be written to path as UTF-8"""
+        path = Path(path)
+        data = text.encode('utf-8') if isinstance(text, str) else text
+
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.threads)
+        previous = self.by_path.get(path)
+        if previous is not None:
+            self.collect(previous)
+        while len(self.pending) >= self.max_pending:
+            self.collect(self.pending.popleft())
+
+        future = self.executor.submit(write_atomic, path, data, self.fsync)
+        future.path = path
+        future.collected = False
+        self.pending.append(future)
+        self.by_path[path] = future
+
+    def collect(self, future):
+        """Wait for one queued write and record its outcome once"""
+        if future.collected:
+            return
+        future.collected = True
+        try:
+            if future.result():
+                self.written += 1
+            else:
+                self.unchanged += 1
+        except Exception as e:
+            self.failures.append((str(future.path), e))
+        finally:
+            if self.by_path.get(future.path) is future:
+                del self.by_path[future.path]
+
+    def flush(self):
+        """Wait for every queued write and return the failures since the last flush"""
+        while self.pending:
+            self.collect(self.pending.popleft())
+        failures, self.failures = self.failures, []
+        return failures
+
+    def close(self):
+        """Flush and stop the writer threads; a later write starts them again"""
+        failures = self.flush()
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        return failures
+
+
+class MemoryWriter:
+    """Stands in for OutputWriter when a pipeline keeps a stage's outputs in memory
+
+    Texts are kept by path. A rewrite replaces the text but keeps the path's
+    place, so documents() lists paths in the order they were first written.
+    """
+
+    def __init__(self):
+        self.texts = {}
+        self.written = 0
+        self.unchanged = 0
+
+    def write(self, path, text):
+        """Keep text as the content of path"""
+        path = Path(path)
+        if self.texts.get(path) == text:
+            self.unchanged += 1
+        else:
+            self.written += 1
+        self.texts[path] = text
+
+    def read(self, path):
+        """Text last written to path"""
+        return self.texts[Path(path)]
+
+    def documents(self):
+        """(path, text) of every output, in the order paths were first written"""
+        return self.texts.items()
+
+    def flush(self):
+        return []
+
+    def close(self):
+        return []
+
+
+class DocumentSpool:
+    """Documents held back until they can be rendered, kept in a temporary file instead of memory
+
+    Maps an output path to any picklable value, such as a document's
+    (frontmatter, body). Values are stored in a SQLite database in the
+    system's temporary directory, created on first use and deleted on
+    close. Memory stays flat however many documents wait. Iterating lists
+    the outputs in the order they were first stored. A pipeline that keeps
+    every document in memory anyway can use a dict instead.
+    """
+
+    def __init__(self):
+        self.path = None
+        self.connection = None
+
+    def __getstate__(self):
+        # Pool workers get an empty spool; stored documents stay with the parent
+        return {'path': None, 'connection': None}
+
+    def open(self):
+        """The spool's database, created on first use"""
+        if self.connection is None:
+            fd, self.path = tempfile.mkstemp(suffix='.spool')
+            os.close(fd)
+            self.connection = sqlite3.connect(self.path, isolation_level=None)
+            self.connection.execute("PRAGMA journal_mode=OFF")
+            self.connection.execute("PRAGMA synchronous=OFF")
+            self.connection.execute("CREATE TABLE documents (output TEXT PRIMARY KEY, value BLOB NOT NULL)")
+        return self.connection
+
+    def __setitem__(self, output, value):
+        # An update keeps the output's place in the iteration order
+        self.open().execute(
+            "INSERT INTO documents VALUES (?, ?) ON CONFLICT (output) DO UPDATE SET value = excluded.value",
+            (str(output), pickle.dumps(value, pickle.HIGHEST_PROTOCOL)))
+
+    def __contains__(self, output):
+        if self.connection is None:
+            return False
+        return self.connection.execute(
+            "SELECT 1 FROM documents WHERE output = ?", (str(output),)).fetchone() is not None
+
+    def __len__(self):
+        if self.connection is None:
+            return 0
+        return self.connection.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def __iter__(self):
+        if self.connection is None:
+            return iter(())
+        return iter([output for output, in self.connection.execute("SELECT output FROM documents ORDER BY rowid")])
+
+    def pop(self, output, default=None):
+        """Remove an output's value and return it, or default if none is stored"""
+        if self.connection is None:
+            return default
+        row = self.connection.execute("SELECT value FROM documents WHERE output = ?", (str(output),)).fetchone()
+        if row is None:
+            return default
+        self.connection.execute("DELETE FROM documents WHERE output = ?", (str(output),))
+        return pickle.loads(row[0])
+
+    def close(self):
+        """Delete the spool's database"""
+        if self.connection is not None:
+            self.connection.close()
+            os.remove(self.path)
+        self.path = None
+        self.connection = None